@@ -0,0 +1,157 @@
+import numpy as np
+
+from profiling import timed
+
+PERIODS_PER_YEAR = 252   # ticks are treated as trading days when annualizing
+VAR_LEVEL = 0.95
+VAR_LOOKBACK = 250
+REPORT_LOOKBACK = 1000   # ticks of history the Portfolio tab's report covers, so its cost doesn't grow with the game
+
+
+# Every function below works on whole matrices: rows are ticks, columns are tickers (or a single series)
+
+def simple_returns(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[1:] / values[:-1] - 1.0
+
+
+def rolling_volatility(returns, window=20):
+    # Sample standard deviation over a trailing window, from running sums; one row per full window
+    r = np.asarray(returns, dtype=np.float64)
+    if len(r) < window or window < 2:
+        return np.empty((0,) + r.shape[1:])
+    zero = np.zeros((1,) + r.shape[1:])
+    s1 = np.concatenate([zero, np.cumsum(r, axis=0)])
+    s2 = np.concatenate([zero, np.cumsum(r * r, axis=0)])
+    total = s1[window:] - s1[:-window]
+    squares = s2[window:] - s2[:-window]
+    variance = (squares - total * total / window) / (window - 1)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def equal_weight_index(returns):
+    # Returns of an index holding every ticker in equal weight, rebalanced every tick
+    return np.asarray(returns).mean(axis=1)
+
+
+def beta(returns, market):
+    r = np.asarray(returns, dtype=np.float64)
+    m = np.asarray(market, dtype=np.float64)
+    if len(m) < 2:
+        return np.full(r.shape[1:], np.nan)
+    m = m - m.mean()
+    variance = m @ m
+    if variance == 0:
+        return np.full(r.shape[1:], np.nan)
+    return m @ (r - r.mean(axis=0)) / variance
+
+
+def max_drawdown(values):
+    # Largest peak-to-trough fall as a fraction of the peak (0.25 = 25% below the high)
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.zeros(values.shape[1:])
+    peak = np.maximum.accumulate(values, axis=0)
+    return np.max(1.0 - values / peak, axis=0)
+
+
+def sharpe_ratio(returns, risk_free=0.0, periods=PERIODS_PER_YEAR):
+    r = np.asarray(returns, dtype=np.float64) - risk_free / periods
+    std = r.std(axis=0, ddof=1) if len(r) > 1 else np.full(r.shape[1:], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.sqrt(periods) * r.mean(axis=0) / std
+
+
+def sortino_ratio(returns, risk_free=0.0, periods=PERIODS_PER_YEAR):
+    # Like Sharpe, but only returns below the risk-free rate count as risk
+    r = np.asarray(returns, dtype=np.float64) - risk_free / periods
+    downside = np.sqrt(np.mean(np.minimum(r, 0.0) ** 2, axis=0)) if len(r) else np.full(r.shape[1:], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.sqrt(periods) * r.mean(axis=0) / downside
+
+
+def historical_var(pnl, level=VAR_LEVEL):
+    # Loss not exceeded with probability `level`, from the empirical P&L distribution
+    pnl = np.asarray(pnl, dtype=np.float64)
+    if len(pnl) == 0:
+        return 0.0
+    return max(0.0, -float(np.quantile(pnl, 1.0 - level)))
+
+
+def monte_carlo_var(returns, exposure, level=VAR_LEVEL, simulations=10_000, rng=None, chunk=1_000):
+    """Value at risk of holding `exposure` dollars per ticker, by simulating correlated ticker returns.
+
+    Each scenario draws one return per ticker from a joint normal with the sample mean
+    and covariance of `returns`, revalues every position at it, and sums the P&L. The
+    covariance is factored from an SVD of the centered returns, so its rank is at most
+    the number of rows. That also holds when there are more tickers than rows and the
+    covariance is singular. Each scenario costs O(tickers x rank). Scenarios are drawn
+    `chunk` at a time to bound memory.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    if len(r) < 2:
+        return 0.0
+    rng = rng if rng is not None else np.random.default_rng(0)
+    exposure = np.asarray(exposure, dtype=np.float64)
+    mean = r.mean(axis=0)
+    # Cov = F F' with F = V S / sqrt(n - 1), from the SVD of the centered returns
+    _, s, vt = np.linalg.svd(r - mean, full_matrices=False)
+    factors = vt.T * (s / np.sqrt(len(r) - 1))
+    pnl = np.empty(simulations)
+    for start in range(0, simulations, chunk):
+        stop = min(start + chunk, simulations)
+        scenario = mean + rng.standard_normal((stop - start, factors.shape[1])) @ factors.T
+        # Each position gains or loses its exposure times its ticker's simulated return
+        pnl[start:stop] = scenario @ exposure
+    return historical_var(pnl, level)
+
+
+@timed('analytics.risk_report')
+def risk_report(history, shares, index, lookback=None, vol_window=20, var_lookback=VAR_LOOKBACK,
+                level=VAR_LEVEL, simulations=10_000, seed=0):
+    """Per-position and portfolio risk metrics for a day x ticker price history.
+
+    `shares` holds the number of shares in each ticker listed in `index` (column
+    numbers of `history`). Positions are valued at the last row. Portfolio metrics
+    apply today's holdings to the whole history (or its last `lookback` ticks).
+    Returns a dict with a 'positions' dict of arrays (one entry per position) and a
+    'portfolio' dict of floats.
+    """
+    history = np.asarray(history, dtype=np.float64)
+    if lookback is not None:
+        history = history[-lookback:]
+    index = np.asarray(index, dtype=np.intp)
+    shares = np.asarray(shares, dtype=np.float64)
+
+    held = history[:, index]
+    returns = simple_returns(held)
+    market = equal_weight_index(simple_returns(history))
+    exposure = shares * held[-1]
+    value = float(exposure.sum())
+    weights = exposure / value if value else np.zeros_like(exposure)
+
+    # Only the latest window is reported, so don't compute the whole rolling series
+    volatility = rolling_volatility(returns[-vol_window:], vol_window)
+    positions = {
+        'volatility': volatility[-1] if len(volatility) else np.full(len(index), np.nan),
+        'beta': beta(returns, market),
+        'max_drawdown': max_drawdown(held),
+        'sharpe': sharpe_ratio(returns),
+        'sortino': sortino_ratio(returns),
+    }
+
+    portfolio_returns = returns @ weights
+    portfolio_value = held @ shares
+    recent = returns[-var_lookback:]
+    rng = np.random.default_rng(seed)
+    portfolio = {
+        'value': value,
+        'volatility': float(np.std(portfolio_returns[-vol_window:], ddof=1)) if len(portfolio_returns) > 1 else np.nan,
+        'beta': float(beta(portfolio_returns[:, None], market)[0]),
+        'max_drawdown': float(max_drawdown(portfolio_value)) if value else 0.0,
+        'sharpe': float(sharpe_ratio(portfolio_returns)),
+        'sortino': float(sortino_ratio(portfolio_returns)),
+        'var_historical': historical_var(recent @ exposure, level),
+        'var_monte_carlo': monte_carlo_var(recent, exposure, level, simulations, rng),
+    }
+    return {'positions': positions, 'portfolio': portfolio, 'level': level}
@@ -0,0 +1,293 @@
+"""Strategy API and backtester over simulated or recorded Stock Game price paths.
+
+    python backtest.py --days 1000 --fast 2:20 --slow 10:100:5 --workers 8
+    python backtest.py --game <saved game id> --fast 5 --slow 20 --event
+
+A strategy subclasses `Strategy` and implements `on_bar(prices, portfolio)`,
+returning orders for the order book; `backtest` replays a price path through it
+bar by bar. Signal strategies such as the MA crossover also have a vectorized
+form that `grid_search` runs over thousands of parameter pairs on a process pool.
+"""
+import argparse
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import analytics
+from game import StockMarketGame
+from indicators import moving_average
+from ledger import Ledger
+from models import MODELS
+from orders import OrderBook
+from simulation import SEASON_TICKS, write_results
+from storage import DEFAULT_SAVE_DIR, GameStore
+
+STARTING_CASH = 10000
+
+
+class Strategy:
+    """Base class for trading strategies.
+
+    `on_bar` is called once per tick with the prices of every ticker (aligned with
+    `self.symbols`) and the player's `ledger.Ledger`, and returns an iterable of orders.
+    Orders are dicts of `orders.OrderBook.place` arguments; `buy` and `sell` build them.
+    Market orders fill at this bar's price, limit and stop orders rest in the book.
+    """
+
+    def start(self, symbols):
+        self.symbols = list(symbols)
+
+    def on_bar(self, prices, portfolio):
+        raise NotImplementedError
+
+    @staticmethod
+    def buy(symbol, shares, kind='market', price=None, tif='gtc'):
+        return {'symbol': symbol, 'side': 'buy', 'kind': kind, 'shares': shares, 'price': price, 'tif': tif}
+
+    @staticmethod
+    def sell(symbol, shares, kind='market', price=None, tif='gtc'):
+        return {'symbol': symbol, 'side': 'sell', 'kind': kind, 'shares': shares, 'price': price, 'tif': tif}
+
+
+class MACrossover(Strategy):
+    """Hold a ticker while its fast MA is above its slow MA.
+
+    The starting cash is split evenly into one sleeve per ticker, and each sleeve
+    compounds on its own: an entry buys as many whole shares as the sleeve's cash
+    covers, and an exit puts the proceeds back into that sleeve. `ma_crossover_equity`
+    is the vectorized form of the same rules.
+    """
+
+    def __init__(self, fast=5, slow=20):
+        if fast >= slow:
+            raise ValueError("The fast moving average needs a shorter window than the slow one")
+        self.fast = fast
+        self.slow = slow
+
+    def start(self, symbols):
+        super().start(symbols)
+        self.window = deque(maxlen=self.slow + 1)
+        self.sleeves = None   # uninvested cash per ticker
+
+    def on_bar(self, prices, portfolio):
+        self.window.append(np.array(prices))
+        if self.sleeves is None:
+            self.sleeves = np.full(len(self.symbols), portfolio.cash / len(self.symbols))
+        if len(self.window) <= self.slow:
+            return []
+        # Same definition as the chart's MA: the previous `window` prices, current one excluded
+        rows = np.array(self.window)[:-1]
+        long = rows[-self.fast:].mean(axis=0) > rows.mean(axis=0)
+
+        # Market orders fill at this bar's price, so the sleeves are settled as the orders are made
+        orders = []
+        for i, symbol in enumerate(self.symbols):
+            held = portfolio.portfolio.get(symbol, 0)
+            if long[i] and not held:
+                shares = int(min(self.sleeves[i], portfolio.cash) // prices[i])
+                if shares:
+                    self.sleeves[i] -= shares * prices[i]
+                    orders.append(self.buy(symbol, shares))
+            elif not long[i] and held:
+                self.sleeves[i] += held * prices[i]
+                orders.append(self.sell(symbol, held))
+        return orders
+
+
+def backtest(strategy, paths, symbols, cash=STARTING_CASH):
+    """Run `strategy` bar by bar over a (ticks, tickers) price matrix.
+
+    Returns a dict with the equity curve (one value per bar), the number of trades,
+    bars processed (ticks x tickers) and the elapsed time.
+    """
+    paths = np.asarray(paths, dtype=np.float64)
+    book = OrderBook(symbols)
+    ledger = Ledger(symbols, cash)
+    strategy.start(symbols)
+    equity = np.empty(len(paths))
+    trades = 0
+
+    def settle():
+        nonlocal trades
+        for fill in book.pop_fills('backtest'):
+            order = fill.order
+            if ledger.trade(order.symbol, order.shares if order.side == 'buy' else -order.shares, fill.price):
+                trades += 1
+
+    start = time.perf_counter()
+    for tick, prices in enumerate(paths):
+        ledger.mark(prices, tick)
+        book.match(prices, tick)
+        settle()
+        for order in strategy.on_bar(prices, ledger):
+            i = book.index[order['symbol']]
+            book.place('backtest', day=tick, current_price=prices[i], **order)
+        settle()
+        equity[tick] = ledger.value
+    elapsed = time.perf_counter() - start
+    return {'equity': equity, 'trades': trades, 'bars': paths.size, 'seconds': elapsed}
+
+
+# --- vectorized signal strategies ------------------------------------------
+
+def _crossover_sleeves(paths, averages, pairs, cash):
+    """Equity curves (ticks x pairs) of the MA crossover, one tick at a time for every pair at once.
+
+    `averages` stacks the moving averages of each window (windows x ticks x tickers) and
+    `pairs` holds (fast, slow) rows of indexes into it. Sizing follows `MACrossover`:
+    one sleeve per ticker, entered with as many whole shares as its cash covers.
+    """
+    ticks, tickers = paths.shape
+    fast, slow = pairs[:, 0], pairs[:, 1]
+    sleeves = np.full((len(pairs), tickers), cash / tickers)
+    shares = np.zeros_like(sleeves)
+    equity = np.empty((ticks, len(pairs)))
+    for tick, prices in enumerate(paths):
+        means = averages[:, tick]
+        with np.errstate(invalid='ignore'):
+            long = means[fast] > means[slow]   # NaN (not enough history yet) compares False
+        sell = ~long & (shares > 0)
+        sleeves += np.where(sell, shares * prices, 0.0)
+        shares[sell] = 0.0
+        bought = np.where(long & (shares == 0), np.floor(sleeves / prices), 0.0)
+        sleeves -= bought * prices
+        shares += bought
+        equity[tick] = sleeves.sum(axis=1) + shares @ prices
+    return equity
+
+
+def _stack_averages(paths, windows, averages):
+    for window in windows:
+        if window not in averages:
+            averages[window] = moving_average(paths, window)
+    return np.stack([averages[window] for window in windows])
+
+
+def ma_crossover_equity(paths, fast, slow, cash=STARTING_CASH, averages=None):
+    """Equity curve of the MA crossover for every bar, computed for all tickers at once.
+
+    Same rules as `MACrossover` run through `backtest`: each ticker gets an equal sleeve
+    of `cash`, bought in whole shares while its fast MA is above its slow MA and sold
+    back into the sleeve when it isn't, so every sleeve compounds on its own value.
+    `averages` caches moving averages by window so a parameter grid computes each
+    window only once.
+    """
+    paths = np.asarray(paths, dtype=np.float64)
+    averages = {} if averages is None else averages
+    stacked = _stack_averages(paths, (fast, slow), averages)
+    return _crossover_sleeves(paths, stacked, np.array([[0, 1]]), cash)[:, 0]
+
+
+def _run_grid_chunk(paths, pairs, cash):
+    windows = sorted({window for pair in pairs for window in pair})
+    position = {window: i for i, window in enumerate(windows)}
+    stacked = _stack_averages(paths, windows, {})
+    equity = _crossover_sleeves(paths, stacked, np.array([[position[f], position[s]] for f, s in pairs]), cash)
+    returns = equity[1:] / equity[:-1] - 1.0
+    max_drawdown = analytics.max_drawdown(equity)
+    sharpe = analytics.sharpe_ratio(returns)
+    return [{
+        'fast': fast,
+        'slow': slow,
+        'final_value': equity[-1, i],
+        'return': equity[-1, i] / cash - 1.0,
+        'max_drawdown': float(max_drawdown[i]),
+        'sharpe': float(sharpe[i]),
+    } for i, (fast, slow) in enumerate(pairs)]
+
+
+def grid_search(paths, fasts, slows, cash=STARTING_CASH, workers=None, chunk_size=None):
+    """Vectorized MA crossover backtest for every (fast, slow) pair with fast < slow.
+
+    Returns (results sorted by final value, bars per second), where a bar is one
+    ticker's price on one tick for one parameter pair.
+    """
+    paths = np.asarray(paths, dtype=np.float64)
+    pairs = [(fast, slow) for fast, slow in itertools.product(fasts, slows) if fast < slow]
+    if not pairs:
+        raise ValueError("No (fast, slow) pair with fast < slow")
+    workers = workers or os.cpu_count() or 1
+    # Each chunk steps through the ticks once for all of its pairs, so keep them large: a few per worker
+    chunk_size = chunk_size or max(1, -(-len(pairs) // (workers * 4)))
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        parts = [_run_grid_chunk(paths, chunk, cash) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_grid_chunk, *zip(*[(paths, chunk, cash) for chunk in chunks])))
+    elapsed = time.perf_counter() - start
+
+    results = pd.DataFrame([row for part in parts for row in part])
+    bars_per_second = len(pairs) * paths.size / elapsed
+    return results.sort_values('final_value', ascending=False, ignore_index=True), bars_per_second
+
+
+# --- price paths -------------------------------------------------------------
+
+def simulated_paths(days, seed=0, model=None):
+    # Play a headless game for `days` days; returns (symbols, ticks x tickers price matrix)
+    game = StockMarketGame(seed=seed, model=model, season=SEASON_TICKS)
+    for _ in range(days):
+        game.advance_day()
+    return list(game.stocks), np.array(game.engine.history.values)
+
+
+def recorded_paths(game_id, root=DEFAULT_SAVE_DIR):
+    # Price history of a saved game, see storage.GameStore
+    store = GameStore(root, game_id)
+    game, _ = store.load()
+    store.close()
+    return list(game.stocks), np.array(game.engine.history.values)
+
+
+def parse_windows(text):
+    # "5", "5,10,20" or a range "start:stop[:step]" (stop included)
+    if ':' in text:
+        parts = [int(p) for p in text.split(':')]
+        start, stop, step = parts[0], parts[1], parts[2] if len(parts) > 2 else 1
+        return list(range(start, stop + 1, step))
+    return [int(p) for p in text.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest MA crossover strategies on Stock Game price paths.")
+    parser.add_argument('--days', type=int, default=1000, help="days to simulate (ignored with --game)")
+    parser.add_argument('--model', choices=sorted(MODELS), default='uniform', help="price model")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--game', help="backtest a saved game's price history instead")
+    parser.add_argument('--save-dir', default=DEFAULT_SAVE_DIR)
+    parser.add_argument('--fast', default='2:20', help="fast MA windows, e.g. 5 or 2,5,10 or 2:20[:step]")
+    parser.add_argument('--slow', default='10:100:5', help="slow MA windows, same format")
+    parser.add_argument('--workers', type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument('--event', action='store_true', help="also run the best pair through the bar-by-bar backtester")
+    parser.add_argument('--out', help="optional results table (.csv or .parquet)")
+    args = parser.parse_args(argv)
+
+    if args.game:
+        symbols, paths = recorded_paths(args.game, args.save_dir)
+    else:
+        symbols, paths = simulated_paths(args.days, args.seed, args.model)
+
+    results, bars_per_second = grid_search(paths, parse_windows(args.fast), parse_windows(args.slow), workers=args.workers)
+    print(f"{len(results)} parameter pairs x {len(paths)} ticks x {len(symbols)} tickers: {bars_per_second:,.0f} bars/s")
+    with pd.option_context('display.float_format', '{:,.3f}'.format, 'display.width', 120):
+        print(results.head(10).to_string())
+    if args.out:
+        write_results(results, args.out)
+
+    if args.event:
+        best = results.iloc[0]
+        run = backtest(MACrossover(int(best['fast']), int(best['slow'])), paths, symbols)
+        print(f"bar-by-bar MA({int(best['fast'])}/{int(best['slow'])}): final value ${run['equity'][-1]:,.2f}, "
+              f"{run['trades']} trades, {run['bars'] / run['seconds']:,.0f} bars/s")
+
+
+if __name__ == "__main__":
+    main()
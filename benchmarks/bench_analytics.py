@@ -0,0 +1,38 @@
+"""Time to build the Portfolio tab's risk report for large holdings and long histories.
+
+Run from the project root:
+    python -m benchmarks.bench_analytics
+"""
+import time
+
+import numpy as np
+
+from analytics import risk_report
+
+SIZES = [(12, 3, 1_000), (12, 12, 10_000), (1_000, 1_000, 10_000)]  # (tickers, holdings, days)
+
+
+def run(sizes=SIZES, repeat=3, seed=0):
+    results = []
+    for tickers, holdings, days in sizes:
+        rng = np.random.default_rng(seed)
+        history = 100 * np.cumprod(1 + rng.normal(0.0003, 0.02, (days, tickers)), axis=0)
+        index = rng.choice(tickers, holdings, replace=False)
+        shares = rng.integers(1, 100, holdings)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            risk_report(history, shares, index)
+            best = min(best, time.perf_counter() - start)
+        results.append({'tickers': tickers, 'holdings': holdings, 'days': days, 'report_ms': best * 1000})
+    return results
+
+
+def main():
+    print(f"{'tickers':>8} {'holdings':>9} {'days':>7} {'report ms':>10}")
+    for row in run():
+        print(f"{row['tickers']:>8} {row['holdings']:>9} {row['days']:>7} {row['report_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Figure build time and JSON payload size of the stock chart against history length.
+
+Compares the full-resolution SVG chart with the downsampled/WebGL one, plus a
+FigureCache hit. Run from the project root:
+    python -m benchmarks.bench_charts
+"""
+import time
+
+from charts import FigureCache, build_stock_chart
+from engine import MarketEngine
+from game import Stock
+from indicators import IndicatorCache
+
+HISTORY_LENGTHS = [100, 1_000, 10_000, 100_000]
+
+
+def make_stock(days, seed=0):
+    stock = Stock('Benchmark Corp', 100.0, 0.02, 0.0005, symbol='BENCH')
+    engine = MarketEngine([stock.price], [stock.volatility], [stock.trend], seed=seed)
+    stock.bind(engine, 0)
+    for _ in range(days - 1):
+        engine.step()
+    return stock
+
+
+def best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(lengths=HISTORY_LENGTHS):
+    results = []
+    for days in lengths:
+        stock = make_stock(days)
+        # Fresh indicator cache each build, so the numbers include computing the series
+        full_time, full_fig = best_of(lambda: build_stock_chart(
+            stock, IndicatorCache(), max_points=None, webgl_threshold=None))
+        fast_time, fast_fig = best_of(lambda: build_stock_chart(stock, IndicatorCache()))
+
+        full_json, full_payload = best_of(full_fig.to_json)
+        fast_json, fast_payload = best_of(fast_fig.to_json)
+
+        cache = FigureCache()
+        cache.get(('BENCH', days), lambda: fast_fig)
+        hit_time, _ = best_of(lambda: cache.get(('BENCH', days), lambda: None))
+
+        results.append({
+            'days': days,
+            'full_ms': full_time * 1000,
+            'full_json_ms': full_json * 1000,
+            'full_kb': len(full_payload) / 1024,
+            'fast_ms': fast_time * 1000,
+            'fast_json_ms': fast_json * 1000,
+            'fast_kb': len(fast_payload) / 1024,
+            'cached_us': hit_time * 1e6,
+        })
+    return results
+
+
+def main():
+    print(f"{'':>8} {'--------- full ---------':>30} {'------ downsampled -----':>30}")
+    print(f"{'days':>8} {'build ms':>9} {'json ms':>9} {'KB':>10} {'build ms':>9} {'json ms':>9} {'KB':>10} {'cache hit us':>13}")
+    for row in run():
+        print(f"{row['days']:>8} {row['full_ms']:>9.1f} {row['full_json_ms']:>9.1f} {row['full_kb']:>10.0f} "
+              f"{row['fast_ms']:>9.1f} {row['fast_json_ms']:>9.1f} {row['fast_kb']:>10.0f} {row['cached_us']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Ticks/sec of the batched MarketEngine against the old per-Stock Python loop.
+
+Run from the project root:
+    python -m benchmarks.bench_engine
+"""
+import random
+import time
+from datetime import datetime
+
+import numpy as np
+
+from engine import MarketEngine
+
+UNIVERSE_SIZES = [12, 1_000, 100_000]
+
+
+class LegacyStock:
+    def __init__(self, price, volatility, trend):
+        self.price = price
+        self.history = [price]
+        self.dates = [datetime.now()]
+        self.volatility = volatility
+        self.trend = trend
+
+
+def legacy_update(stocks, event_impact):
+    # The loop StockMarketGame.update_prices used before MarketEngine
+    for stock in stocks:
+        trend = stock.trend * random.uniform(0.8, 1.2)
+        volatility = random.uniform(-stock.volatility, stock.volatility)
+        market_sentiment = random.uniform(-0.02, 0.02)
+
+        total_change = trend + volatility + market_sentiment + event_impact
+        stock.price *= (1 + total_change)
+        stock.history.append(stock.price)
+        stock.dates.append(datetime.now())
+
+
+def make_universe(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = rng.uniform(50, 500, n)
+    volatility = rng.uniform(0.015, 0.055, n)
+    trend = rng.uniform(0.001, 0.005, n)
+    return prices, volatility, trend
+
+
+def ticks_per_sec(tick, min_time=0.5):
+    ticks = 0
+    start = time.perf_counter()
+    while True:
+        tick()
+        ticks += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return ticks / elapsed
+
+
+def run(sizes=UNIVERSE_SIZES):
+    results = []
+    for n in sizes:
+        prices, volatility, trend = make_universe(n)
+
+        random.seed(0)
+        stocks = [LegacyStock(p, v, t) for p, v, t in zip(prices, volatility, trend)]
+        legacy = ticks_per_sec(lambda: legacy_update(stocks, 0.0))
+
+        engine = MarketEngine(prices, volatility, trend, seed=0)
+        batched = ticks_per_sec(lambda: engine.step(0.0))
+
+        results.append({'tickers': n, 'legacy': legacy, 'engine': batched, 'speedup': batched / legacy})
+    return results
+
+
+def main():
+    print(f"{'tickers':>10} {'legacy ticks/s':>16} {'engine ticks/s':>16} {'speedup':>9}")
+    for row in run():
+        print(f"{row['tickers']:>10} {row['legacy']:>16.1f} {row['engine']:>16.1f} {row['speedup']:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""API round-trips per simulated day with batched event generation, against the local stub.
+
+Each day takes 1-3 events from the prefetcher with the game's 50 ms deadline, as
+`advance_day` does; a miss means a fallback event. Round-trips per day are counted as
+if every event came from the API: requests per generated event times events per day.
+The stub answers after `LATENCY` seconds and makes `BAD_RATE` of its replies
+malformed, so parse failures are counted too.
+
+Run from the project root:
+    python -m benchmarks.bench_events
+"""
+import random
+import time
+
+from benchmarks.stub_openai import serve
+from events import EventPrefetcher
+
+BATCH_SIZES = [1, 4, 8, 12]
+COMPANIES = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'META', 'TSLA', 'NVDA', 'JPM', 'V', 'WMT', 'PG', 'JNJ']
+LATENCY = 0.3
+BAD_RATE = 0.05
+
+
+def simulate(batch_size, days=100, latency=LATENCY, bad_rate=BAD_RATE, deadline=0.05, seed=0):
+    rng = random.Random(seed)
+    with serve(latency, bad_rate=bad_rate) as (base_url, counter):
+        feed = EventPrefetcher(COMPANIES, 'stub', base_url=base_url, batch_size=batch_size).start()
+        try:
+            feed.wait_until_filled(feed.queue.maxsize, timeout=10.0)
+            start = time.perf_counter()
+            taken = 0
+            for _ in range(days):
+                for _ in range(rng.randint(1, 3)):
+                    feed.get(deadline)
+                    taken += 1
+            elapsed = time.perf_counter() - start
+        finally:
+            feed.close()
+        stats = feed.stats()
+        requests_per_event = counter['requests'] / max(stats['events'], 1)
+        return {
+            'batch': batch_size,
+            'requests_per_event': requests_per_event,
+            'requests_per_day': requests_per_event * taken / days,
+            'fallback_rate': stats['misses'] / (stats['hits'] + stats['misses']),
+            'parse_failure_rate': stats['parse_failure_rate'],
+            'tokens_per_event': stats['tokens_per_event'],
+            'day_ms': elapsed / days * 1000,
+        }
+
+
+def run(sizes=BATCH_SIZES, days=100, seed=0):
+    return [simulate(batch_size, days, seed=seed) for batch_size in sizes]
+
+
+def main():
+    print(f"{'batch':>6} {'requests/event':>15} {'requests/day':>13} {'fallbacks':>10} {'parse fails':>12} "
+          f"{'tokens/event':>13} {'day ms':>8}")
+    for row in run():
+        print(f"{row['batch']:>6} {row['requests_per_event']:>15.2f} {row['requests_per_day']:>13.2f} "
+              f"{row['fallback_rate']:>10.1%} {row['parse_failure_rate']:>12.1%} {row['tokens_per_event']:>13.1f} {row['day_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
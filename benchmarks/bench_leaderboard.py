@@ -0,0 +1,101 @@
+"""Load test of the leaderboard: 10k players trading in one shared market.
+
+Every tick a slice of the players trades (each trade re-ranks one player), then the
+market moves and the whole board is revalued. Players keep asking for the top 100 and
+their own rank, which the order-statistics index answers without sorting. The
+baseline revalues and sorts everybody per query, as a plain table of players would.
+
+Run from the project root:
+    python -m benchmarks.bench_leaderboard
+"""
+import time
+
+import numpy as np
+
+from engine import MarketEngine
+from leaderboard import Leaderboard
+
+PLAYERS = [1_000, 10_000]
+
+
+def simulate(players, ticks=50, trade_share=0.05, queries=200, tickers=12, seed=0):
+    rng = np.random.default_rng(seed)
+    engine = MarketEngine(rng.uniform(10, 1000, tickers), np.full(tickers, 0.03), np.full(tickers, 0.001),
+                          seed=seed, model='gbm')
+    board = Leaderboard([f'T{i}' for i in range(tickers)])
+    board.mark(engine.prices, 0)
+
+    start = time.perf_counter()
+    for p in range(players):
+        board.join(f'player{p}')
+    join = time.perf_counter() - start
+
+    cash = np.full(players, 10_000.0)
+    shares = np.zeros((players, tickers))
+    update = mark = top = rank = baseline = 0.0
+    trades = 0
+    for tick in range(ticks):
+        # A slice of the players puts a random part of their cash into one stock
+        for p in rng.choice(players, int(players * trade_share), replace=False):
+            i = rng.integers(tickers)
+            n = np.floor(cash[p] * rng.uniform(0, 0.5) / engine.prices[i])
+            cash[p] -= n * engine.prices[i]
+            shares[p, i] += n
+            start = time.perf_counter()
+            board.update(f'player{p}', cash[p], dict(zip(board.symbols, shares[p])))
+            update += time.perf_counter() - start
+            trades += 1
+
+        engine.step()
+        start = time.perf_counter()
+        board.mark(engine.prices, tick + 1)
+        mark += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(queries):
+            board.top(100)
+        top += time.perf_counter() - start
+        asked = rng.integers(players, size=queries)
+        start = time.perf_counter()
+        for p in asked:
+            board.rank(f'player{p}')
+        rank += time.perf_counter() - start
+
+        # Baseline: revalue and sort the whole table for each query
+        start = time.perf_counter()
+        for _ in range(queries // 20):
+            values = cash + shares @ engine.prices
+            order = np.argsort(-values, kind='stable')
+            ranks = np.empty(players, dtype=np.int64)
+            ranks[order] = np.arange(1, players + 1)
+        baseline += (time.perf_counter() - start) * 20
+
+    # The index must agree with a full sort
+    values = cash + shares @ engine.prices
+    expected = [f'player{p}' for p in np.lexsort((np.arange(players), -values))[:100]]
+    assert [row['player'] for row in board.top(100)] == expected
+
+    return {
+        'players': players,
+        'join_us': join / players * 1e6,
+        'update_us': update / trades * 1e6,
+        'mark_ms': mark / ticks * 1000,
+        'top100_us': top / (ticks * queries) * 1e6,
+        'rank_us': rank / (ticks * queries) * 1e6,
+        'sort_query_us': baseline / (ticks * queries) * 1e6,
+    }
+
+
+def run(sizes=PLAYERS, ticks=50, seed=0):
+    return [simulate(players, ticks, seed=seed) for players in sizes]
+
+
+def main():
+    print(f"{'players':>8} {'join us':>8} {'trade us':>9} {'tick ms':>8} {'top100 us':>10} {'rank us':>8} {'full sort us':>13}")
+    for row in run():
+        print(f"{row['players']:>8} {row['join_us']:>8.1f} {row['update_us']:>9.1f} {row['mark_ms']:>8.2f} "
+              f"{row['top100_us']:>10.1f} {row['rank_us']:>8.1f} {row['sort_query_us']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Matching cost of the order book with thousands of resting orders from many players.
+
+Run from the project root:
+    python -m benchmarks.bench_orders
+"""
+import time
+
+import numpy as np
+
+from engine import MarketEngine
+from orders import OrderBook
+
+SIZES = [(12, 1_000), (1_000, 10_000), (1_000, 100_000)]  # (tickers, resting orders)
+
+
+def fill_book(book, prices, orders, rng, players=1_000):
+    symbols = book.symbols
+    for _ in range(orders):
+        i = int(rng.integers(len(symbols)))
+        side = 'buy' if rng.random() < 0.5 else 'sell'
+        kind = 'limit' if rng.random() < 0.7 else 'stop'
+        # Prices within +/-10% of the market, so some fraction triggers every tick
+        price = prices[i] * (1.0 + rng.uniform(-0.1, 0.1))
+        book.place(f'player{rng.integers(players)}', symbols[i], side, kind, 10, price)
+
+
+def run(sizes=SIZES, ticks=20, seed=0):
+    results = []
+    for n, orders in sizes:
+        rng = np.random.default_rng(seed)
+        engine = MarketEngine(rng.uniform(10, 1000, n), np.full(n, 0.03), np.full(n, 0.001), seed=seed, model='gbm')
+        book = OrderBook([f'T{i}' for i in range(n)])
+        start = time.perf_counter()
+        fill_book(book, engine.prices, orders, rng)
+        place = time.perf_counter() - start
+
+        fills = 0
+        match = 0.0
+        for _ in range(ticks):
+            engine.step()
+            start = time.perf_counter()
+            fills += len(book.match(engine.prices))
+            match += time.perf_counter() - start
+        results.append({
+            'tickers': n,
+            'orders': orders,
+            'place_us': place / orders * 1e6,
+            'match_ms': match / ticks * 1000,
+            'fills_per_tick': fills / ticks,
+        })
+    return results
+
+
+def main():
+    print(f"{'tickers':>8} {'orders':>8} {'place us':>9} {'match ms/tick':>14} {'fills/tick':>11}")
+    for row in run():
+        print(f"{row['tickers']:>8} {row['orders']:>8} {row['place_us']:>9.2f} {row['match_ms']:>14.3f} {row['fills_per_tick']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Save/resume latency of GameStore for long games, compared with re-simulating them.
+
+Run from the project root:
+    python -m benchmarks.bench_storage
+"""
+import shutil
+import tempfile
+import time
+
+from game import StockMarketGame
+from storage import GameStore
+
+GAME_LENGTHS = [1_000, 10_000]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def play(game, store, state, days):
+    for _ in range(days):
+        events = game.advance_day()
+        state['events_history'].extend(events)
+        if store is not None:
+            store.sync(game, state, events)
+
+
+def run(lengths=GAME_LENGTHS, snapshot_every=500):
+    results = []
+    for days in lengths:
+        root = tempfile.mkdtemp()
+        try:
+            state = {'cash': 10000.0, 'portfolio': {}, 'events_history': []}
+            game = StockMarketGame(seed=0)
+            resimulate, _ = timed(lambda: play(game, None, state, days))
+
+            # The same game again, this time logging every day
+            state = {'cash': 10000.0, 'portfolio': {}, 'events_history': []}
+            game = StockMarketGame(seed=0)
+            store = GameStore(root, 'bench', snapshot_every=snapshot_every)
+            store.create(game, state)
+            logged, _ = timed(lambda: play(game, store, state, days))
+            snapshot, _ = timed(lambda: store.snapshot(game, state))
+            store.close()
+            resume_snapshot, _ = timed(lambda: GameStore(root, 'bench').load(seed=0))
+
+            # Resume with a full snapshot interval of log records to replay
+            store = GameStore(root, 'bench', snapshot_every=10 ** 9)
+            game, state = store.load(seed=0)
+            play(game, store, state, snapshot_every // 2)
+            store.close()
+            resume_replay, _ = timed(lambda: GameStore(root, 'bench').load(seed=0))
+
+            results.append({
+                'days': days,
+                'resimulate_s': resimulate,
+                'sync_us_per_day': (logged - resimulate) / days * 1e6,
+                'snapshot_ms': snapshot * 1000,
+                'resume_ms': resume_snapshot * 1000,
+                'resume_replay_ms': resume_replay * 1000,
+                'replayed_ticks': len(game.engine.history) - store.snapshot_ticks,
+            })
+        finally:
+            shutil.rmtree(root)
+    return results
+
+
+def main():
+    print(f"{'days':>7} {'re-simulate s':>14} {'log us/day':>11} {'snapshot ms':>12} {'resume ms':>10} {'resume+replay ms':>17}")
+    for row in run():
+        print(f"{row['days']:>7} {row['resimulate_s']:>14.2f} {row['sync_us_per_day']:>11.1f} {row['snapshot_ms']:>12.2f} "
+              f"{row['resume_ms']:>10.2f} {row['resume_replay_ms']:>11.2f} ({row['replayed_ticks']} ticks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Minimal local stand-in for the OpenAI chat completions endpoint.
+
+Answers the batched event requests of `events.request_events` with a JSON object
+holding one event per requested company, after an optional injected latency. A share
+of replies can be made malformed (`--bad-rate`) to exercise the parse-failure path.
+Point the game at it with `openai_base_url` in secrets.toml or:
+
+    python -m benchmarks.stub_openai --port 8765 --latency 0.4 --bad-rate 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_reply(prompt, bad_rate=0.0):
+    # The requested companies are the JSON list on the last line of the prompt
+    try:
+        wanted = json.loads(prompt.splitlines()[-1])
+    except (IndexError, json.JSONDecodeError):
+        wanted = [{'company': 'ACME'}]
+    if random.random() < bad_rate:
+        return random.choice([
+            'Sorry, here are the events: ' + ', '.join(w['company'] for w in wanted),   # not JSON at all
+            json.dumps({'events': [{'company': w['company'], 'event': 'Shares soar', 'impact': 0.9} for w in wanted]}),
+        ])
+    return json.dumps({'events': [
+        {'company': w['company'], 'event': f"{w['company']} announced a partnership worth ${random.randint(1, 900)}M",
+         'impact': round(random.uniform(-0.15, 0.15), 3)}
+        for w in wanted
+    ]})
+
+
+def make_handler(latency, counter, bad_rate=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            counter['requests'] += 1
+            if latency:
+                time.sleep(latency)
+
+            prompt = body.get('messages', [{}])[-1].get('content', '')
+            content = make_reply(prompt, bad_rate)
+            # Roughly four characters per token, like English text
+            prompt_tokens = sum(len(m.get('content', '')) for m in body.get('messages', [])) // 4
+            completion_tokens = len(content) // 4
+
+            payload = json.dumps({
+                'id': f"stub-{counter['requests']}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': content}}],
+                'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                          'total_tokens': prompt_tokens + completion_tokens},
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+@contextmanager
+def serve(latency=0.0, port=0, bad_rate=0.0):
+    # Yields (base_url, counter) for a stub server running in a background thread
+    counter = {'requests': 0}
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(latency, counter, bad_rate))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/v1", counter
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds to sleep before each reply")
+    parser.add_argument('--bad-rate', type=float, default=0.0, help="share of replies that are malformed")
+    args = parser.parse_args()
+    with serve(args.latency, args.port, args.bad_rate) as (base_url, _):
+        print(f"Stub OpenAI server at {base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Benchmark suite with fixed seeds; results are recorded per commit so regressions show up as numbers.
+
+Run from the project root:
+    python -m benchmarks.suite                      # run everything, save to .benchmarks/
+    python -m benchmarks.suite --filter charts      # only benchmarks whose name contains "charts"
+    python -m benchmarks.suite --compare latest     # diff against the previous saved run
+
+Each benchmark is a setup function registered with `@benchmark(name, params)`. It is
+a generator that yields the callable to time and cleans up afterwards. Timing works
+like asv: the number of calls per sample is calibrated so one sample takes at least
+`--sample-time`, then the best and median of `--repeat` samples are kept.
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+RESULTS_DIR = '.benchmarks'
+SEED = 0
+BENCHMARKS = {}
+
+
+def benchmark(name, params=(None,)):
+    def register(setup):
+        BENCHMARKS[name] = (contextlib.contextmanager(setup), list(params))
+        return setup
+    return register
+
+
+# --- benchmarks ----------------------------------------------------------------
+
+@benchmark('engine.update_prices', params=[12, 1_000, 100_000])
+def update_prices(n):
+    # What StockMarketGame.update_prices does per tick, at larger universe sizes:
+    # a sector-spread event impact, one engine step and an order book match
+    from engine import MarketEngine
+    from factors import FactorModel
+    from models import UniformModel
+    from orders import OrderBook
+
+    rng = np.random.default_rng(SEED)
+    sectors = [f'S{i % 11}' for i in range(n)]
+    factors = FactorModel(sectors)
+    engine = MarketEngine(rng.uniform(50, 500, n), rng.uniform(0.01, 0.05, n), rng.uniform(0.001, 0.005, n),
+                          seed=SEED, model=UniformModel(market_sentiment=0), factors=factors)
+    book = OrderBook([f'T{i}' for i in range(n)])
+
+    def tick():
+        engine.step(factors.event_impact(int(rng.integers(n)), rng.uniform(-0.15, 0.15)))
+        book.match(engine.prices)
+    yield tick
+
+
+@benchmark('game.update_prices')
+def game_update_prices(_):
+    from game import StockMarketGame
+    game = StockMarketGame(seed=SEED)
+    yield game.update_prices
+
+
+@benchmark('charts.build', params=[100, 1_000, 10_000, 100_000])
+def chart_build(days):
+    # Fresh indicator cache each call, so the series are computed too
+    from benchmarks.bench_charts import make_stock
+    from charts import build_stock_chart
+    from indicators import IndicatorCache
+
+    stock = make_stock(days, seed=SEED)
+    yield lambda: build_stock_chart(stock, IndicatorCache())
+
+
+@benchmark('events.generate_event', params=[0.0, 0.05, 0.2])
+def generate_event(latency):
+    # Against the local stub server with `latency` seconds per reply; the prefetcher hides
+    # latency up to its pool size, and after that the fallback deadline caps each call
+    from benchmarks.stub_openai import serve
+    from game import StockMarketGame
+
+    with serve(latency) as (base_url, _):
+        game = StockMarketGame(seed=SEED, api_key='stub', base_url=base_url, event_cache_path=None)
+        game.event_feed.wait_until_filled(game.event_feed.queue.maxsize, timeout=10.0)
+        try:
+            yield game.generate_event
+        finally:
+            game.close()
+
+
+@benchmark('portfolio.value', params=['read-12', 'revalue-12', 'read-1000', 'revalue-1000'])
+def portfolio_value(case):
+    # Ledger reads are cached between ticks; revaluing is one dot product per new tick
+    from ledger import Ledger
+
+    kind, n = case.split('-')
+    n = int(n)
+    rng = np.random.default_rng(SEED)
+    prices = rng.uniform(50, 500, n)
+    ledger = Ledger([f'T{i}' for i in range(n)], cash=1e9)
+    ledger.mark(prices, 0)
+    for i in range(n):
+        ledger.trade(f'T{i}', int(rng.integers(1, 100)), prices[i])
+    ticks = iter(range(1, 1 << 62))
+
+    if kind == 'read':
+        yield lambda: ledger.mark(prices, 0).value
+    else:
+        yield lambda: ledger.mark(prices, next(ticks)).value
+
+
+@benchmark('replay.open', params=['open', 'seek'])
+def replay_open(case):
+    # 5,000 tickers x 1,000 days on disk; opening memory-maps it, seeking builds a replay engine
+    # with a year of lookback at a random date ("play from 2008")
+    import shutil
+    import tempfile
+
+    import pandas as pd
+
+    from marketdata import FIELDS, MarketData, ReplayEngine
+
+    n, days = 5_000, 1_000
+    rng = np.random.default_rng(SEED)
+    path = tempfile.mkdtemp()
+    data = MarketData.create(path, pd.bdate_range('2005-01-03', periods=days).values, [f'T{i}' for i in range(n)])
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, (days, n)), axis=0)
+    for name in FIELDS:
+        data.fields[name][:] = closes
+    data.flush()
+    del data
+    symbols = [f'T{i}' for i in range(n)]
+
+    try:
+        if case == 'open':
+            yield lambda: MarketData(path)
+        else:
+            data = MarketData(path)
+            yield lambda: ReplayEngine(data, symbols, data.dates[int(rng.integers(250, days))], lookback=250)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@benchmark('ui.rerun', params=['Dashboard', 'Portfolio', 'Trading'])
+def ui_rerun(tab):
+    # A full headless rerun of main.py through Streamlit's AppTest (saving off, no API key)
+    from streamlit.testing.v1 import AppTest
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    at = AppTest.from_file(os.path.join(root, 'main.py'), default_timeout=60)
+    at.secrets['save_dir'] = ''
+    at.secrets['openai_api_key'] = ''
+    at.run()
+    for _ in range(3):
+        # A few days of history, and a holding so the Portfolio tab has content
+        next(b for b in at.sidebar.button if 'Next' in b.label).click()
+        at.run()
+    at.session_state.ledger.trade('AAPL', 1, at.session_state.game.stocks['AAPL'].price)
+    at.sidebar.radio[0].set_value(tab)
+    at.run()
+    yield at.run
+
+
+# --- runner ----------------------------------------------------------------------
+
+def measure(fn, sample_time=0.1, repeat=5, max_number=100_000):
+    fn()  # warm-up
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= sample_time or number >= max_number:
+            break
+        number = min(max_number, number * max(2, int(sample_time / max(elapsed, 1e-9))))
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {'min': min(samples), 'median': statistics.median(samples), 'number': number, 'repeat': repeat}
+
+
+def run(names=None, sample_time=0.1, repeat=5, verbose=True):
+    results = {}
+    for name, (setup, params) in BENCHMARKS.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        for param in params:
+            key = name if param is None else f"{name}[{param}]"
+            with setup(param) as fn:
+                results[key] = measure(fn, sample_time, repeat)
+            if verbose:
+                print(f"{key:<40} {_format(results[key]['min']):>10} (median {_format(results[key]['median'])})")
+    return results
+
+
+def _format(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def save(results, directory=RESULTS_DIR):
+    commit = _git('rev-parse', '--short', 'HEAD') or 'unknown'
+    record = {
+        'commit': commit,
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'machine': platform.node(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'results': results,
+    }
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{record['timestamp'].replace(':', '')}-{commit}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+    return path
+
+
+def load(reference, directory=RESULTS_DIR, exclude=None):
+    # A results file path, a commit hash, or 'latest' for the newest saved run
+    if os.path.exists(reference):
+        path = reference
+    else:
+        paths = sorted(p for p in glob.glob(os.path.join(directory, '*.json')) if p != exclude)
+        if reference != 'latest':
+            paths = [p for p in paths if p.endswith(f"-{reference}.json")]
+        if not paths:
+            raise FileNotFoundError(f"No saved benchmark results match {reference!r}")
+        path = paths[-1]
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline, results, threshold=1.2):
+    """Print the ratio of each benchmark to the baseline; returns the names that regressed."""
+    regressions = []
+    print(f"\nCompared with {baseline['commit']} ({baseline['timestamp']}):")
+    for key, stats in results.items():
+        before = baseline['results'].get(key)
+        if before is None:
+            print(f"{key:<40} {'new':>10}")
+            continue
+        ratio = stats['min'] / before['min']
+        flag = ''
+        if ratio >= threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        elif ratio <= 1 / threshold:
+            flag = '  faster'
+        print(f"{key:<40} {ratio:>9.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Stock Game benchmark suite.")
+    parser.add_argument('--filter', action='append', help="only run benchmarks whose name contains this (repeatable)")
+    parser.add_argument('--sample-time', type=float, default=0.1, help="minimum seconds per sample")
+    parser.add_argument('--repeat', type=int, default=5, help="samples per benchmark")
+    parser.add_argument('--compare', help="results file, commit hash or 'latest' to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2, help="slowdown ratio reported as a regression")
+    parser.add_argument('--no-save', action='store_true', help="don't record this run")
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.sample_time, args.repeat)
+    path = None
+    if not args.no_save:
+        path = save(results)
+        print(f"\nSaved {path}")
+    if args.compare:
+        regressions = compare(load(args.compare, exclude=path), results, args.threshold)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} benchmark(s) regressed by {args.threshold}x or more")
+
+
+if __name__ == "__main__":
+    main()
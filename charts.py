@@ -0,0 +1,227 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+
+from indicators import IndicatorCache
+from profiling import timed
+
+# Longer histories are downsampled to about this many points before plotting
+MAX_POINTS = 1500
+# Above this many plotted points, line traces are drawn with WebGL (Scattergl)
+WEBGL_THRESHOLD = 1000
+
+
+def lttb_indices(y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of `n_out` points that keep the visual shape of `y`."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64)
+
+    # First and last points are always kept; the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket is the third corner of the triangle
+        next_start, next_stop = stop, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, n_out):
+    """Min/max bucketing: the lowest and highest point of each of n_out / 2 buckets, in order."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = n_out // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    width = int(np.max(np.diff(edges)))
+    # Pad buckets to equal width so argmin/argmax run as one vectorized call
+    padded = np.full((buckets, width), np.nan)
+    offsets = np.arange(width)
+    rows = edges[:-1, None] + offsets
+    valid = rows < edges[1:, None]
+    padded[valid] = y[rows[valid]]
+    lo = edges[:-1] + np.nanargmin(padded, axis=1)
+    hi = edges[:-1] + np.nanargmax(padded, axis=1)
+    indices = np.unique(np.concatenate(([0, n - 1], lo, hi)))
+    return indices
+
+
+DOWNSAMPLERS = {
+    'lttb': lttb_indices,
+    'minmax': minmax_indices,
+}
+
+
+def _bucket_max(values, indices):
+    # Max over each gap between kept points, so volume spikes survive downsampling
+    if len(indices) == len(values):
+        return values
+    return np.maximum.reduceat(values, indices)
+
+
+@timed('charts.build')
+def build_stock_chart(stock, indicators=None, max_points=MAX_POINTS, webgl_threshold=WEBGL_THRESHOLD,
+                      downsample='lttb'):
+    symbol = stock.symbol
+    style = stock.style
+    indicators = indicators if indicators is not None else IndicatorCache()
+    fig = go.Figure()
+
+    history = stock.history
+    dates = stock.dates
+    if max_points and len(history) > max_points:
+        keep = DOWNSAMPLERS[downsample](history, max_points)
+    else:
+        keep = np.arange(len(history))
+    x = np.asarray(dates)[keep]
+    # WebGL handles thousands of points far better than SVG
+    scatter = go.Scattergl if webgl_threshold is not None and len(keep) > webgl_threshold else go.Scatter
+
+    # Add main price line
+    fig.add_trace(scatter(
+        x=x,
+        y=np.asarray(history)[keep],
+        mode=style['pattern'],
+        name=stock.name,
+        line=dict(
+            color=style['color'],
+            width=2,
+            dash=style['dash']
+        ),
+        marker=dict(
+            size=6,
+            symbol=style['symbol']
+        )
+    ))
+
+    # Add volume bars at the bottom
+    fig.add_trace(go.Bar(
+        x=x,
+        y=_bucket_max(indicators.volume(symbol, history), keep),
+        name='Volume',
+        marker_color=style['color'],
+        opacity=0.3,
+        yaxis='y2'
+    ))
+
+    # Add moving average if we have enough data points
+    if len(history) > 5:
+        ma_period = min(5, len(history) - 1)
+        ma_data = indicators.ma(symbol, history, ma_period)
+
+        fig.add_trace(scatter(
+            x=x,
+            y=ma_data[keep],
+            mode='lines',
+            name=f'{ma_period}-Day MA',
+            line=dict(
+                color='rgba(255, 255, 255, 0.7)',
+                width=1.5,
+                dash='dot'
+            )
+        ))
+
+    # Add trend channel (upper and lower bounds)
+    if len(history) > 3:
+        # Simple trend channel based on recent volatility
+        volatility = stock.volatility * stock.price
+        upper_bound, lower_bound = indicators.channel(symbol, history, volatility)
+
+        fig.add_trace(scatter(
+            x=x,
+            y=upper_bound[keep],
+            mode='lines',
+            name='Upper Channel',
+            line=dict(color='rgba(100, 255, 218, 0.3)', width=1, dash='dot'),
+            fill=None
+        ))
+
+        fig.add_trace(scatter(
+            x=x,
+            y=lower_bound[keep],
+            mode='lines',
+            name='Lower Channel',
+            line=dict(color='rgba(100, 255, 218, 0.3)', width=1, dash='dot'),
+            fill='tonexty'  # Fill area between upper and lower bound
+        ))
+
+    # Update layout to match white theme
+    fig.update_layout(
+        plot_bgcolor='#f8f9fa',
+        paper_bgcolor='#ffffff',
+        font=dict(color='#212529'),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='#e9ecef',
+            gridwidth=0.5
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='#e9ecef',
+            gridwidth=0.5,
+            title='Price'
+        ),
+        yaxis2=dict(
+            title='Volume',
+            overlaying='y',
+            side='right',
+            showgrid=False
+        ),
+        height=400,
+        title=dict(
+            text=f"{stock.name} Stock Performance",
+            x=0.5,
+            y=0.95
+        ),
+        legend=dict(
+            bgcolor='rgba(255,255,255,0.8)',
+            bordercolor='#0d6efd'
+        ),
+        hovermode='x unified'
+    )
+
+    return fig
+
+
+class FigureCache:
+    """Built figures keyed by (ticker, history length); least recently used ones are dropped.
+
+    Safe to share between sessions: a figure is built once even if several reruns ask for it at once.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return fig
+            self.misses += 1
+            fig = self._figures[key] = build()
+            if len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+            return fig
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
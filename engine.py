@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import numpy as np
+
+from history import HistoryStore
+from models import make_model
+from profiling import timed
+
+
+class MarketEngine:
+    """Holds the whole price universe as NumPy arrays and advances it in one batched step."""
+
+    def __init__(self, prices, volatility, trend, seed=None, model=None, season=0, factors=None):
+        self.prices = np.array(prices, dtype=np.float64)
+        self.volatility = np.array(volatility, dtype=np.float64)
+        self.trend = np.array(trend, dtype=np.float64)
+        self.rng = np.random.default_rng(seed)
+        self.model = make_model(model)
+        # Optional correlated market/sector shocks (factors.FactorModel) added to every tick
+        self.factors = factors
+
+        # Growth factors simulated ahead of time; `season` > 0 refills this many ticks at once
+        self.season = season
+        self._pending = None
+        self._next = 0
+
+        # One row of the price matrix per tick, shared by every Stock
+        self.history = HistoryStore(len(self.prices))
+        self.history.append(self.prices)
+
+    def __len__(self):
+        return len(self.prices)
+
+    def _simulate(self, horizon):
+        growth = self.model.paths(self.rng, self.trend, self.volatility, horizon)
+        if self.factors is not None:
+            growth = growth + self.factors.shocks(self.rng, horizon)
+        return growth
+
+    def pregenerate(self, horizon):
+        # Simulate the next `horizon` ticks in one vectorized call; step() consumes them in order
+        growth = self._simulate(horizon)
+        if self._pending is not None and self._next < len(self._pending):
+            growth = np.vstack([self._pending[self._next:], growth])
+        self._pending = growth
+        self._next = 0
+
+    @property
+    def pregenerated(self):
+        return 0 if self._pending is None else len(self._pending) - self._next
+
+    def draw(self, ticks):
+        # Growth factors for the next `ticks` ticks, pre-simulated ones first
+        if self.season and self.pregenerated < ticks:
+            self.pregenerate(max(self.season, ticks - self.pregenerated))
+        available = min(self.pregenerated, ticks)
+        growth = self._pending[self._next:self._next + available] if available else np.empty((0, len(self)))
+        self._next += available
+        if available < ticks:
+            growth = np.vstack([growth, self._simulate(ticks - available)])
+        return growth
+
+    def _put_back(self, growth):
+        # Undrawn growth goes back in front of the buffer, so later ticks continue the same stream
+        if self.pregenerated:
+            growth = np.vstack([growth, self._pending[self._next:]])
+        self._pending = growth
+        self._next = 0
+
+    @timed('engine.step')
+    def step(self, event_impact=0.0):
+        # event_impact is a scalar for the whole market or an array with one value per ticker
+        growth = self.draw(1)[0]
+        self.prices *= self.model.apply_event(growth, event_impact)
+        self.history.append(self.prices)
+        return self.prices
+
+    @timed('engine.advance')
+    def advance(self, event_impacts, keep=None):
+        """Apply several ticks in one vectorized call and return their price rows.
+
+        `event_impacts` has one row per tick: a scalar for the whole market or one value
+        per ticker. `keep(rows)` may look at the would-be price rows and return how many
+        ticks to actually apply; growth drawn for the rest is put back for later ticks.
+        """
+        event_impacts = np.asarray(event_impacts, dtype=np.float64)
+        if event_impacts.ndim == 1:
+            event_impacts = event_impacts[:, None]
+        ticks = len(event_impacts)
+        growth = self.draw(ticks)
+        rows = self.prices * np.cumprod(self.model.apply_event(growth, event_impacts), axis=0)
+        count = ticks if keep is None else int(keep(rows))
+        if count < ticks:
+            self._put_back(growth[count:])
+            rows = rows[:count]
+        if count:
+            self.prices[:] = rows[-1]
+            self.history.extend(rows, self._tick_dates(count))
+        return rows
+
+    def _tick_dates(self, count):
+        # Timestamps for `count` ticks applied at once: spread evenly from the last tick to now,
+        # so skipped days stay distinct and in order on time-based charts
+        now = np.datetime64(datetime.now(), 'us')
+        last = self.history.dates[-1] if len(self.history) else now
+        span = max(int((now - last).astype(np.int64)), count)
+        return last + (span * np.arange(1, count + 1) // count).astype('timedelta64[us]')
+
+    @property
+    def dates(self):
+        return self.history.dates
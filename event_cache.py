@@ -0,0 +1,139 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'events.sqlite3')
+
+COUNTERS = ('hits', 'misses', 'api_calls', 'api_events', 'duplicates', 'evictions')
+
+
+def normalize_event(text):
+    # Case, punctuation and whitespace differences don't make an event new
+    text = re.sub(r'[^\w\s$%.-]', ' ', text.lower())
+    text = re.sub(r'(?<!\d)\.|\.(?!\d)', ' ', text)
+    return ' '.join(text.split())
+
+
+class EventCache:
+    """On-disk cache of parsed (event, impact) pairs keyed by company and event template.
+
+    A unique index on the normalized event text rejects duplicates before they are
+    stored or served. Entries expire after `ttl` seconds and the least recently used
+    ones are evicted beyond `max_entries`. Counters persist across sessions.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=7 * 24 * 3600, max_entries=5000):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                company TEXT NOT NULL,
+                template TEXT NOT NULL,
+                event TEXT NOT NULL,
+                normalized TEXT NOT NULL UNIQUE,
+                impact REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_key ON events (company, template, last_used_at);
+            CREATE INDEX IF NOT EXISTS events_lru ON events (last_used_at);
+            CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS api_latency (id INTEGER PRIMARY KEY CHECK (id = 0), total REAL NOT NULL, calls INTEGER NOT NULL);
+        ''')
+        self._db.executemany('INSERT OR IGNORE INTO counters VALUES (?, 0)', [(name,) for name in COUNTERS])
+        self._db.execute('INSERT OR IGNORE INTO api_latency VALUES (0, 0, 0)')
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _count(self, name, amount=1):
+        self._db.execute('UPDATE counters SET value = value + ? WHERE name = ?', (amount, name))
+
+    def get(self, company, template, exclude=()):
+        # Least recently served cached event for this key whose text isn't in `exclude`
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT id, event, impact, normalized FROM events '
+                'WHERE company = ? AND template = ? AND created_at >= ? ORDER BY last_used_at',
+                (company, template, now - self.ttl)
+            ).fetchall()
+            for row_id, event, impact, normalized in rows:
+                if normalized not in exclude:
+                    self._db.execute('UPDATE events SET last_used_at = ? WHERE id = ?', (now, row_id))
+                    self._count('hits')
+                    self._db.commit()
+                    return event, impact
+            self._count('misses')
+            self._db.commit()
+            return None
+
+    def contains(self, event):
+        with self._lock:
+            row = self._db.execute('SELECT 1 FROM events WHERE normalized = ?', (normalize_event(event),)).fetchone()
+        return row is not None
+
+    def put(self, company, template, event, impact):
+        # Returns False (and stores nothing) when the event duplicates a cached one
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                'INSERT OR IGNORE INTO events (company, template, event, normalized, impact, created_at, last_used_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (company, template, event, normalize_event(event), impact, now, now)
+            )
+            stored = cursor.rowcount == 1
+            if not stored:
+                self._count('duplicates')
+            self._evict(now)
+            self._db.commit()
+        return stored
+
+    def record_api_call(self, seconds, events=1):
+        # One request that took `seconds` and returned `events` events (batched requests return several)
+        with self._lock:
+            self._count('api_calls')
+            self._count('api_events', events)
+            self._db.execute('UPDATE api_latency SET total = total + ?, calls = calls + 1 WHERE id = 0', (seconds,))
+            self._db.commit()
+
+    def _evict(self, now):
+        expired = self._db.execute('DELETE FROM events WHERE created_at < ?', (now - self.ttl,)).rowcount
+        overflow = self._db.execute(
+            'DELETE FROM events WHERE id IN (SELECT id FROM events ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        ).rowcount
+        if expired + overflow:
+            self._count('evictions', expired + overflow)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._db.execute('SELECT name, value FROM counters').fetchall())
+            total, calls = self._db.execute('SELECT total, calls FROM api_latency WHERE id = 0').fetchone()
+        counters = {name: int(value) for name, value in counters.items()}
+        lookups = counters['hits'] + counters['misses']
+        mean_latency = total / calls if calls else 0.0
+        counters['hit_rate'] = counters['hits'] / lookups if lookups else 0.0
+        counters['mean_api_latency'] = mean_latency
+        # Every hit is one event we didn't request. Requests carry several events each, so a hit
+        # saves only its share of one (caches from before batching counted no events: one each)
+        events_per_call = counters['api_events'] / calls if counters['api_events'] else 1.0
+        counters['events_per_api_call'] = events_per_call
+        counters['events_saved'] = counters['hits']
+        counters['api_calls_saved'] = counters['hits'] / events_per_call
+        counters['latency_saved'] = counters['api_calls_saved'] * mean_latency
+        return counters
@@ -0,0 +1,227 @@
+import json
+import math
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+from openai import OpenAI
+
+from event_cache import normalize_event
+from profiling import timed
+
+EVENT_MODEL = "gpt-3.5-turbo"
+BATCH_SIZE = 8            # events asked for per chat completion, each about a different company
+IMPACT_RANGE = (-0.15, 0.15)
+TOKENS_PER_EVENT = 60     # completion budget per event in a batch
+
+
+def event_types():
+    return [
+        f"announced a new {random.choice(['product launch', 'partnership', 'acquisition', 'technology breakthrough'])}",
+        f"reported {random.choice(['better', 'worse'])} than expected {random.choice(['earnings', 'revenue', 'growth'])}",
+        f"revealed plans for {random.choice(['expansion', 'restructuring', 'cost-cutting', 'innovation'])}",
+        f"faced {random.choice(['regulatory challenges', 'market competition', 'supply chain issues', 'leadership changes'])}"
+    ]
+
+
+@timed('events.api_request')
+def request_events(client, requests):
+    """One chat completion asking for an event about each (company, template) in `requests`.
+
+    The model answers with a JSON object, which `parse_events` checks. Returns
+    (events, rejected, usage): the valid (company, event, impact) triples, the number of
+    entries that failed validation, and the reply's token usage (or None). Raises
+    ValueError if the reply isn't the expected JSON at all.
+    """
+    low, high = IMPACT_RANGE
+    wanted = [{'company': company, 'template': template} for company, template in requests]
+    response = client.chat.completions.create(
+        model=EVENT_MODEL,
+        messages=[
+            {"role": "system", "content": "You are a financial news reporter. Generate unique, specific news events that haven't been reported before. Include specific details about products, numbers, or impacts."},
+            {"role": "user", "content": f"Write one market event for each company below, based on its template. Give each an impact value between {low} and {high}. "
+                                        f'Reply with JSON only: {{"events": [{{"company": "...", "event": "...", "impact": 0.0}}]}}, one entry per company.\n'
+                                        f"{json.dumps(wanted)}"}
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=TOKENS_PER_EVENT * len(requests),
+        temperature=0.9
+    )
+    events, rejected = parse_events(response.choices[0].message.content, [company for company, _ in requests])
+    return events, rejected, response.usage
+
+
+def parse_events(text, companies):
+    # Valid (company, event, impact) triples from a batched reply, and how many entries were dropped.
+    # An entry counts only if it names a requested company (once), has text, and a finite impact in range
+    try:
+        entries = json.loads(text)['events']
+    except (TypeError, KeyError, json.JSONDecodeError) as exc:
+        raise ValueError(f"Malformed event reply: {text!r}") from exc
+    if not isinstance(entries, list):
+        raise ValueError(f"Malformed event reply: {text!r}")
+
+    low, high = IMPACT_RANGE
+    pending = set(companies)
+    events = []
+    for entry in entries:
+        try:
+            company, event, impact = entry['company'], entry['event'].strip(), float(entry['impact'])
+        except (TypeError, KeyError, ValueError, AttributeError):
+            continue
+        if company in pending and event and math.isfinite(impact) and low <= impact <= high:
+            pending.discard(company)
+            events.append((company, event, impact))
+    return events, len(entries) - len(events)
+
+
+class EventPrefetcher:
+    """Keeps a bounded queue of pre-generated (company, event, impact, templates) items.
+
+    Worker threads share one OpenAI client (and its connection pool) and stay
+    `size` events ahead of demand, so advancing a day never waits on the network.
+    Each request asks for events about `batch_size` different companies at once;
+    the queue then hands them out one per tick.
+    """
+
+    def __init__(self, companies, api_key, base_url=None, size=6, workers=2, request_timeout=10.0, cache=None,
+                 batch_size=BATCH_SIZE):
+        self.companies = list(companies)
+        self.batch_size = batch_size
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=request_timeout, max_retries=0)
+        self.cache = cache
+        self.queue = queue.Queue(maxsize=size)
+        # Normalized text of recently queued events, so the cache doesn't serve them again too soon
+        self._recent = deque(maxlen=256)
+        self._recent_lock = threading.Lock()
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        # Reply statistics, updated by the workers
+        self.requests = 0
+        self.events = 0
+        self.parse_failures = 0
+        self.rejected = 0
+        self.tokens = 0
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return self
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._produce, name=f"event-prefetch-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def close(self):
+        # Waits for the workers to exit; one in the middle of a request may take up to `request_timeout`
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.client.close()
+
+    def _produce(self):
+        backoff = 0.5
+        while not self._stop.is_set():
+            companies = random.sample(self.companies, min(self.batch_size, len(self.companies)))
+            items, requests, offered = [], [], {}
+            for company in companies:
+                templates = event_types()
+                template = random.choice(templates)
+                offered[company] = (template, templates)
+                item = self._from_cache(company, template)
+                if item is not None:
+                    items.append(item)
+                else:
+                    requests.append((company, template))
+
+            if requests:
+                try:
+                    start = time.perf_counter()
+                    events, rejected, usage = request_events(self.client, requests)
+                except Exception as exc:
+                    # No key, network down or a malformed reply: back off instead of hammering the API
+                    with self._stats_lock:
+                        self.failures += 1
+                        self.parse_failures += isinstance(exc, ValueError)
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, 30.0)
+                    continue
+                backoff = 0.5
+                self._record(len(events), rejected, usage)
+                if self.cache is not None:
+                    self.cache.record_api_call(time.perf_counter() - start, len(events))
+                for company, event, impact in events:
+                    template, templates = offered[company]
+                    if self.cache is not None and not self.cache.put(company, template, event, impact):
+                        continue  # Already seen this story; don't queue it again
+                    items.append((company, event, impact, templates))
+
+            for item in items:
+                self._remember(item[1])
+                while not self._stop.is_set():
+                    try:
+                        self.queue.put(item, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+
+    def _record(self, events, rejected, usage):
+        with self._stats_lock:
+            self.requests += 1
+            self.events += events
+            self.rejected += rejected
+            self.tokens += getattr(usage, 'total_tokens', 0) or 0
+
+    def _from_cache(self, company, template):
+        if self.cache is None:
+            return None
+        with self._recent_lock:
+            recent = set(self._recent)
+        cached = self.cache.get(company, template, exclude=recent)
+        if cached is None:
+            return None
+        event, impact = cached
+        return company, event, impact, [template]
+
+    def _remember(self, event):
+        with self._recent_lock:
+            self._recent.append(normalize_event(event))
+
+    def get(self, deadline=0.0) -> Optional[Tuple[str, str, float, list]]:
+        # Returns a prefetched item, or None if nothing arrives within `deadline` seconds
+        try:
+            if deadline > 0:
+                item = self.queue.get(timeout=deadline)
+            else:
+                item = self.queue.get_nowait()
+        except queue.Empty:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return item
+
+    def wait_until_filled(self, count=1, timeout=5.0):
+        end = time.monotonic() + timeout
+        while self.queue.qsize() < count and time.monotonic() < end:
+            time.sleep(0.01)
+        return self.queue.qsize() >= count
+
+    def stats(self):
+        with self._stats_lock:
+            stats = {'hits': self.hits, 'misses': self.misses, 'failures': self.failures, 'requests': self.requests,
+                     'events': self.events, 'parse_failures': self.parse_failures, 'rejected': self.rejected,
+                     'tokens': self.tokens}
+        replies = stats['requests'] + stats['parse_failures']
+        stats['parse_failure_rate'] = stats['parse_failures'] / replies if replies else 0.0
+        stats['events_per_request'] = stats['events'] / stats['requests'] if stats['requests'] else 0.0
+        stats['tokens_per_event'] = stats['tokens'] / stats['events'] if stats['events'] else 0.0
+        return stats
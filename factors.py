@@ -0,0 +1,95 @@
+import numpy as np
+
+
+class FactorModel:
+    """Correlated market and sector factors shared by the whole universe.
+
+    Factor 0 is the market; factors 1..k are the sectors. Each tick draws one
+    standard-normal vector per factor and multiplies it by the cached Cholesky factor
+    of the factor covariance. Ticker shocks are then market_beta * market +
+    sector_beta * own sector. The factorization is only recomputed when the
+    correlation matrix or the factor volatilities are replaced.
+    """
+
+    def __init__(self, sectors, correlation=None, market_vol=0.008, sector_vol=0.006,
+                 market_beta=1.0, sector_beta=1.0, spillover=0.3):
+        # Sector names in order of first appearance; sector_index maps each ticker to one
+        self.sectors = list(dict.fromkeys(sectors))
+        self.sector_index = np.array([self.sectors.index(s) for s in sectors], dtype=np.int64)
+        n = len(self.sector_index)
+        self.market_beta = np.broadcast_to(np.asarray(market_beta, dtype=np.float64), n).copy()
+        self.sector_beta = np.broadcast_to(np.asarray(sector_beta, dtype=np.float64), n).copy()
+        # Share of a company's event impact felt by the rest of its sector
+        self.spillover = spillover
+
+        self._cholesky = None
+        self._volatility = np.array([market_vol] + [sector_vol] * len(self.sectors), dtype=np.float64)
+        if correlation is None:
+            correlation = self.default_correlation(len(self.sectors))
+        self.correlation = correlation
+
+    @staticmethod
+    def default_correlation(n_sectors, between_sectors=0.3):
+        # Market independent of the sector factors, sectors mildly correlated with each other
+        corr = np.eye(1 + n_sectors)
+        corr[1:, 1:] = between_sectors
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+    @property
+    def n_factors(self):
+        return 1 + len(self.sectors)
+
+    @property
+    def correlation(self):
+        return self._correlation
+
+    @correlation.setter
+    def correlation(self, matrix):
+        matrix = np.array(matrix, dtype=np.float64)
+        if matrix.shape != (self.n_factors, self.n_factors):
+            raise ValueError(f"Correlation matrix must be {self.n_factors}x{self.n_factors} (market + sectors)")
+        if not np.allclose(matrix, matrix.T) or not np.allclose(np.diag(matrix), 1.0):
+            raise ValueError("Correlation matrix must be symmetric with a unit diagonal")
+        matrix.flags.writeable = False
+        self._correlation = matrix
+        self._cholesky = None
+
+    @property
+    def volatility(self):
+        return self._volatility
+
+    @volatility.setter
+    def volatility(self, values):
+        values = np.array(values, dtype=np.float64)
+        if values.shape != (self.n_factors,):
+            raise ValueError(f"Expected {self.n_factors} factor volatilities (market + sectors)")
+        self._volatility = values
+        self._cholesky = None
+
+    @property
+    def cholesky(self):
+        if self._cholesky is None:
+            covariance = self._volatility[:, None] * self._correlation * self._volatility[None, :]
+            try:
+                self._cholesky = np.linalg.cholesky(covariance)
+            except np.linalg.LinAlgError:
+                raise ValueError("Factor correlation matrix is not positive definite")
+        return self._cholesky
+
+    def factor_returns(self, rng, horizon):
+        # (horizon, n_factors) correlated factor returns: one batched multiply for all ticks
+        z = rng.standard_normal((horizon, self.n_factors))
+        return z @ self.cholesky.T
+
+    def shocks(self, rng, horizon):
+        # (horizon, n_tickers) return shocks from the market and each ticker's sector
+        f = self.factor_returns(rng, horizon)
+        return f[:, :1] * self.market_beta + f[:, 1:][:, self.sector_index] * self.sector_beta
+
+    def event_impact(self, index, impact):
+        # Full impact for the named company, `spillover` of it for the rest of its sector
+        impacts = np.zeros(len(self.sector_index))
+        impacts[self.sector_index == self.sector_index[index]] = self.spillover * impact
+        impacts[index] = impact
+        return impacts
@@ -0,0 +1,375 @@
+import random
+from collections import deque
+
+import numpy as np
+from datetime import datetime
+from typing import Tuple
+
+from engine import MarketEngine
+from factors import FactorModel
+from models import UniformModel
+from indicators import IndicatorCache
+from orders import OrderBook
+from profiling import METRICS, timed
+from styles import style_for
+from events import EventPrefetcher
+from event_cache import EventCache, DEFAULT_CACHE_PATH
+from marketdata import MarketData, ReplayEngine
+
+
+class Stock:
+    def __init__(self, name, initial_price, volatility, trend, symbol='', sector=''):
+        self.name = name
+        self.symbol = symbol
+        self.sector = sector
+        self._style = None
+        self._price = initial_price
+        self._history = [initial_price]
+        self._dates = [datetime.now()]
+        self._volatility = volatility
+        self._trend = trend  # Overall market trend
+        self._engine = None
+        self._index = None
+
+    def bind(self, engine, index):
+        # Once bound, price/volatility/trend are read from the engine's arrays
+        self._engine = engine
+        self._index = index
+
+    @property
+    def style(self):
+        # Render profile (color, line pattern, dash, marker), worked out once per stock
+        if self._style is None:
+            self._style = style_for(self.symbol)
+        return self._style
+
+    @property
+    def price(self):
+        if self._engine is None:
+            return self._price
+        return float(self._engine.prices[self._index])
+
+    @property
+    def volatility(self):
+        if self._engine is None:
+            return self._volatility
+        return float(self._engine.volatility[self._index])
+
+    @property
+    def trend(self):
+        if self._engine is None:
+            return self._trend
+        return float(self._engine.trend[self._index])
+
+    @property
+    def history(self):
+        if self._engine is None:
+            return self._history
+        # Zero-copy column view into the engine's shared history matrix
+        return self._engine.history.column(self._index)
+
+    @property
+    def dates(self):
+        if self._engine is None:
+            return self._dates
+        return self._engine.dates
+
+
+MILESTONES = {
+    100000: "First 100K - Buy a Luxury Car 🚗",
+    250000: "250K - Buy a Vacation Home 🏖️",
+    500000: "500K - Start Your Own Business 💼",
+    1000000: "WINNER: You're a Millionaire! 🎉"
+}
+
+
+# Sector of each listed company, used by the factor model and to spread news to peers
+SECTORS = {
+    'AAPL': 'Technology',
+    'GOOGL': 'Communication',
+    'TSLA': 'Consumer',
+    'AMZN': 'Consumer',
+    'MSFT': 'Technology',
+    'META': 'Communication',
+    'NVDA': 'Technology',
+    'JPM': 'Financials',
+    'DIS': 'Communication',
+    'NFLX': 'Communication',
+    'COIN': 'Financials',
+    'ADBE': 'Technology'
+}
+
+# What a malformed prefetched event raises (unknown company, no templates, wrong shape);
+# the tick goes ahead with a fallback event instead
+EVENT_ERRORS = (KeyError, IndexError, TypeError, ValueError)
+
+
+class StockMarketGame:
+    def __init__(self, seed=None, api_key=None, base_url=None, event_deadline=0.05, event_cache_path=DEFAULT_CACHE_PATH,
+                 model=None, season=0, factors=True, replay=None):
+        # Game-local RNG so a seed reproduces the universe and the event sequence
+        self.random = random.Random(seed)
+        self.day = 1
+        # Replay mode: {'path': dataset, 'start': date, 'symbols': [...] (default: all listed that day),
+        # 'lookback': days of history before the start}; prices come from marketdata.MarketData
+        self.replay = None
+        if replay:
+            self._init_replay(replay, seed)
+        else:
+            self._init_simulated(seed, model, season, factors)
+
+        for symbol, stock in self.stocks.items():
+            stock.symbol = symbol
+            stock.bind(self.engine, self.symbol_index[symbol])
+
+        # Chart indicators per ticker, updated incrementally as the history grows
+        self.indicators = IndicatorCache()
+
+        # Resting limit/stop orders of every player, matched against each new tick
+        self.orders = OrderBook(self.stocks)
+
+        # News events are generated ahead of demand by background workers sharing one client.
+        # Without an API key, a running feed can be assigned to `event_feed`; `close` leaves it to its owner
+        self.event_deadline = event_deadline
+        self.event_feed = None
+        self._owns_event_feed = False
+        # Prefetched events handed back by a fast-forward that stopped early; used before the feed
+        self.requeued_events = deque()
+        if api_key:
+            # Answers are cached on disk, so repeat requests and duplicates cost no API call
+            cache = EventCache(event_cache_path) if event_cache_path else None
+            self.event_feed = EventPrefetcher(self.stocks.keys(), api_key, base_url=base_url, cache=cache).start()
+            self._owns_event_feed = True
+
+    def _init_simulated(self, seed, model, season, factors):
+        self.stocks = {
+            'AAPL': Stock('Apple Inc.', self.random.uniform(165, 185), 0.02, 0.002),
+            'GOOGL': Stock('Google', self.random.uniform(2700, 3000), 0.025, 0.003),
+            'TSLA': Stock('Tesla', self.random.uniform(850, 950), 0.045, 0.004),
+            'AMZN': Stock('Amazon', self.random.uniform(3100, 3400), 0.028, 0.002),
+            'MSFT': Stock('Microsoft', self.random.uniform(280, 320), 0.022, 0.002),
+            'META': Stock('Meta', self.random.uniform(260, 300), 0.035, 0.003),
+            'NVDA': Stock('NVIDIA', self.random.uniform(420, 480), 0.04, 0.003),
+            'JPM': Stock('JPMorgan', self.random.uniform(130, 150), 0.015, 0.001),
+            'DIS': Stock('Disney', self.random.uniform(90, 100), 0.025, 0.002),
+            'NFLX': Stock('Netflix', self.random.uniform(400, 440), 0.038, 0.003),
+            'COIN': Stock('Coinbase', self.random.uniform(75, 95), 0.055, 0.005),
+            'ADBE': Stock('Adobe', self.random.uniform(500, 540), 0.028, 0.002)
+        }
+        self.used_events = set()  # Track used events
+        self.last_reset_day = 1   # Track when to reset used events
+
+        self.symbol_index = {symbol: index for index, symbol in enumerate(self.stocks)}
+        for symbol, stock in self.stocks.items():
+            stock.sector = SECTORS.get(symbol, 'Other')
+
+        # Correlated market and sector shocks replace the independent per-stock sentiment term
+        if factors is True:
+            factors = FactorModel([stock.sector for stock in self.stocks.values()])
+        if factors and model in (None, 'uniform'):
+            model = UniformModel(market_sentiment=0)
+
+        # Prices, volatility and trend for the whole universe live in one engine
+        stocks = list(self.stocks.values())
+        self.engine = MarketEngine(
+            [stock.price for stock in stocks],
+            [stock.volatility for stock in stocks],
+            [stock.trend for stock in stocks],
+            seed=seed,
+            model=model,    # price model name or instance, see models.MODELS
+            season=season,  # ticks to pre-simulate at a time (0 = draw per tick)
+            factors=factors or None
+        )
+
+    def _init_replay(self, replay, seed):
+        data = MarketData(replay['path'])
+        start = replay.get('start') or data.dates[min(len(data) - 1, replay.get('lookback', 250))]
+        symbols = replay.get('symbols') or data.listed(data.seek(start))
+        lookback = replay.get('lookback', 250)
+        self.engine = ReplayEngine(data, symbols, start, lookback, seed)
+        self.stocks = {
+            symbol: Stock(data.name(symbol), self.engine.prices[i], self.engine.volatility[i], self.engine.trend[i])
+            for i, symbol in enumerate(symbols)
+        }
+        self.used_events = set()
+        self.last_reset_day = 1
+        self.symbol_index = {symbol: index for index, symbol in enumerate(self.stocks)}
+        for symbol, stock in self.stocks.items():
+            stock.sector = data.sectors.get(symbol) or SECTORS.get(symbol, 'Other')
+        # Resolved settings, so a saved game reopens the same universe at the same place
+        self.replay = {'path': replay['path'], 'start': str(self.engine.date), 'symbols': symbols, 'lookback': lookback}
+
+    def close(self):
+        # Stop the event feed's workers and close its cache, if this game started them
+        if self._owns_event_feed:
+            self.event_feed.close()
+            if self.event_feed.cache is not None:
+                self.event_feed.cache.close()
+            self._owns_event_feed = False
+
+    def ticks_today(self, rng=None):
+        # Replayed data has one bar per trading day; simulated days get 1-3 news-driven ticks
+        return 1 if self.replay else (rng or self.random).randint(1, 3)
+
+    @timed('game.generate_event')
+    def generate_event(self, deadline=None) -> Tuple[str, float, str]:
+        # Returns (event, impact, symbol of the company the event is about)
+        return self._next_event(deadline)[:3]
+
+    def _next_event(self, deadline=None, rng=None):
+        # generate_event, plus the prefetched item it used (None for a fallback event)
+        rng = rng or self.random
+        # Reset used events every 30 days
+        if self.day - self.last_reset_day >= 30:
+            self.used_events.clear()
+            self.last_reset_day = self.day
+
+        # Take a pre-generated event from the background feed; never wait longer than the deadline
+        deadline = self.event_deadline if deadline is None else deadline
+        if self.requeued_events:
+            item = self.requeued_events.popleft()
+        else:
+            item = self.event_feed.get(deadline) if self.event_feed is not None else None
+        if item is None:
+            return self.generate_fallback_event(rng) + (None,)
+
+        company, event, impact, templates = item
+        # Only use event if it's unique in the last 30 days
+        if event not in self.used_events:
+            self.used_events.add(event)
+            return event, impact, company, item
+        else:
+            # Generate alternative event if duplicate
+            company_name = self.stocks[company].name
+            alt_event = f"{company_name} {rng.choice(templates)}"
+            return alt_event, rng.uniform(-0.15, 0.15), company, item
+
+    def generate_fallback_event(self, rng=None) -> Tuple[str, float, str]:
+        METRICS.count('events.fallback')
+        rng = rng or self.random
+        company = rng.choice(list(self.stocks.keys()))
+        company_name = self.stocks[company].name
+        
+        events = [
+            f"{company_name} stock moves on market sentiment",
+            f"{company_name} responds to industry trends",
+            f"{company_name} adjusts to market conditions",
+            f"Investors react to {company_name} developments"
+        ]
+        
+        # Fix potential empty list error
+        unused_events = [e for e in events if e not in self.used_events]
+        if not unused_events:
+            # If all events are used, create a new unique event
+            event = f"{company_name} stock fluctuates amid trading activity on day {self.day}"
+        else:
+            event = rng.choice(unused_events)
+            
+        self.used_events.add(event)
+        return event, rng.uniform(-0.15, 0.15), company
+
+    def event_impact(self, company, impact):
+        if self.engine.factors is not None:
+            # News moves the named company and, more weakly, its sector
+            return self.engine.factors.event_impact(self.symbol_index[company], impact)
+        return impact
+
+    @timed('game.update_prices')
+    def update_prices(self):
+        try:
+            event, event_impact, company = self.generate_event()
+        except EVENT_ERRORS:
+            # A malformed prefetched event still gets a tick, with a fallback event
+            event, event_impact, company = self.generate_fallback_event()
+        self.engine.step(self.event_impact(company, event_impact))
+        self.orders.match(self.engine.prices, self.day)
+        return event
+
+    @property
+    def finished(self):
+        # A replay game ends with its data; simulated games go on forever
+        return bool(self.replay) and not self.engine.remaining
+
+    def advance_day(self):
+        # Generate 1-3 company-specific events, then move to the next trading day
+        if self.finished:
+            raise EOFError(f"The replay data ends on {self.engine.date}")
+        events = [self.update_prices() for _ in range(self.ticks_today())]
+        self.orders.expire_day_orders()
+        self.day += 1
+        return events
+
+    @timed('game.fast_forward')
+    def fast_forward(self, days, until=None):
+        """Play up to `days` trading days with one engine call.
+
+        Events for the whole span are generated up front without waiting: prefetched
+        ones while the feed has them, fallback events after that. `until(closes)` gets
+        the closing prices of every day (days x tickers) and returns one bool per day;
+        play stops after the first day where it's True. Returns (day, events, closing
+        prices) for each day played, with one event per tick. If play stops early, the
+        days never played leave no trace: their events are rolled back (prefetched ones
+        go back in line for later days) and they draw from their own RNG stream.
+        """
+        if self.replay:
+            # Replayed data runs out; stop on its last day like `step` does
+            days = min(days, self.engine.remaining)
+        if days <= 0:
+            return []
+        start_day = self.day
+        # The span's draws come from a stream seeded once from the game's RNG, so the game's
+        # RNG ends up in the same state however many of the days are played
+        rng = random.Random(self.random.getrandbits(64))
+        counts = [self.ticks_today(rng) for _ in range(days)]
+        events, items = [], []
+        # (used events, last reset day) at the start of each day, to roll back to
+        checkpoints = []
+        impacts = np.zeros((sum(counts), len(self.engine)))
+        for offset, count in enumerate(counts):
+            # Events see the day they belong to (for the 30-day reset and fallback wording)
+            self.day = start_day + offset
+            checkpoints.append((set(self.used_events), self.last_reset_day))
+            for _ in range(count):
+                try:
+                    event, impact, company, item = self._next_event(deadline=0, rng=rng)
+                except EVENT_ERRORS:
+                    (event, impact, company), item = self.generate_fallback_event(rng), None
+                impacts[len(events)] = self.event_impact(company, impact)
+                events.append(event)
+                items.append(item)
+        self.day = start_day
+
+        ends = np.cumsum(counts) - 1
+
+        def keep(rows):
+            if until is None:
+                return len(rows)
+            hit = np.flatnonzero(until(rows[ends]))
+            return len(rows) if not len(hit) else ends[hit[0]] + 1
+
+        rows = self.engine.advance(impacts, keep)
+
+        # Resting orders still see every tick, and day orders expire at each day's close
+        played = []
+        start = 0
+        for count in counts:
+            if start + count > len(rows):
+                break
+            for prices in rows[start:start + count]:
+                self.orders.match(prices, self.day)
+            self.orders.expire_day_orders()
+            self.day += 1
+            played.append((self.day, events[start:start + count], rows[start + count - 1]))
+            start += count
+        if len(played) < days:
+            self.used_events, self.last_reset_day = checkpoints[len(played)]
+            self.requeued_events.extend(item for item in items[start:] if item is not None)
+        return played
+
+    def place_order(self, account, symbol, side, kind, shares, price=None, tif='gtc'):
+        # Market orders fill at the current price; limit and stop orders rest until a tick triggers them
+        return self.orders.place(account, symbol, side, kind, shares, price, tif, self.day,
+                                 current_price=self.stocks[symbol].price)
+
+    def portfolio_value(self, cash, portfolio):
+        return cash + sum(shares * self.stocks[symbol].price for symbol, shares in portfolio.items())
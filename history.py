@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import numpy as np
+
+
+class HistoryStore:
+    """Columnar price history: one day x ticker float64 matrix plus a shared date axis.
+
+    Rows are preallocated and the buffer doubles when full, so appending a day is
+    amortized O(tickers) with no per-point Python objects (8 bytes per price).
+    """
+
+    def __init__(self, n_tickers, capacity=256):
+        self.n_tickers = n_tickers
+        self._values = np.empty((max(1, capacity), n_tickers), dtype=np.float64)
+        self._dates = np.empty(max(1, capacity), dtype='datetime64[us]')
+        self.length = 0
+
+    @classmethod
+    def from_arrays(cls, values, dates):
+        # Wrap existing (possibly memory-mapped, read-only) arrays without copying them;
+        # the first append after this moves the data into a growable in-memory buffer
+        store = cls.__new__(cls)
+        store.n_tickers = values.shape[1]
+        store._values = values
+        store._dates = dates
+        store.length = len(values)
+        return store
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def capacity(self):
+        return len(self._values)
+
+    @property
+    def nbytes(self):
+        return self.length * self.n_tickers * self._values.itemsize
+
+    def _grow(self, min_capacity):
+        capacity = max(1, self.capacity)
+        while capacity < min_capacity:
+            capacity *= 2
+        values = np.empty((capacity, self.n_tickers), dtype=np.float64)
+        values[:self.length] = self._values[:self.length]
+        dates = np.empty(capacity, dtype='datetime64[us]')
+        dates[:self.length] = self._dates[:self.length]
+        self._values = values
+        self._dates = dates
+
+    def append(self, prices, date=None):
+        if self.length == self.capacity:
+            self._grow(self.length + 1)
+        self._values[self.length] = prices
+        self._dates[self.length] = np.datetime64(date if date is not None else datetime.now(), 'us')
+        self.length += 1
+
+    def extend(self, rows, dates):
+        # Bulk append of several days at once (rows is days x tickers)
+        rows = np.asarray(rows, dtype=np.float64)
+        days = len(rows)
+        if self.length + days > self.capacity:
+            self._grow(self.length + days)
+        self._values[self.length:self.length + days] = rows
+        self._dates[self.length:self.length + days] = np.asarray(dates, dtype='datetime64[us]')
+        self.length += days
+
+    # Everything below returns read-only views into the buffer; they stay valid until the next growth
+    @staticmethod
+    def _readonly(view):
+        view.flags.writeable = False
+        return view
+
+    @property
+    def values(self):
+        return self._readonly(self._values[:self.length])
+
+    @property
+    def dates(self):
+        return self._readonly(self._dates[:self.length])
+
+    def column(self, index):
+        return self._readonly(self._values[:self.length, index])
+
+    def window(self, start=None, stop=None):
+        return self.values[start:stop]
@@ -0,0 +1,242 @@
+import threading
+
+import numpy as np
+
+
+class _Series:
+    # Growable float64 buffer; appends are amortized O(1) and reads are views
+    def __init__(self, capacity=256):
+        self._data = np.empty(capacity)
+        self.length = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        end = self.length + len(values)
+        if end > len(self._data):
+            data = np.empty(max(end, 2 * len(self._data)))
+            data[:self.length] = self._data[:self.length]
+            self._data = data
+        self._data[self.length:end] = values
+        self.length = end
+
+    @property
+    def values(self):
+        return self._data[:self.length]
+
+
+class Indicator:
+    """Base class: keeps output series in step with a price history that only grows.
+
+    `update(history)` only processes points appended since the previous call, so a
+    new tick costs O(1) regardless of how long the history is.
+    """
+
+    outputs = ('values',)
+
+    def __init__(self):
+        self.seen = 0
+        self.series = {name: _Series() for name in self.outputs}
+
+    def reset(self):
+        self.__init__(*self.params())
+
+    def params(self):
+        return ()
+
+    def update(self, history):
+        n = len(history)
+        if n < self.seen:
+            # History was replaced (e.g. a new game), start over
+            self.reset()
+        if n > self.seen:
+            new = self.compute(history, self.seen, n)
+            for name, values in zip(self.outputs, new):
+                self.series[name].extend(values)
+            self.seen = n
+        return self
+
+    def __getitem__(self, name):
+        return self.series[name].values
+
+    @property
+    def values(self):
+        return self.series[self.outputs[0]].values
+
+
+def moving_average(values, window):
+    # Trailing mean of the previous `window` rows (the current row is excluded), NaN for the first `window`
+    # rows; works on one price series or a day x ticker matrix
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if len(values) > window:
+        cumsum = np.concatenate((np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)))
+        out[window:] = (cumsum[window:-1] - cumsum[:-window - 1]) / window
+    return out
+
+
+class MovingAverage(Indicator):
+    # Trailing mean of the previous `window` prices (the current price is excluded), NaN until available
+    def __init__(self, window=5):
+        self.window = window
+        super().__init__()
+
+    def params(self):
+        return (self.window,)
+
+    def compute(self, history, start, stop):
+        # Recompute only the new points plus the `window` prices they look back on
+        lo = max(0, start - self.window)
+        return (moving_average(history[lo:stop], self.window)[start - lo:],)
+
+
+class Volume(Indicator):
+    # Absolute day-over-day price change, 0 for the first point
+    def compute(self, history, start, stop):
+        if start == 0:
+            return (np.concatenate(([0.0], np.abs(np.diff(history[:stop]))))[:stop],)
+        return (np.abs(np.diff(history[start - 1:stop])),)
+
+
+class EMA(Indicator):
+    def __init__(self, span=10):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.last = None
+        super().__init__()
+
+    def params(self):
+        return (self.span,)
+
+    def compute(self, history, start, stop):
+        out = np.empty(stop - start)
+        last, alpha = self.last, self.alpha
+        for i, price in enumerate(history[start:stop]):
+            last = price if last is None else last + alpha * (price - last)
+            out[i] = last
+        self.last = last
+        return (out,)
+
+
+class Bollinger(Indicator):
+    # Rolling mean +/- k standard deviations over the last `window` prices (current included)
+    outputs = ('middle', 'upper', 'lower')
+
+    def __init__(self, window=20, k=2.0):
+        self.window = window
+        self.k = k
+        super().__init__()
+
+    def params(self):
+        return (self.window, self.k)
+
+    def compute(self, history, start, stop):
+        w = self.window
+        lo = max(0, start - w + 1)
+        chunk = np.asarray(history[lo:stop])
+        s1 = np.concatenate(([0.0], np.cumsum(chunk)))
+        s2 = np.concatenate(([0.0], np.cumsum(chunk * chunk)))
+        middle = np.full(stop - start, np.nan)
+        spread = np.full(stop - start, np.nan)
+        first = max(start, w - 1)
+        if first < stop:
+            end_idx = np.arange(first, stop) + 1 - lo
+            mean = (s1[end_idx] - s1[end_idx - w]) / w
+            var = np.maximum((s2[end_idx] - s2[end_idx - w]) / w - mean * mean, 0.0)
+            middle[first - start:] = mean
+            spread[first - start:] = self.k * np.sqrt(var)
+        return middle, middle + spread, middle - spread
+
+
+class RSI(Indicator):
+    # Wilder's relative strength index; NaN until `window` changes have been seen
+    def __init__(self, window=14):
+        self.window = window
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        super().__init__()
+
+    def params(self):
+        return (self.window,)
+
+    def compute(self, history, start, stop):
+        w = self.window
+        out = np.full(stop - start, np.nan)
+        for i in range(max(start, 1), stop):
+            change = history[i] - history[i - 1]
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            if i <= w:
+                # Seed with a simple average of the first `window` changes
+                self.avg_gain += gain / w
+                self.avg_loss += loss / w
+                if i < w:
+                    continue
+            else:
+                self.avg_gain += (gain - self.avg_gain) / w
+                self.avg_loss += (loss - self.avg_loss) / w
+            if self.avg_loss == 0:
+                out[i - start] = 100.0
+            else:
+                out[i - start] = 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+        return (out,)
+
+
+INDICATORS = {
+    'ma': MovingAverage,
+    'volume': Volume,
+    'ema': EMA,
+    'bollinger': Bollinger,
+    'rsi': RSI,
+}
+
+
+class IndicatorCache:
+    """Indicators per (ticker, kind, params), created on first use and updated incrementally."""
+
+    def __init__(self):
+        self._indicators = {}
+        self._channels = {}
+        # Sessions sharing one market also share its cache, so updates are serialized
+        self._lock = threading.RLock()
+
+    def get(self, symbol, kind, history, *params):
+        key = (symbol, kind) + params
+        with self._lock:
+            indicator = self._indicators.get(key)
+            if indicator is None:
+                indicator = self._indicators[key] = INDICATORS[kind](*params)
+            return indicator.update(history)
+
+    def ma(self, symbol, history, window=5):
+        return self.get(symbol, 'ma', history, window).values
+
+    def volume(self, symbol, history):
+        return self.get(symbol, 'volume', history).values
+
+    def ema(self, symbol, history, span=10):
+        return self.get(symbol, 'ema', history, span).values
+
+    def bollinger(self, symbol, history, window=20, k=2.0):
+        indicator = self.get(symbol, 'bollinger', history, window, k)
+        return indicator['middle'], indicator['upper'], indicator['lower']
+
+    def rsi(self, symbol, history, window=14):
+        return self.get(symbol, 'rsi', history, window).values
+
+    def channel(self, symbol, history, band):
+        # Price +/- a constant band; rebuilt only when the history length or band changes
+        version = (len(history), band)
+        with self._lock:
+            cached = self._channels.get(symbol)
+            if cached is None or cached[0] != version:
+                cached = (version, history + band, history - band)
+                self._channels[symbol] = cached
+        return cached[1], cached[2]
+
+    def clear(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._indicators.clear()
+                self._channels.clear()
+            else:
+                self._indicators = {k: v for k, v in self._indicators.items() if k[0] != symbol}
+                self._channels.pop(symbol, None)
@@ -0,0 +1,408 @@
+"""Multi-player leaderboard ranked by portfolio value, return and milestones.
+
+    board = Leaderboard(symbols)
+    board.join('alice', 'Alice')
+    board.update('alice', cash, portfolio)  # after a trade; portfolio is {symbol: shares}
+    board.mark(prices, day)                 # after a price tick
+    board.top(100, by='value'), board.rank('alice', by='return')
+
+Holdings are kept sparsely, as the columns and share counts of each player's positions,
+so memory grows with the positions held rather than players x tickers. A tick revalues
+everybody in one vectorized pass over all positions. Each ranking is a `RankIndex` (sorted buckets plus a Fenwick tree over
+their sizes). Rank and top-k queries are O(log n) and never re-sort the board.
+"""
+import gc
+import threading
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+
+import numpy as np
+
+from game import MILESTONES
+
+STARTING_CASH = 10000
+RANKINGS = ('value', 'return', 'milestone')
+
+
+@contextmanager
+def _gc_paused():
+    # Building tens of thousands of key tuples would otherwise set off several full collections
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class RankIndex:
+    """Sorted multiset of keys with O(log n) rank and select.
+
+    Keys sit in sorted buckets of `load` to 2 * `load` items. A Fenwick tree over the
+    bucket sizes answers "how many keys come before this bucket" in O(log buckets). So
+    `rank` and `select` cost two binary searches, and `add`/`remove` cost one plus a
+    short list shift. The tree is rebuilt only when a bucket splits or empties.
+    """
+
+    def __init__(self, keys=(), load=256):
+        self.load = load
+        self.rebuild(sorted(keys))
+
+    def rebuild(self, keys):
+        # Replace the contents with `keys`, which must already be sorted; O(n)
+        keys = list(keys)
+        self._buckets = [keys[i:i + self.load] for i in range(0, len(keys), self.load)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._len = len(keys)
+        self._build_tree()
+
+    def _build_tree(self):
+        tree = [0] + [len(bucket) for bucket in self._buckets]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, bucket, delta):
+        i = bucket + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _before(self, bucket):
+        # Number of keys in the buckets before `bucket`
+        total = 0
+        i = bucket
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for bucket in self._buckets:
+            yield from bucket
+
+    def add(self, key):
+        if not self._buckets:
+            self.rebuild([key])
+            return
+        b = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+        bucket = self._buckets[b]
+        insort(bucket, key)
+        self._maxes[b] = bucket[-1]
+        self._len += 1
+        if len(bucket) > 2 * self.load:
+            self._buckets[b:b + 1] = [bucket[:self.load], bucket[self.load:]]
+            self._maxes[b:b + 1] = [bucket[self.load - 1], bucket[-1]]
+            self._build_tree()
+        else:
+            self._tree_add(b, 1)
+
+    def remove(self, key):
+        b = bisect_left(self._maxes, key)
+        bucket = self._buckets[b] if b < len(self._buckets) else []
+        i = bisect_left(bucket, key)
+        if i == len(bucket) or bucket[i] != key:
+            raise KeyError(key)
+        del bucket[i]
+        self._len -= 1
+        if bucket:
+            self._maxes[b] = bucket[-1]
+            self._tree_add(b, -1)
+        else:
+            del self._buckets[b]
+            del self._maxes[b]
+            self._build_tree()
+
+    def rank(self, key):
+        # Number of keys smaller than `key`
+        b = bisect_left(self._maxes, key)
+        if b == len(self._buckets):
+            return self._len
+        return self._before(b) + bisect_left(self._buckets[b], key)
+
+    def _locate(self, index):
+        # (bucket, offset) of the key at sorted position `index`, by descending the Fenwick tree
+        position = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            child = position + step
+            if child < len(self._tree) and self._tree[child] <= index:
+                position = child
+                index -= self._tree[child]
+            step >>= 1
+        return position, index
+
+    def select(self, index):
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        bucket, offset = self._locate(index)
+        return self._buckets[bucket][offset]
+
+    def slice(self, start, stop):
+        # Keys at sorted positions [start, stop)
+        stop = min(stop, self._len)
+        if start >= stop:
+            return []
+        bucket, offset = self._locate(start)
+        keys = []
+        while len(keys) < stop - start:
+            keys.extend(self._buckets[bucket][offset:offset + stop - start - len(keys)])
+            bucket, offset = bucket + 1, 0
+        return keys
+
+
+class Leaderboard:
+    """Ranks every player by portfolio value, return, and highest milestone (earliest first).
+
+    `update` re-ranks one player after a trade in O(log n). `mark` revalues all
+    holdings at new prices in one pass over every held position. It re-ranks the players whose
+    value changed one by one when there are few, and otherwise rebuilds the index from
+    one NumPy sort. Thread-safe, so sessions of a shared market can all report to one board.
+    """
+
+    def __init__(self, symbols, milestones=MILESTONES, starting_cash=STARTING_CASH, capacity=1024):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.starting_cash = starting_cash
+        self.milestones = milestones
+        self.thresholds = np.array(sorted(milestones), dtype=np.float64)
+        self.prices = np.zeros(len(self.symbols))
+        self.day = 0
+
+        self.players = {}      # player id -> row
+        self.ids = []
+        self.names = []
+        self.active = np.zeros(capacity, dtype=bool)
+        self.cash = np.zeros(capacity)
+        self.invested = np.zeros(capacity)
+        # Every position any player holds, as flat arrays: owner row, ticker column and shares.
+        # A player's slots are reused when they trade the same ticker again
+        self.slots = []        # per row: {column: slot in the arrays below}
+        self.owners = np.zeros(capacity, dtype=np.intp)
+        self.columns = np.zeros(capacity, dtype=np.intp)
+        self.shares = np.zeros(capacity)
+        self.positions = 0     # slots in use
+        self.values = np.zeros(capacity)
+        self.level = np.full(capacity, -1, dtype=np.int64)      # index of the highest milestone reached
+        self.reached = np.full(capacity, np.inf)                # day it was reached
+
+        self.indexes = {by: RankIndex() for by in RANKINGS}
+        # Key each player is filed under: the first element for value and return (NaN if not
+        # indexed, the row is the second), the whole (level, day, row) key for milestones
+        self.ranked = {by: np.full(capacity, np.nan) for by in ('value', 'return')}
+        self._milestone_keys = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.indexes['value'])
+
+    def __contains__(self, player):
+        # Whether the player is on the board (joined and not left)
+        row = self.players.get(player)
+        return row is not None and bool(self.active[row])
+
+    def _grow(self):
+        capacity = 2 * len(self.cash)
+        for name in ('active', 'cash', 'invested', 'values', 'level', 'reached'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            new[len(old):] = {'active': False, 'level': -1, 'reached': np.inf}.get(name, 0)
+            setattr(self, name, new)
+        for by, old in self.ranked.items():
+            self.ranked[by] = np.concatenate([old, np.full(capacity - len(old), np.nan)])
+
+    # --- keys ----------------------------------------------------------------------
+    # Ascending keys put the best player first; the row breaks ties by join order
+
+    def _primary(self, by, rows):
+        if by == 'value':
+            return -self.values[rows]
+        return -self._returns(rows)
+
+    def _returns(self, rows):
+        invested = self.invested[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(invested != 0, self.values[rows] / invested - 1.0, 0.0)
+
+    def _reindex(self, row, rankings=RANKINGS):
+        for by in rankings:
+            index = self.indexes[by]
+            if by == 'milestone':
+                old = self._milestone_keys.get(row)
+                new = (-int(self.level[row]), float(self.reached[row]), row)
+                if old != new:
+                    if old is not None:
+                        index.remove(old)
+                    index.add(new)
+                    self._milestone_keys[row] = new
+                continue
+            old = self.ranked[by][row]
+            new = float(self._primary(by, [row])[0])
+            if old == new:
+                continue
+            if not np.isnan(old):
+                index.remove((float(old), row))
+            index.add((new, row))
+            self.ranked[by][row] = new
+
+    def _rebuild(self, by, rows):
+        # Sort all active players with NumPy, then load the index in one O(n) pass; rows are
+        # ascending, so a stable sort breaks ties by join order like the keys do
+        primary = self._primary(by, rows)
+        order = np.argsort(primary, kind='stable')
+        self.ranked[by][rows] = primary
+        with _gc_paused():
+            self.indexes[by].rebuild(zip(primary[order].tolist(), rows[order].tolist()))
+
+    def _reach_milestones(self, rows):
+        levels = np.searchsorted(self.thresholds, self.values[rows], side='right') - 1
+        improved = levels > self.level[rows]
+        for row, level in zip(rows[improved].tolist(), levels[improved].tolist()):
+            self.level[row] = level
+            self.reached[row] = self.day
+            self._reindex(row, ('milestone',))
+
+    # --- updates -------------------------------------------------------------------
+
+    def join(self, player, name=None, cash=None):
+        # A player who left comes back with the holdings they left with
+        with self._lock:
+            if player in self.players:
+                row = self.players[player]
+                if not self.active[row]:
+                    self.active[row] = True
+                    self._reindex(row)
+                    self._reach_milestones(np.array([row]))
+                return row
+            row = len(self.ids)
+            if row == len(self.cash):
+                self._grow()
+            self.players[player] = row
+            self.ids.append(player)
+            self.names.append(name or str(player))
+            self.slots.append({})
+            cash = self.starting_cash if cash is None else cash
+            self.active[row] = True
+            self.cash[row] = cash
+            self.invested[row] = cash
+            self.values[row] = cash
+            self._reindex(row)
+            self._reach_milestones(np.array([row]))
+            return row
+
+    def rename(self, player, name):
+        with self._lock:
+            self.names[self.players[player]] = name
+
+    def leave(self, player):
+        with self._lock:
+            row = self.players[player]
+            if not self.active[row]:
+                return
+            self.active[row] = False
+            for by, ranked in self.ranked.items():
+                self.indexes[by].remove((float(ranked[row]), row))
+                ranked[row] = np.nan
+            self.indexes['milestone'].remove(self._milestone_keys.pop(row))
+
+    def update(self, player, cash, portfolio):
+        """Record a player's cash and {symbol: shares} holdings after a trade."""
+        held = {symbol: shares for symbol, shares in portfolio.items() if shares}
+        columns = np.fromiter((self.index[symbol] for symbol in held), dtype=np.intp, count=len(held))
+        shares = np.fromiter(held.values(), dtype=np.float64, count=len(held))
+        with self._lock:
+            row = self.players[player]
+            self.cash[row] = cash
+            self._hold(row, columns, shares)
+            self.values[row] = cash + shares @ self.prices[columns]
+            if self.active[row]:
+                self._reindex(row)
+                self._reach_milestones(np.array([row]))
+
+    def mark(self, prices, day=None):
+        """Revalue every player at new prices and update the rankings."""
+        with self._lock:
+            self.prices = np.array(prices, dtype=np.float64)
+            if day is not None:
+                self.day = day
+            n = len(self.ids)
+            m = self.positions
+            worth = self.shares[:m] * self.prices[self.columns[:m]]
+            values = self.cash[:n] + np.bincount(self.owners[:m], weights=worth, minlength=n)
+            rows = np.flatnonzero(self.active[:n] & (values != self.values[:n]))
+            self.values[:n] = values
+            if not len(rows):
+                return
+            if len(rows) <= len(self) // 16:
+                for row in rows.tolist():
+                    self._reindex(row, ('value', 'return'))
+            else:
+                active = np.flatnonzero(self.active[:n])
+                for by in ('value', 'return'):
+                    self._rebuild(by, active)
+            self._reach_milestones(rows)
+
+    def _hold(self, row, columns, shares):
+        # Replace a player's positions; tickers they no longer hold keep their slot at zero shares
+        slots = self.slots[row]
+        if slots:
+            self.shares[list(slots.values())] = 0.0
+        new = [column for column in columns.tolist() if column not in slots]
+        if self.positions + len(new) > len(self.shares):
+            capacity = max(2 * len(self.shares), self.positions + len(new))
+            for name in ('owners', 'columns', 'shares'):
+                old = getattr(self, name)
+                grown = np.zeros(capacity, dtype=old.dtype)
+                grown[:self.positions] = old[:self.positions]
+                setattr(self, name, grown)
+        for column in new:
+            slots[column] = self.positions
+            self.owners[self.positions] = row
+            self.columns[self.positions] = column
+            self.positions += 1
+        self.shares[[slots[column] for column in columns.tolist()]] = shares
+
+    # --- queries -------------------------------------------------------------------
+
+    def _row_info(self, row, rank, ret):
+        level = int(self.level[row])
+        return {
+            'rank': rank,
+            'player': self.ids[row],
+            'name': self.names[row],
+            'value': float(self.values[row]),
+            'return': ret,
+            'milestone': self.milestones[self.thresholds[level]] if level >= 0 else None,
+            'milestone_day': int(self.reached[row]) if level >= 0 else None,
+        }
+
+    def top(self, n=100, by='value', start=0):
+        """Players ranked start+1 .. start+n as dicts (rank is 1-based)."""
+        with self._lock:
+            rows = [key[-1] for key in self.indexes[by].slice(start, start + n)]
+            returns = self._returns(rows).tolist()
+            return [self._row_info(row, start + i + 1, ret) for i, (row, ret) in enumerate(zip(rows, returns))]
+
+    def rank(self, player, by='value'):
+        # 1-based rank of an active player
+        with self._lock:
+            return self._rank(self.players[player], by)
+
+    def _rank(self, row, by):
+        if by == 'milestone':
+            key = self._milestone_keys[row]
+        else:
+            key = (float(self.ranked[by][row]), row)
+        return self.indexes[by].rank(key) + 1
+
+    def standing(self, player, by='value'):
+        with self._lock:
+            row = self.players[player]
+            return self._row_info(row, self._rank(row, by), float(self._returns([row])[0]))
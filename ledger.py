@@ -0,0 +1,172 @@
+import numpy as np
+
+from history import HistoryStore
+
+# Columns of the equity curve
+EQUITY_COLUMNS = ('day', 'equity', 'cash')
+
+
+class Ledger:
+    """One player's cash, positions, cost basis and P&L, updated incrementally.
+
+    Only held positions are stored: `slots` maps a held symbol to its slot in small
+    arrays of engine columns, shares, cost basis and the price at the last mark, so a
+    ledger costs the same in a 12-ticker game and a 5,000-ticker universe. A trade
+    touches one slot (average-cost basis, realized P&L on sells) and adjusts the cached
+    market value. A new price tick revalues the held positions with one gather and dot
+    product. Value and P&L reads are cached attributes, so they're O(1) between ticks
+    however often the UI reruns. `portfolio` is the plain {symbol: shares} dict the
+    rest of the app uses.
+
+    `symbols` is the universe's tickers in engine order, or a {symbol: column} dict
+    such as `StockMarketGame.symbol_index`, which is shared rather than copied.
+    """
+
+    def __init__(self, symbols, cash=10000.0, portfolio=None, cost=None, realized=0.0, equity=None):
+        self.index = symbols if isinstance(symbols, dict) else {symbol: i for i, symbol in enumerate(symbols)}
+        self.cash = float(cash)
+        self.realized = float(realized)
+        self.portfolio = {}
+        self.slots = {}                               # held symbol -> slot in the arrays below
+        self.held = []                                # symbol in each slot
+        self.columns = np.empty(0, dtype=np.intp)     # engine column of each slot
+        self.shares = np.empty(0)
+        self.cost = np.empty(0)                       # total cost basis of each slot
+        self.marked = np.empty(0)                     # price of each slot at the last mark
+        self.prices = None                            # prices of the last mark (the caller's array)
+        cost = cost or {}
+        for symbol, shares in (portfolio or {}).items():
+            if shares:
+                slot = self._open(symbol, 0.0)
+                self.shares[slot] = shares
+                self.cost[slot] = cost.get(symbol, 0.0)
+                self.portfolio[symbol] = shares
+        self.cost_total = float(self.cost.sum())
+
+        self.market_value = 0.0
+        self.tick = -1
+        self._positions = None
+
+        # Daily equity curve: one (day, equity, cash) row per trading day
+        self.equity = equity if equity is not None else HistoryStore(len(EQUITY_COLUMNS))
+
+    # --- updates -------------------------------------------------------------
+
+    def mark(self, prices, tick):
+        # Revalue at a new tick; repeat calls for the same tick cost nothing
+        if tick == self.tick:
+            return self
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.marked = self.prices[self.columns]
+        self.market_value = float(self.shares @ self.marked)
+        self.tick = tick
+        self._positions = None
+        return self
+
+    def trade(self, symbol, shares, price):
+        """Buy (shares > 0) or sell (shares < 0) at `price`.
+
+        Returns False, changing nothing, if the cash or the shares aren't there.
+        """
+        slot = self.slots.get(symbol)
+        amount = shares * price
+        if shares == 0:
+            return False
+        if shares > 0:
+            if amount > self.cash:
+                return False
+            if slot is None:
+                # A new position is valued at the last mark, like the ones already held
+                column = self.index[symbol]
+                slot = self._open(symbol, price if self.prices is None else float(self.prices[column]))
+            self.cost[slot] += amount
+            self.cost_total += amount
+        else:
+            held = self.shares[slot] if slot is not None else 0
+            if -shares > held:
+                return False
+            basis = self.cost[slot] * (-shares / held)
+            self.realized += -amount - basis
+            self.cost[slot] -= basis
+            self.cost_total -= basis
+        self.cash -= amount
+        self.shares[slot] += shares
+        self.market_value += shares * self.marked[slot]
+        held = int(self.shares[slot])
+        if held:
+            self.portfolio[symbol] = held
+        else:
+            self.portfolio.pop(symbol, None)
+            self._close(symbol)
+            self.cost_total = float(self.cost.sum())
+        self._positions = None
+        return True
+
+    def _open(self, symbol, price):
+        # Add an empty slot for a newly held symbol
+        self.slots[symbol] = len(self.held)
+        self.held.append(symbol)
+        self.columns = np.append(self.columns, self.index[symbol])
+        self.shares = np.append(self.shares, 0.0)
+        self.cost = np.append(self.cost, 0.0)
+        self.marked = np.append(self.marked, price)
+        return self.slots[symbol]
+
+    def _close(self, symbol):
+        # Drop a position's slot by moving the last slot into it
+        slot = self.slots.pop(symbol)
+        last = len(self.held) - 1
+        if slot != last:
+            moved = self.held[last]
+            self.held[slot] = moved
+            self.slots[moved] = slot
+        self.held.pop()
+        for name in ('columns', 'shares', 'cost', 'marked'):
+            values = getattr(self, name)
+            values[slot] = values[last]
+            setattr(self, name, values[:last].copy())
+
+    def record(self, day, date=None):
+        # Close the books for `day` once; the equity curve gets one row per trading day
+        if len(self.equity) and self.equity.values[-1, 0] >= day:
+            return
+        self.equity.append((day, self.value, self.cash), date)
+
+    # --- reads ---------------------------------------------------------------
+
+    @property
+    def value(self):
+        return self.cash + self.market_value
+
+    @property
+    def unrealized(self):
+        return self.market_value - self.cost_total
+
+    @property
+    def equity_curve(self):
+        # (days, equity values) as read-only views
+        values = self.equity.values
+        return values[:, 0], values[:, 1]
+
+    def positions(self):
+        """Columns for every held ticker: symbol, shares, price, value, avg_cost, unrealized.
+
+        Rebuilt only after a trade or a new tick.
+        """
+        if self._positions is None:
+            # In ticker order, whatever order the positions were opened in
+            order = np.argsort(self.columns, kind='stable')
+            shares = self.shares[order]
+            value = shares * self.marked[order]
+            self._positions = {
+                'symbol': [self.held[i] for i in order],
+                'shares': shares.astype(int),
+                'price': self.marked[order],
+                'value': value,
+                'avg_cost': self.cost[order] / shares,
+                'unrealized': value - self.cost[order],
+            }
+        return self._positions
+
+    def cost_basis(self):
+        return {symbol: float(self.cost[self.slots[symbol]]) for symbol in self.portfolio}
@@ -1,12 +1,20 @@
 import streamlit as st
-import random
 import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import numpy as np
 import openai
-from openai import OpenAI  # Add this import at the top
-from typing import Tuple
+import functools
+import time
+import uuid
+from game import MILESTONES, StockMarketGame
+from events import EventPrefetcher
+from event_cache import EventCache
+from charts import FigureCache, build_stock_chart
+from storage import DEFAULT_SAVE_DIR, GameStore
+from shared import SharedMarket
+from ledger import Ledger
+from analytics import REPORT_LOOKBACK, risk_report
+from profiling import METRICS, profile, serve as serve_metrics
 
 # Set Streamlit theme and configure page
 st.set_page_config(page_title="Future Trading Simulator", layout="wide", initial_sidebar_state="expanded")
@@ -74,293 +82,308 @@ except Exception as e:
     # Fallback to environment variable or hardcoded key (for development only)
     openai.api_key = "your-actual-api-key"  # Replace with your real API key
 
-class Stock:
-    def __init__(self, name, initial_price, volatility, trend):
-        self.name = name
-        self.price = initial_price
-        self.history = [initial_price]
-        self.dates = [datetime.now()]
-        self.volatility = volatility
-        self.trend = trend  # Overall market trend
-
-# Near the top of the file, add these constants
-MILESTONES = {
-    100000: "First 100K - Buy a Luxury Car 🚗",
-    250000: "250K - Buy a Vacation Home 🏖️",
-    500000: "500K - Start Your Own Business 💼",
-    1000000: "WINNER: You're a Millionaire! 🎉"
-}
-
-class StockMarketGame:
-    def __init__(self):
-        self.stocks = {
-            'AAPL': Stock('Apple Inc.', random.uniform(165, 185), 0.02, 0.002),
-            'GOOGL': Stock('Google', random.uniform(2700, 3000), 0.025, 0.003),
-            'TSLA': Stock('Tesla', random.uniform(850, 950), 0.045, 0.004),
-            'AMZN': Stock('Amazon', random.uniform(3100, 3400), 0.028, 0.002),
-            'MSFT': Stock('Microsoft', random.uniform(280, 320), 0.022, 0.002),
-            'META': Stock('Meta', random.uniform(260, 300), 0.035, 0.003),
-            'NVDA': Stock('NVIDIA', random.uniform(420, 480), 0.04, 0.003),
-            'JPM': Stock('JPMorgan', random.uniform(130, 150), 0.015, 0.001),
-            'DIS': Stock('Disney', random.uniform(90, 100), 0.025, 0.002),
-            'NFLX': Stock('Netflix', random.uniform(400, 440), 0.038, 0.003),
-            'COIN': Stock('Coinbase', random.uniform(75, 95), 0.055, 0.005),
-            'ADBE': Stock('Adobe', random.uniform(500, 540), 0.028, 0.002)
-        }
-        self.used_events = set()  # Track used events
-        self.last_reset_day = 1   # Track when to reset used events
-
-    # Fix the generate_event method to properly handle the nested try-except blocks
-    def generate_event(self) -> Tuple[str, float]:
-        # Reset used events every 30 days
-        if st.session_state.day - self.last_reset_day >= 30:
-            self.used_events.clear()
-            self.last_reset_day = st.session_state.day
-        
+# Directory for saved games (set save_dir = "" in secrets.toml to turn saving off)
+try:
+    save_dir = st.secrets["save_dir"]
+except Exception as e:
+    save_dir = DEFAULT_SAVE_DIR
+
+# Optional: one market shared by every session, advanced on a timer instead of by each player
+try:
+    shared_market_enabled = bool(st.secrets["shared_market"])
+except Exception as e:
+    shared_market_enabled = False
+try:
+    market_day_seconds = float(st.secrets["market_day_seconds"])
+except Exception as e:
+    market_day_seconds = 60.0
+
+# Optional: point the event feed at another OpenAI-compatible endpoint (e.g. a local stub server)
+try:
+    openai_base_url = st.secrets["openai_base_url"]
+except Exception as e:
+    openai_base_url = None
+
+# Optional replay mode: play recorded prices from a dataset imported with `python marketdata.py import`.
+# replay_start picks the first day; ?replay_from=2008-01-01 in the URL overrides it for a new game
+try:
+    replay_data = st.secrets["replay_data"]
+except Exception as e:
+    replay_data = None
+try:
+    replay_start = st.secrets["replay_start"]
+except Exception as e:
+    replay_start = None
+
+# Live mode ticks the market (or, with a shared market, refreshes prices) every this many seconds
+try:
+    live_seconds = float(st.secrets["live_seconds"])
+except Exception as e:
+    live_seconds = 5.0
+
+# Hidden performance panel: open the app with ?admin=1 or set admin = true in secrets.toml
+try:
+    admin_enabled = bool(st.secrets["admin"])
+except Exception as e:
+    admin_enabled = False
+# Optional: serve /metrics (Prometheus text) and /metrics.json on this local port
+try:
+    metrics_port = int(st.secrets["metrics_port"])
+except Exception as e:
+    metrics_port = None
+
+def fragment(name, live=False):
+    # Render through st.fragment, so widgets inside rerun only this function instead of the whole page.
+    # Live fragments also re-run every `live_seconds` while live mode is on, ticking the market first if due
+    def decorate(fn):
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            with METRICS.timer(f'ui.fragment.{name}'):
+                if live:
+                    refresh_market()
+                return fn(*args, **kwargs)
+
+        @functools.wraps(fn)
+        def render(*args, **kwargs):
+            run_every = live_seconds if live and st.session_state.get('live') else None
+            return st.fragment(body, run_every=run_every)(*args, **kwargs)
+        return render
+    return decorate
+
+def create_stock_chart(stock):
+    # Figures are rebuilt only after a new tick; reruns from widgets reuse the cached one
+    with METRICS.timer('ui.chart'):
+        return st.session_state.figures.get(
+            (stock.symbol, len(stock.history)),
+            lambda: build_stock_chart(stock, st.session_state.game.indicators)
+        )
+
+def render_chart(fig):
+    # Serializing a figure for the browser is timed separately from building it
+    with METRICS.timer('ui.render.chart'):
+        st.plotly_chart(fig, use_container_width=True)
+
+def render_table(df, column_config=None):
+    with METRICS.timer('ui.render.table'):
+        st.dataframe(df, use_container_width=True, column_config=column_config)
+
+@st.cache_resource
+def start_metrics_server(port):
+    # One metrics endpoint per server process
+    return serve_metrics(port)
+
+@st.cache_resource
+def get_event_feed(symbols):
+    # One event feed per server process (and set of tickers), shared by the games of every session.
+    # Games come and go with sessions and new games, and a feed of their own would leave its threads running
+    return EventPrefetcher(symbols, openai.api_key, base_url=openai_base_url, cache=EventCache()).start()
+
+def attach_event_feed(game):
+    if openai.api_key:
+        game.event_feed = get_event_feed(tuple(game.stocks))
+    return game
+
+@st.cache_resource
+def get_shared_market(day_seconds):
+    # Created once per server process and shared by every session
+    replay = {'path': replay_data, 'start': replay_start} if replay_data else None
+    game = attach_event_feed(StockMarketGame(replay=replay))
+    return SharedMarket(game, day_seconds).start()
+
+def load_or_create_game():
+    # Resume the game named in the URL (?game=<id>) if it was saved, otherwise start a new one.
+    # Games are created without an API key and draw from the process-wide event feed instead
+    store = GameStore(save_dir, st.query_params.get("game")) if save_dir else None
+    game_kwargs = {}
+    if replay_data:
+        game_kwargs['replay'] = {'path': replay_data, 'start': st.query_params.get("replay_from") or replay_start}
+    if store is not None and store.exists:
         try:
-            company = random.choice(list(self.stocks.keys()))
-            event_types = [
-                f"announced a new {random.choice(['product launch', 'partnership', 'acquisition', 'technology breakthrough'])}",
-                f"reported {random.choice(['better', 'worse'])} than expected {random.choice(['earnings', 'revenue', 'growth'])}",
-                f"revealed plans for {random.choice(['expansion', 'restructuring', 'cost-cutting', 'innovation'])}",
-                f"faced {random.choice(['regulatory challenges', 'market competition', 'supply chain issues', 'leadership changes'])}"
-            ]
-            
-            # Create client instance
-            client = OpenAI(api_key=openai.api_key)
-            
-            try:
-                # Updated API call
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": f"You are a financial news reporter. Generate a unique, specific news event about {company} that hasn't been reported before. Include specific details about products, numbers, or impacts."},
-                        {"role": "user", "content": f"Generate a market event about {company} using one of these templates: {event_types}. Add specific details and impact value (between -0.15 and 0.15) in format: 'Event|impact_value'"}
-                    ],
-                    max_tokens=50,
-                    temperature=0.9
-                )
-                
-                event_text = response.choices[0].message.content.strip()
-                event, impact = event_text.split('|')
-                
-                # Only use event if it's unique in the last 30 days
-                if event not in self.used_events:
-                    self.used_events.add(event)
-                    return event, float(impact)
-                else:
-                    # Generate alternative event if duplicate
-                    company_name = self.stocks[company].name
-                    alt_event = f"{company_name} {random.choice(event_types)}"
-                    return alt_event, random.uniform(-0.15, 0.15)
-            except Exception as e:
-                return self.generate_fallback_event()
+            game, state = store.load(**game_kwargs)
+            return attach_event_feed(game), state, store
         except Exception as e:
-            return self.generate_fallback_event()
+            store = GameStore(save_dir)
 
-    def generate_fallback_event(self) -> Tuple[str, float]:
-        company = random.choice(list(self.stocks.keys()))
-        company_name = self.stocks[company].name
-        
-        events = [
-            f"{company_name} stock moves on market sentiment",
-            f"{company_name} responds to industry trends",
-            f"{company_name} adjusts to market conditions",
-            f"Investors react to {company_name} developments"
-        ]
-        
-        # Fix potential empty list error
-        unused_events = [e for e in events if e not in self.used_events]
-        if not unused_events:
-            # If all events are used, create a new unique event
-            event = f"{company_name} stock fluctuates amid trading activity on day {st.session_state.day}"
-        else:
-            event = random.choice(unused_events)
-            
-        self.used_events.add(event)
-        return event, random.uniform(-0.15, 0.15)
-
-    def update_prices(self):
-        event, event_impact = self.generate_event()
-        for stock in self.stocks.values():
-            trend = stock.trend * random.uniform(0.8, 1.2)
-            volatility = random.uniform(-stock.volatility, stock.volatility)
-            market_sentiment = random.uniform(-0.02, 0.02)
-            
-            total_change = trend + volatility + market_sentiment + event_impact
-            stock.price *= (1 + total_change)
-            stock.history.append(stock.price)
-            stock.dates.append(datetime.now())
-        return event
+    game = attach_event_feed(StockMarketGame(**game_kwargs))
+    ledger = Ledger(game.symbol_index, cash=10000)
+    ledger.mark(game.engine.prices, len(game.engine.history)).record(game.day, game.engine.dates[-1])
+    state = {'cash': ledger.cash, 'portfolio': ledger.portfolio, 'events_history': [], 'ledger': ledger}
+    if store is not None:
+        store.create(game, state)
+    return game, state, store
 
-def create_stock_chart(stock):
-    fig = go.Figure()
-    
-    # Custom color and style for each stock
-    stock_styles = {
-        'AAPL': {'color': '#FF6B6B', 'pattern': 'lines', 'dash': 'solid', 'symbol': 'circle'},
-        'GOOGL': {'color': '#4ECDC4', 'pattern': 'lines+markers', 'dash': 'solid', 'symbol': 'diamond'},
-        'TSLA': {'color': '#FFE66D', 'pattern': 'lines', 'dash': 'dash', 'symbol': 'x'},
-        'AMZN': {'color': '#FF8B94', 'pattern': 'lines+markers', 'dash': 'solid', 'symbol': 'triangle-up'},
-        'MSFT': {'color': '#96CEB4', 'pattern': 'lines', 'dash': 'dot', 'symbol': 'square'},
-        'META': {'color': '#FFEEAD', 'pattern': 'lines+markers', 'dash': 'dashdot', 'symbol': 'star'},
-        'NVDA': {'color': '#D4A5A5', 'pattern': 'lines', 'dash': 'longdash', 'symbol': 'pentagon'},
-        'JPM': {'color': '#9AC1D9', 'pattern': 'lines+markers', 'dash': 'solid', 'symbol': 'hexagon'},
-        'DIS': {'color': '#FFB6B9', 'pattern': 'lines', 'dash': 'dash', 'symbol': 'cross'},
-        'NFLX': {'color': '#A8E6CF', 'pattern': 'lines+markers', 'dash': 'dot', 'symbol': 'triangle-down'},
-        'COIN': {'color': '#DCEDC1', 'pattern': 'lines', 'dash': 'dashdot', 'symbol': 'hourglass'},
-        'ADBE': {'color': '#FFD3B6', 'pattern': 'lines+markers', 'dash': 'longdashdot', 'symbol': 'octagon'}
+def game_state():
+    return {
+        'cash': st.session_state.ledger.cash,
+        'portfolio': st.session_state.ledger.portfolio,
+        'events_history': st.session_state.events_history,
+        'ledger': st.session_state.ledger
     }
-    
-    # Get stock symbol from name (e.g., 'Apple Inc.' -> 'AAPL')
-    symbol = next((s for s, stk in st.session_state.game.stocks.items() if stk.name == stock.name), '')
-    style = stock_styles.get(symbol, {'color': '#64ffda', 'pattern': 'lines', 'dash': 'solid', 'symbol': 'circle'})
-    
-    # Add main price line
-    fig.add_trace(go.Scatter(
-        x=stock.dates,
-        y=stock.history,
-        mode=style['pattern'],
-        name=stock.name,
-        line=dict(
-            color=style['color'],
-            width=2,
-            dash=style['dash']
-        ),
-        marker=dict(
-            size=6,
-            symbol=style['symbol']
-        )
-    ))
-    
-    # Add volume bars at the bottom
-    fig.add_trace(go.Bar(
-        x=stock.dates,
-        y=[abs(stock.history[i] - stock.history[i-1]) if i > 0 else 0 for i in range(len(stock.history))],
-        name='Volume',
-        marker_color=style['color'],
-        opacity=0.3,
-        yaxis='y2'
-    ))
-    
-    # Add moving average if we have enough data points
-    if len(stock.history) > 5:
-        ma_period = min(5, len(stock.history) - 1)
-        ma_data = []
-        for i in range(len(stock.history)):
-            if i < ma_period:
-                ma_data.append(None)
-            else:
-                ma_data.append(sum(stock.history[i-ma_period:i]) / ma_period)
-        
-        fig.add_trace(go.Scatter(
-            x=stock.dates,
-            y=ma_data,
-            mode='lines',
-            name=f'{ma_period}-Day MA',
-            line=dict(
-                color='rgba(255, 255, 255, 0.7)',
-                width=1.5,
-                dash='dot'
-            )
-        ))
-    
-    # Add trend channel (upper and lower bounds)
-    if len(stock.history) > 3:
-        # Simple trend channel based on recent volatility
-        volatility = stock.volatility * stock.price
-        upper_bound = [price + volatility for price in stock.history]
-        lower_bound = [price - volatility for price in stock.history]
-        
-        fig.add_trace(go.Scatter(
-            x=stock.dates,
-            y=upper_bound,
-            mode='lines',
-            name='Upper Channel',
-            line=dict(color='rgba(100, 255, 218, 0.3)', width=1, dash='dot'),
-            fill=None
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=stock.dates,
-            y=lower_bound,
-            mode='lines',
-            name='Lower Channel',
-            line=dict(color='rgba(100, 255, 218, 0.3)', width=1, dash='dot'),
-            fill='tonexty'  # Fill area between upper and lower bound
-        ))
-    
-    # Update layout to match white theme
-    fig.update_layout(
-        plot_bgcolor='#f8f9fa',
-        paper_bgcolor='#ffffff',
-        font=dict(color='#212529'),
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='#e9ecef',
-            gridwidth=0.5
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='#e9ecef',
-            gridwidth=0.5,
-            title='Price'
-        ),
-        yaxis2=dict(
-            title='Volume',
-            overlaying='y',
-            side='right',
-            showgrid=False
-        ),
-        height=400,
-        title=dict(
-            text=f"{stock.name} Stock Performance",
-            x=0.5,
-            y=0.95
-        ),
-        legend=dict(
-            bgcolor='rgba(255,255,255,0.8)',
-            bordercolor='#0d6efd'
-        ),
-        hovermode='x unified'
-    )
-    
-    return fig
+
+def daily_change_pct(indices):
+    # Change since the previous tick for the given tickers, in percent, straight from the history matrix
+    history = st.session_state.game.engine.history
+    if len(history) < 2:
+        return np.zeros(len(indices))
+    previous, current = history.values[-2:, indices]
+    return (current - previous) / previous * 100
+
+# Numeric table columns, formatted by the browser instead of as strings on every rerun
+MONEY_COLUMN = st.column_config.NumberColumn(format="$%.2f")
+CHANGE_COLUMN = st.column_config.NumberColumn(format="%+.2f%%")
+
+def portfolio_risk():
+    # Computed once per trading day (and again after a trade changes the holdings) over the last
+    # REPORT_LOOKBACK ticks only, so a recompute costs the same on day 10 and day 10,000
+    ledger = st.session_state.ledger
+    game = st.session_state.game
+    key = (game.day, tuple(ledger.portfolio.items()))
+    cached = st.session_state.get('risk')
+    if cached is None or cached[0] != key:
+        positions = ledger.positions()
+        index = [ledger.index[symbol] for symbol in positions['symbol']]
+        cached = (key, risk_report(game.engine.history.values, positions['shares'], index, lookback=REPORT_LOOKBACK))
+        st.session_state.risk = cached
+    return cached[1]
+
+def fast_forward(days, until=None):
+    # The whole span runs in one engine call, and the page is rendered once afterwards
+    game = st.session_state.game
+    ledger = st.session_state.ledger
+    store = st.session_state.store
+    played = game.fast_forward(days, until)
+    tick = len(game.engine.history) - sum(len(events) for _, events, _ in played)
+    for day, events, closes in played:
+        # Each skipped day is closed like a played one (see advance_day): its ticks, the fills
+        # they triggered, and one equity curve point at its closing prices
+        tick += len(events)
+        if store is not None:
+            store.log_ticks(game.engine.history, tick)
+        ledger.mark(closes, tick)
+        st.session_state.fill_messages.extend(settle_order_fills(before_day=day))
+        ledger.record(day, game.engine.dates[tick - 1])
+        st.session_state.events_history.extend(events)
+        if store is not None:
+            store.log_day(day, events)
+    st.session_state.day = game.day
+    if store is not None:
+        store.checkpoint(game, game_state())
+    return played
+
+def record_trade(symbol, shares, price):
+    # After a trade went through the ledger: log it to the save, and re-rank the player on the shared leaderboard
+    ledger = st.session_state.ledger
+    if st.session_state.store is not None:
+        st.session_state.store.log_trade(symbol, shares, price, ledger.cash)
+    if st.session_state.market is not None:
+        st.session_state.market.leaderboard.update(st.session_state.account, ledger.cash, ledger.portfolio)
+
+def settle_order_fills(before_day=None):
+    # Orders fill inside the engine's tick; settle this player's fills against their cash and portfolio
+    messages = []
+    ledger = st.session_state.ledger
+    for fill in st.session_state.game.orders.pop_fills(st.session_state.account, before_day):
+        order = fill.order
+        signed = order.shares if order.side == 'buy' else -order.shares
+        if not ledger.trade(order.symbol, signed, fill.price):
+            messages.append(('error', f"{order.kind.title()} {order.side} of {order.shares} {order.symbol} rejected: "
+                                      f"{'insufficient funds' if order.side == 'buy' else 'not enough shares'}"))
+            continue
+        record_trade(order.symbol, signed, fill.price)
+        messages.append(('success', f"{order.kind.title()} order filled: {order.side} {order.shares} {order.symbol} at ${fill.price:.2f}"))
+    return messages
+
+def close_books():
+    # Revalue the ledger only when there's a new tick, settle order fills, then close the books for the day
+    game = st.session_state.game
+    st.session_state.ledger.mark(game.engine.prices, len(game.engine.history))
+    st.session_state.fill_messages.extend(settle_order_fills())
+    st.session_state.ledger.record(game.day, game.engine.dates[-1])
+
+def advance_day():
+    # The save log gets the day's ticks, then the trades of the fills they triggered, then the day
+    # record: the order a resumed game replays them in
+    game = st.session_state.game
+    store = st.session_state.store
+    events = game.advance_day()
+    st.session_state.events_history.extend(events)
+    st.session_state.day = game.day
+    if store is not None:
+        store.log_ticks(game.engine.history)
+    close_books()
+    if store is not None:
+        store.log_day(game.day, events)
+        store.checkpoint(game, game_state())
+
+def start_live_clock():
+    st.session_state.next_tick = time.monotonic() + live_seconds
+
+def refresh_market():
+    # Bring this session up to the current tick; safe to call from every fragment, since each step
+    # only does work when something changed
+    game = st.session_state.game
+    if st.session_state.market is not None:
+        # The shared market moves on without this session; pick up its current day and news.
+        # Checking in keeps the player on the leaderboard (players idle for an hour are taken off)
+        st.session_state.market.join(st.session_state.account)
+        st.session_state.day = st.session_state.market.day
+        st.session_state.events_history = st.session_state.market.events_history
+    elif st.session_state.get('live') and time.monotonic() >= st.session_state.next_tick:
+        # Live mode: one trading day per interval, advanced by whichever fragment runs first
+        start_live_clock()
+        if not game.finished:
+            advance_day()
+
+    close_books()
 
 def main():
     # Initialize game state
     if 'game' not in st.session_state:
-        st.session_state.game = StockMarketGame()
-        st.session_state.cash = 10000
-        st.session_state.portfolio = {}
-        st.session_state.day = 1
-        st.session_state.events_history = []
+        if shared_market_enabled:
+            # Only this player's cash and portfolio belong to the session; prices come from the shared engine.
+            # The player id stays in the URL (?player=<id>), so a reload gets the same account back
+            market = get_shared_market(market_day_seconds)
+            game, store = market.game, None
+            account = st.query_params.get("player") or uuid.uuid4().hex[:12]
+            st.query_params["player"] = account
+            state = {'events_history': market.events_history, 'ledger': market.join(account)}
+            st.session_state.figures = market.figures
+        else:
+            market = None
+            game, state, store = load_or_create_game()
+            if store is not None:
+                st.query_params["game"] = store.game_id
+            account = store.game_id if store is not None else uuid.uuid4().hex[:12]
+            st.session_state.figures = FigureCache()
+        st.session_state.market = market
+        # Orders in the game's book belong to this account
+        st.session_state.account = account
+        st.session_state.game = game
+        st.session_state.store = store
+        # Cash, positions, cost basis and the equity curve
+        st.session_state.ledger = state['ledger']
+        st.session_state.day = game.day
+        st.session_state.events_history = state['events_history']
         st.session_state.selected_stock = list(st.session_state.game.stocks.keys())[0]
         st.session_state.tab = "Dashboard"
-    
+        # Fill notices wait here until the sidebar shows them
+        st.session_state.fill_messages = []
+        st.session_state.next_tick = 0.0
+
+    refresh_market()
+
     # Sidebar for navigation and controls
     with st.sidebar:
         st.title("🚀 Trading Simulator")
-        
-        # Portfolio Value Calculation
-        total_portfolio_value = st.session_state.cash
-        for symbol, shares in st.session_state.portfolio.items():
-            total_portfolio_value += shares * st.session_state.game.stocks[symbol].price
-        
-        # User stats in sidebar
-        st.markdown(f"""
-        <div class="card">
-            <h3>Day {st.session_state.day}</h3>
-            <h2>${total_portfolio_value:.2f}</h2>
-            <p>Cash: ${st.session_state.cash:.2f}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        account_summary()
         
         # Navigation tabs using radio buttons instead of multiple buttons
+        # Everyone in a shared market is ranked on one leaderboard
+        tabs = ["Dashboard", "Portfolio", "Trading"] + (["Leaderboard"] if st.session_state.market is not None else [])
         st.session_state.tab = st.radio(
             "Navigation",
-            ["Dashboard", "Portfolio", "Trading"],
-            index=["Dashboard", "Portfolio", "Trading"].index(st.session_state.tab)
+            tabs,
+            index=tabs.index(st.session_state.tab)
         )
         
         # Stock selector in sidebar
@@ -373,109 +396,235 @@ def main():
         
         # Trading controls in sidebar
         if st.session_state.tab == "Trading":
-            stock = st.session_state.game.stocks[st.session_state.selected_stock]
-            st.markdown(f"### {stock.name} (${stock.price:.2f})")
-            
-            # Buy with slider
-            st.markdown("### Buy Shares")
-            max_shares = int(st.session_state.cash / stock.price)
-            buy_shares = st.slider("Shares to buy", 0, max(1, max_shares), 0)
-            buy_cost = buy_shares * stock.price
-            st.markdown(f"Cost: ${buy_cost:.2f}")
-            
-            if st.button("Execute Buy"):
-                if buy_cost <= st.session_state.cash and buy_shares > 0:
-                    st.session_state.cash -= buy_cost
-                    st.session_state.portfolio[st.session_state.selected_stock] = st.session_state.portfolio.get(st.session_state.selected_stock, 0) + buy_shares
-                    st.success(f"Bought {buy_shares} shares of {st.session_state.selected_stock}")
-                    st.rerun()
-                elif buy_shares > 0:
-                    st.error("Insufficient funds!")
-            
-            # Fix the slider issue in the main function
-            # Sell with slider
-            st.markdown("### Sell Shares")
-            owned_shares = st.session_state.portfolio.get(st.session_state.selected_stock, 0)
-            if owned_shares > 0:
-                sell_shares = st.slider("Shares to sell", 0, owned_shares, 0)
-                sell_revenue = sell_shares * stock.price
-                st.markdown(f"Revenue: ${sell_revenue:.2f}")
-                
-                if st.button("Execute Sell"):
-                    if sell_shares > 0:
-                        st.session_state.cash += sell_revenue
-                        st.session_state.portfolio[st.session_state.selected_stock] -= sell_shares
-                        if st.session_state.portfolio[st.session_state.selected_stock] == 0:
-                            del st.session_state.portfolio[st.session_state.selected_stock]
-                        st.success(f"Sold {sell_shares} shares of {st.session_state.selected_stock}")
-                        st.rerun()
-            else:
-                st.info(f"You don't own any shares of {st.session_state.selected_stock}")
+            trade_ticket()
         
         # Next day button at bottom of sidebar
-        if st.button("⏭️ Next Trading Day"):
-            # Generate 1-3 company-specific events
-            for _ in range(random.randint(1, 3)):
-                try:
-                    event = st.session_state.game.update_prices()
-                    st.session_state.events_history.append(event)
-                except Exception as e:
-                    # Fallback if event generation fails
-                    company = random.choice(list(st.session_state.game.stocks.keys()))
-                    event = f"Market fluctuations affect {st.session_state.game.stocks[company].name}"
-                    st.session_state.events_history.append(event)
-            
-            st.session_state.day += 1
+        if st.session_state.market is not None:
+            st.caption(f"Shared market: next trading day in {st.session_state.market.seconds_until_next_day():.0f}s")
+            if st.button("🔄 Refresh Prices"):
+                st.rerun()
+        elif st.session_state.game.finished:
+            st.button("⏹️ Replay Data Ended", disabled=True)
+        elif st.button("⏭️ Next Trading Day"):
+            advance_day()
             st.rerun()
+
+        # Live mode: prices move on a timer and only the price-dependent fragments refresh
+        st.toggle(
+            "🔴 Live prices" if st.session_state.market is not None else "🔴 Live market",
+            key='live', on_change=start_live_clock,
+            help=f"Refresh prices every {live_seconds:g}s" if st.session_state.market is not None
+                 else f"Advance one trading day every {live_seconds:g}s"
+        )
+
+        # Skip ahead several days at once; only the final state is rendered
+        if st.session_state.market is None:
+            with st.expander("⏩ Fast Forward"):
+                ff_mode = st.radio("Run", ["N days", "Until next milestone", "Until price alert"])
+                ff_days = st.number_input("Days (at most)", min_value=1, max_value=3650, value=30, step=1)
+                until = None
+                if ff_mode == "Until next milestone":
+                    target = min((m for m in MILESTONES if m > st.session_state.ledger.value), default=None)
+                    if target is not None:
+                        ledger = st.session_state.ledger
+                        cash, columns, shares = ledger.cash, ledger.columns.copy(), ledger.shares.copy()
+                        until = lambda closes: cash + closes[:, columns] @ shares >= target
+                        st.caption(f"Stops once your portfolio is worth ${target:,}")
+                elif ff_mode == "Until price alert":
+                    alert_stock = st.session_state.game.stocks[st.session_state.selected_stock]
+                    above = st.radio(f"Stop when {alert_stock.symbol} is", ["Above", "Below"], horizontal=True) == "Above"
+                    alert_price = st.number_input("Alert price", min_value=0.01, value=round(alert_stock.price, 2), step=1.0)
+                    i = st.session_state.game.symbol_index[alert_stock.symbol]
+                    until = (lambda closes: closes[:, i] >= alert_price) if above else (lambda closes: closes[:, i] <= alert_price)
+                if st.button("⏩ Fast Forward"):
+                    played = fast_forward(int(ff_days), until)
+                    stopped = until is not None and len(played) < ff_days
+                    st.session_state.fast_forward_message = (
+                        f"Fast-forwarded {len(played)} days" + (" (stop condition reached)" if stopped else "")
+                    )
+                    st.rerun()
+    
+        if admin_enabled or st.query_params.get("admin") == "1":
+            display_admin_panel()
     
     # Main content area based on selected tab
     if st.session_state.tab == "Dashboard":
-        display_dashboard(total_portfolio_value)
+        display_dashboard()
     elif st.session_state.tab == "Portfolio":
         display_portfolio()
     elif st.session_state.tab == "Trading":
         display_trading()
+    elif st.session_state.tab == "Leaderboard":
+        display_leaderboard()
 
-def display_dashboard(total_portfolio_value):
-    st.title("Market Dashboard")
-    
-    # Recent news at the top
-    st.markdown('<div class="card">', unsafe_allow_html=True)
+@fragment('account', live=True)
+def account_summary():
+    # Portfolio value is kept current by the ledger
+    st.markdown(f"""
+    <div class="card">
+        <h3>Day {st.session_state.day}</h3>
+        <h2>${st.session_state.ledger.value:.2f}</h2>
+        <p>Cash: ${st.session_state.ledger.cash:.2f}</p>
+    </div>
+    """, unsafe_allow_html=True)
+    if st.session_state.game.replay:
+        engine = st.session_state.game.engine
+        st.caption(f"Replaying {engine.date} · {engine.remaining:,} trading days of data left")
+    for level, message in st.session_state.fill_messages:
+        getattr(st, level)(message)
+    st.session_state.fill_messages = []
+    if 'fast_forward_message' in st.session_state:
+        st.info(st.session_state.pop('fast_forward_message'))
+
+@fragment('trade_ticket', live=True)
+def trade_ticket():
+    # Sliders and order fields rerun only the ticket; a trade reruns the page to update balances
+    stock = st.session_state.game.stocks[st.session_state.selected_stock]
+    st.markdown(f"### {stock.name} (${stock.price:.2f})")
+
+    # Buy with slider
+    st.markdown("### Buy Shares")
+    max_shares = int(st.session_state.ledger.cash / stock.price)
+    if st.session_state.get('live'):
+        # A slider's range is part of its identity, so one capped by a live price would reset every tick
+        buy_shares = st.number_input("Shares to buy", min_value=0, value=0, step=1, key="buy_shares_live")
+        st.caption(f"You can afford up to {max_shares} shares")
+    else:
+        buy_shares = st.slider("Shares to buy", 0, max(1, max_shares), 0, key="buy_shares")
+    buy_cost = buy_shares * stock.price
+    st.markdown(f"Cost: ${buy_cost:.2f}")
+
+    if st.button("Execute Buy"):
+        if buy_shares > 0 and st.session_state.ledger.trade(st.session_state.selected_stock, buy_shares, stock.price):
+            record_trade(st.session_state.selected_stock, buy_shares, stock.price)
+            st.success(f"Bought {buy_shares} shares of {st.session_state.selected_stock}")
+            st.rerun()
+        elif buy_shares > 0:
+            st.error("Insufficient funds!")
+
+    # Fix the slider issue in the main function
+    # Sell with slider
+    st.markdown("### Sell Shares")
+    owned_shares = st.session_state.ledger.portfolio.get(st.session_state.selected_stock, 0)
+    if owned_shares > 0:
+        sell_shares = st.slider("Shares to sell", 0, owned_shares, 0, key="sell_shares")
+        sell_revenue = sell_shares * stock.price
+        st.markdown(f"Revenue: ${sell_revenue:.2f}")
+
+        if st.button("Execute Sell"):
+            if sell_shares > 0:
+                st.session_state.ledger.trade(st.session_state.selected_stock, -sell_shares, stock.price)
+                record_trade(st.session_state.selected_stock, -sell_shares, stock.price)
+                st.success(f"Sold {sell_shares} shares of {st.session_state.selected_stock}")
+                st.rerun()
+    else:
+        st.info(f"You don't own any shares of {st.session_state.selected_stock}")
+
+    # Orders that execute later, when a new price reaches the limit or stop
+    st.markdown("### Place Order")
+    order_side = st.radio("Side", ["Buy", "Sell"], horizontal=True)
+    order_type = st.selectbox("Order type", ["Limit", "Stop", "Market"])
+    order_shares = st.number_input("Shares", min_value=1, value=1, step=1)
+    order_price = None
+    if order_type != "Market":
+        order_price = st.number_input(f"{order_type} price", min_value=0.01, value=round(stock.price, 2), step=1.0)
+    order_tif = st.radio("Time in force", ["GTC", "Day"], horizontal=True)
+    if st.button("Place Order"):
+        st.session_state.game.place_order(
+            st.session_state.account, st.session_state.selected_stock, order_side.lower(),
+            order_type.lower(), int(order_shares), order_price, order_tif.lower()
+        )
+        st.rerun()
+
+    open_orders = st.session_state.game.orders.open_orders(st.session_state.account)
+    if open_orders:
+        st.markdown("### Open Orders")
+        for order in open_orders:
+            col1, col2 = st.columns([3, 1])
+            col1.markdown(f"{order.side.title()} {order.shares} {order.symbol} {order.kind} @ ${order.price:.2f} ({order.tif.upper()})")
+            if col2.button("Cancel", key=f"cancel-{order.id}"):
+                st.session_state.game.orders.cancel(order.id)
+                st.rerun(scope="fragment")
+
+@fragment('news', live=True)
+def market_news():
     st.markdown("### 📰 Recent Market News")
     if st.session_state.events_history:
         for event in reversed(st.session_state.events_history[-3:]):
             st.markdown(f"• {event}")
     else:
         st.info("No market news yet. Start trading to see updates!")
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Stock chart
-    st.markdown('<div class="card">', unsafe_allow_html=True)
-    st.plotly_chart(
-        create_stock_chart(st.session_state.game.stocks[st.session_state.selected_stock]), 
-        use_container_width=True
-    )
-    st.markdown('</div>', unsafe_allow_html=True)
-    
+
+@fragment('chart', live=True)
+def stock_chart(details=False):
+    stock = st.session_state.game.stocks[st.session_state.selected_stock]
+    if details:
+        st.markdown(f"### {stock.name} ({stock.symbol})")
+        st.markdown(f"Current Price: ${stock.price:.2f}")
+    render_chart(create_stock_chart(stock))
+
+@fragment('market_table', live=True)
+def market_table():
+    # Create a dataframe of all stocks from the engine's arrays
+    game = st.session_state.game
+    with METRICS.timer('ui.table.market'):
+        change_pct = daily_change_pct(np.arange(len(game.stocks)))
+        df = pd.DataFrame({
+            'Symbol': list(game.stocks),
+            'Name': [stock.name for stock in game.stocks.values()],
+            'Price': game.engine.prices,
+            'Change': change_pct,
+            'Trend': np.where(change_pct >= 0, '📈', '📉')
+        })
+    render_table(df, column_config={'Price': MONEY_COLUMN, 'Change': CHANGE_COLUMN})
+
+@fragment('holdings', live=True)
+def holdings_table():
+    # Positions come straight from the ledger's arrays
+    ledger = st.session_state.ledger
+    positions = ledger.positions()
+    game = st.session_state.game
+    with METRICS.timer('ui.table.positions'):
+        df = pd.DataFrame({
+            'Symbol': positions['symbol'],
+            'Name': [game.stocks[symbol].name for symbol in positions['symbol']],
+            'Shares': positions['shares'],
+            'Price': positions['price'],
+            'Avg Cost': positions['avg_cost'],
+            'Value': positions['value'],
+            'Unrealized P&L': positions['unrealized'],
+            'Change': daily_change_pct([game.symbol_index[symbol] for symbol in positions['symbol']])
+        })
+    render_table(df, column_config={
+        'Price': MONEY_COLUMN, 'Avg Cost': MONEY_COLUMN, 'Value': MONEY_COLUMN,
+        'Unrealized P&L': MONEY_COLUMN, 'Change': CHANGE_COLUMN
+    })
+    st.markdown(f"Unrealized P&L: ${ledger.unrealized:+.2f} · Realized P&L: ${ledger.realized:+.2f}")
+
+@fragment('portfolio_summary', live=True)
+def portfolio_summary():
     # Portfolio summary and milestones
+    total_portfolio_value = st.session_state.ledger.value
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.markdown("### 💰 Portfolio Summary")
-        st.markdown(f"Cash: ${st.session_state.cash:.2f}")
-        
-        # Calculate portfolio value
-        invested_value = total_portfolio_value - st.session_state.cash
-        st.markdown(f"Invested: ${invested_value:.2f}")
+        ledger = st.session_state.ledger
+        st.markdown(f"Cash: ${ledger.cash:.2f}")
+        st.markdown(f"Invested: ${ledger.market_value:.2f}")
         st.markdown(f"Total Value: ${total_portfolio_value:.2f}")
+        st.markdown(f"Unrealized P&L: ${ledger.unrealized:+.2f} · Realized P&L: ${ledger.realized:+.2f}")
         
-        # Simple portfolio performance chart
-        if st.session_state.day > 1:
+        # Portfolio performance from the daily equity curve
+        days, equity = ledger.equity_curve
+        if len(equity) > 1:
             st.markdown("### Portfolio Growth")
-            # This would be better with historical data tracking
-            st.progress(min(1.0, total_portfolio_value / 20000))
-            st.markdown(f"Progress: {total_portfolio_value / 20000 * 100:.1f}% of $20,000 goal")
+            fig = go.Figure(go.Scatter(x=days, y=equity, mode='lines', line=dict(color='#0d6efd', width=2)))
+            fig.update_layout(height=200, margin=dict(t=10, b=0, l=0, r=0), xaxis_title="Day", yaxis_title="Value ($)")
+            render_chart(fig)
+            st.progress(min(1.0, equity[-1] / 20000))
+            st.markdown(f"Progress: {equity[-1] / 20000 * 100:.1f}% of $20,000 goal")
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
@@ -499,6 +648,21 @@ def display_dashboard(total_portfolio_value):
             st.markdown("### 🎉 Congratulations! You've won the game! 🎉")
         st.markdown('</div>', unsafe_allow_html=True)
 
+def display_dashboard():
+    st.title("Market Dashboard")
+    
+    # Recent news at the top
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    market_news()
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Stock chart
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    stock_chart()
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    portfolio_summary()
+
 def display_portfolio():
     st.title("Your Portfolio")
     
@@ -506,34 +670,14 @@ def display_portfolio():
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("### Your Holdings")
     
-    if st.session_state.portfolio:
-        # Create a dataframe for better display
-        portfolio_data = []
-        for symbol, shares in st.session_state.portfolio.items():
-            stock = st.session_state.game.stocks[symbol]
-            value = shares * stock.price
-            
-            # Calculate change if possible
-            change_pct = 0
-            if len(stock.history) > 1:
-                change_pct = (stock.price - stock.history[-2]) / stock.history[-2] * 100
-            
-            portfolio_data.append({
-                'Symbol': symbol,
-                'Name': stock.name,
-                'Shares': shares,
-                'Price': f"${stock.price:.2f}",
-                'Value': f"${value:.2f}",
-                'Change': f"{'+' if change_pct >= 0 else ''}{change_pct:.2f}%"
-            })
-        
-        df = pd.DataFrame(portfolio_data)
-        st.dataframe(df, use_container_width=True)
+    ledger = st.session_state.ledger
+    if ledger.portfolio:
+        holdings_table()
+        positions = ledger.positions()
         
         # Portfolio composition pie chart
-        values = [shares * st.session_state.game.stocks[symbol].price 
-                 for symbol, shares in st.session_state.portfolio.items()]
-        labels = list(st.session_state.portfolio.keys())
+        values = positions['value']
+        labels = positions['symbol']
         
         fig = go.Figure(data=[go.Pie(
             labels=labels, 
@@ -548,7 +692,40 @@ def display_portfolio():
             margin=dict(t=40, b=0, l=0, r=0)
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        render_chart(fig)
+        
+        # Risk analytics over the last REPORT_LOOKBACK ticks, cached until the next tick or trade
+        st.markdown("### Risk")
+        if len(st.session_state.game.engine.history) < 3:
+            st.info("Risk metrics appear after a few trading days.")
+        else:
+            st.caption(f"Over the last {min(len(st.session_state.game.engine.history), REPORT_LOOKBACK):,} ticks")
+            risk = portfolio_risk()
+            summary = risk['portfolio']
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric(f"VaR {risk['level']:.0%} (historical)", f"${summary['var_historical']:.2f}")
+            col2.metric(f"VaR {risk['level']:.0%} (Monte Carlo)", f"${summary['var_monte_carlo']:.2f}")
+            col3.metric("Beta", f"{summary['beta']:.2f}")
+            col4.metric("Max Drawdown", f"{summary['max_drawdown']:.1%}")
+            col1, col2, col3, _ = st.columns(4)
+            col1.metric("Sharpe", f"{summary['sharpe']:.2f}")
+            col2.metric("Sortino", f"{summary['sortino']:.2f}")
+            col3.metric("Volatility", f"{summary['volatility']:.2%}")
+            metrics = risk['positions']
+            render_table(pd.DataFrame({
+                'Symbol': positions['symbol'],
+                'Volatility': metrics['volatility'] * 100,
+                'Beta': metrics['beta'],
+                'Max Drawdown': metrics['max_drawdown'] * 100,
+                'Sharpe': metrics['sharpe'],
+                'Sortino': metrics['sortino']
+            }), column_config={
+                'Volatility': st.column_config.NumberColumn(format="%.2f%%"),
+                'Beta': st.column_config.NumberColumn(format="%.2f"),
+                'Max Drawdown': st.column_config.NumberColumn(format="%.1f%%"),
+                'Sharpe': st.column_config.NumberColumn(format="%.2f"),
+                'Sortino': st.column_config.NumberColumn(format="%.2f")
+            })
     else:
         st.info("🔍 No stocks owned yet! Head to the Trading tab to start investing.")
     
@@ -560,39 +737,12 @@ def display_trading():
     # Market overview with all stocks
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("### Market Overview")
-    
-    # Create a dataframe of all stocks
-    market_data = []
-    for symbol, stock in st.session_state.game.stocks.items():
-        # Calculate change if possible
-        change_pct = 0
-        if len(stock.history) > 1:
-            change_pct = (stock.price - stock.history[-2]) / stock.history[-2] * 100
-        
-        market_data.append({
-            'Symbol': symbol,
-            'Name': stock.name,
-            'Price': f"${stock.price:.2f}",
-            'Change': f"{'+' if change_pct >= 0 else ''}{change_pct:.2f}%",
-            'Trend': '📈' if change_pct >= 0 else '📉'
-        })
-    
-    df = pd.DataFrame(market_data)
-    st.dataframe(df, use_container_width=True)
+    market_table()
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Selected stock details and chart
-    stock = st.session_state.game.stocks[st.session_state.selected_stock]
-    
     st.markdown('<div class="card">', unsafe_allow_html=True)
-    st.markdown(f"### {stock.name} ({st.session_state.selected_stock})")
-    st.markdown(f"Current Price: ${stock.price:.2f}")
-    
-    # Show stock chart
-    st.plotly_chart(
-        create_stock_chart(stock),
-        use_container_width=True
-    )
+    stock_chart(details=True)
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Trading instructions
@@ -602,9 +752,89 @@ def display_trading():
     1. Select a stock from the sidebar dropdown
     2. Use the sliders in the sidebar to set buy/sell quantities
     3. Click Execute Buy/Sell to complete your trade
-    4. Click Next Trading Day to advance time and see market changes
+    4. Or place a limit/stop order; it fills when a new price reaches it (Day orders expire at the end of the day)
+    5. Click Next Trading Day to advance time and see market changes, or use Fast Forward to skip ahead
     """)
     st.markdown('</div>', unsafe_allow_html=True)
 
+RANKINGS = {"Portfolio value": 'value', "Return": 'return', "Milestones": 'milestone'}
+
+@fragment('leaderboard', live=True)
+def leaderboard_table(by):
+    # Rank and top-100 queries read the order-statistics index; nothing is sorted here
+    board = st.session_state.market.leaderboard
+    me = board.standing(st.session_state.account, by)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Your rank", f"#{me['rank']:,} of {len(board):,}")
+    col2.metric("Portfolio value", f"${me['value']:,.2f}")
+    col3.metric("Return", f"{me['return']:+.1%}")
+    with METRICS.timer('ui.table.leaderboard'):
+        rows = board.top(100, by)
+        df = pd.DataFrame({
+            'Rank': [row['rank'] for row in rows],
+            'Player': [row['name'] + (" (you)" if row['player'] == st.session_state.account else "") for row in rows],
+            'Value': [row['value'] for row in rows],
+            'Return': [row['return'] * 100 for row in rows],
+            'Milestone': [row['milestone'] or "" for row in rows],
+            'Reached on day': [row['milestone_day'] for row in rows],
+        })
+    render_table(df, column_config={'Value': MONEY_COLUMN, 'Return': CHANGE_COLUMN})
+
+def display_leaderboard():
+    st.title("Leaderboard")
+    board = st.session_state.market.leaderboard
+    name = st.text_input("Your name", board.standing(st.session_state.account)['name'], max_chars=30)
+    if name:
+        board.rename(st.session_state.account, name)
+    by = st.radio("Rank by", list(RANKINGS), horizontal=True)
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    leaderboard_table(RANKINGS[by])
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def display_admin_panel():
+    # Where reruns spend their time; shown only with ?admin=1 or admin = true in secrets.toml
+    with st.expander("🛠️ Performance"):
+        snapshot = METRICS.snapshot()
+        if snapshot['timings']:
+            timings = pd.DataFrame(snapshot['timings']).T
+            timings[['sum', 'mean', 'max', 'p50', 'p95', 'p99']] *= 1000
+            timings = timings.rename(columns=lambda c: c if c == 'count' else f"{c} ms")
+            render_table(timings, column_config={c: st.column_config.NumberColumn(format="%.2f")
+                                                 for c in timings.columns if c != 'count'})
+        figures = st.session_state.figures
+        counters = dict(snapshot['counters'], **{'charts.cache_hits': figures.hits, 'charts.cache_misses': figures.misses})
+        feed = st.session_state.game.event_feed
+        if feed is not None:
+            counters.update({f'events.feed_{name}': value for name, value in feed.stats().items()})
+        st.json(counters)
+
+        if st.button("Profile next rerun"):
+            st.session_state.profile_next_rerun = True
+            st.rerun()
+        if st.session_state.get('last_profile'):
+            st.code(st.session_state.last_profile)
+        st.download_button("Export JSON", METRICS.to_json(), "metrics.json", "application/json")
+        st.download_button("Export Prometheus", METRICS.to_prometheus(), "metrics.prom", "text/plain")
+        if st.button("Reset metrics"):
+            METRICS.reset()
+            st.rerun()
+
+def run():
+    # Time every rerun, and capture a profile of it when the admin panel asked for one
+    if metrics_port:
+        start_metrics_server(metrics_port)
+    if not st.session_state.get('profile_next_rerun'):
+        with METRICS.timer('ui.rerun'):
+            main()
+        return
+    st.session_state.profile_next_rerun = False
+    capture = None
+    try:
+        with profile() as capture, METRICS.timer('ui.rerun'):
+            main()
+    finally:
+        if capture is not None:
+            st.session_state.last_profile = f"{capture.engine}\n{capture.text}"
+
 if __name__ == "__main__":
-    main()
+    run()
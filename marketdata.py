@@ -0,0 +1,329 @@
+"""Daily OHLCV market data in a memory-mapped columnar format, and a replay engine over it.
+
+    python marketdata.py import prices/ --out data/market --info companies.csv
+    python marketdata.py info data/market
+
+A dataset is a directory with one (days x tickers) .npy matrix per field (open,
+high, low, close, volume), a shared dates.npy axis and meta.json holding the
+ticker index (symbols in column order, plus optional names and sectors). Days are
+rows, so one tick of a replay reads a single contiguous row. Missing bars (before
+a listing, after a delisting, holidays of one exchange) are NaN. Opening a
+dataset memory-maps the files: nothing is read until a row is touched, so 5,000
+tickers x 20 years opens instantly and costs only the pages actually replayed.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from engine import MarketEngine
+from history import HistoryStore
+from models import make_model
+from profiling import timed
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+FORMAT_VERSION = 1
+DEFAULT_DATA_DIR = os.path.join('data', 'market')
+
+# Column names accepted in CSV files, lowercased
+DATE_COLUMNS = ('date', 'datetime', 'timestamp', 'time')
+SYMBOL_COLUMNS = ('symbol', 'ticker')
+
+
+class MarketData:
+    """A read-only dataset written by `import_csv` (or `create`)."""
+
+    def __init__(self, path, mmap_mode='r'):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported market data version {meta.get('version')} in {path}")
+        self.symbols = meta['symbols']
+        self.names = meta.get('names', {})
+        self.sectors = meta.get('sectors', {})
+        # Ticker index: symbol -> column of every field matrix
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.dates = np.load(os.path.join(path, 'dates.npy'), mmap_mode=mmap_mode)
+        self.fields = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in FIELDS}
+
+    @classmethod
+    def create(cls, path, dates, symbols, names=None, sectors=None, dtype='float32'):
+        # Allocate an empty (all NaN) dataset on disk; fill `fields` and call flush()
+        os.makedirs(path, exist_ok=True)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        np.save(os.path.join(path, 'dates.npy'), dates)
+        for name in FIELDS:
+            matrix = np.lib.format.open_memmap(os.path.join(path, f'{name}.npy'), mode='w+', dtype=dtype,
+                                               shape=(len(dates), len(symbols)))
+            matrix[:] = np.nan
+            matrix.flush()
+            del matrix
+        meta = {'version': FORMAT_VERSION, 'symbols': list(symbols), 'names': names or {}, 'sectors': sectors or {}}
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        return cls(path, mmap_mode='r+')
+
+    def flush(self):
+        for matrix in self.fields.values():
+            if isinstance(matrix, np.memmap):
+                matrix.flush()
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getattr__(self, name):
+        # data.close, data.volume, ...
+        if name in FIELDS:
+            return self.fields[name]
+        raise AttributeError(name)
+
+    @property
+    def nbytes(self):
+        return sum(matrix.nbytes for matrix in self.fields.values()) + self.dates.nbytes
+
+    def name(self, symbol):
+        return self.names.get(symbol, symbol)
+
+    def columns(self, symbols):
+        return np.array([self.index[symbol] for symbol in symbols], dtype=np.intp)
+
+    def seek(self, date):
+        """Row of the first trading day on or after `date` (anything np.datetime64 accepts)."""
+        row = int(np.searchsorted(self.dates, np.datetime64(date, 'D')))
+        if row >= len(self.dates):
+            raise ValueError(f"No data on or after {date}; the dataset ends on {self.dates[-1]}")
+        return row
+
+    def listed(self, row):
+        # Symbols with a close on that row
+        return [self.symbols[i] for i in np.flatnonzero(np.isfinite(self.close[row]))]
+
+    def bars(self, start, stop, symbols=None):
+        # OHLCV rows [start, stop) as a dict of (days x tickers) float64 arrays
+        columns = slice(None) if symbols is None else self.columns(symbols)
+        return {name: np.asarray(matrix[start:stop, columns], dtype=np.float64) for name, matrix in self.fields.items()}
+
+
+# --- import ------------------------------------------------------------------------
+
+def _find_column(columns, candidates, what, path):
+    lower = {c.lower().strip(): c for c in columns}
+    for candidate in candidates:
+        if candidate in lower:
+            return lower[candidate]
+    raise ValueError(f"{path} has no {what} column (looked for {', '.join(candidates)})")
+
+
+def _csv_files(sources):
+    for source in sources:
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                if name.lower().endswith(('.csv', '.csv.gz')):
+                    yield os.path.join(source, name)
+        else:
+            yield source
+
+
+def _symbol_from_path(path):
+    name = os.path.basename(path)
+    for suffix in ('.gz', '.csv'):
+        if name.lower().endswith(suffix):
+            name = name[:-len(suffix)]
+    return name.upper()
+
+
+def _read_frames(path, adjusted=False):
+    # Yields (symbol, frame with a date index and FIELDS columns) for one CSV file, which
+    # holds either one ticker (named after the file) or many in a long symbol/date/... layout
+    df = pd.read_csv(path)
+    date_column = _find_column(df.columns, DATE_COLUMNS, 'date', path)
+    try:
+        symbol_column = _find_column(df.columns, SYMBOL_COLUMNS, 'symbol', path)
+    except ValueError:
+        symbol_column = None
+    renames = {}
+    for name in FIELDS:
+        candidates = ('adj close', 'adj_close', 'adjclose', name) if name == 'close' and adjusted else (name,)
+        renames[_find_column(df.columns, candidates, name, path)] = name
+    df = df.rename(columns=renames)
+    df['date'] = pd.to_datetime(df[date_column], utc=True).dt.tz_localize(None).dt.normalize()
+    if symbol_column is None:
+        yield _symbol_from_path(path), df.set_index('date')[list(FIELDS)]
+        return
+    for symbol, group in df.groupby(df[symbol_column].astype(str).str.upper(), sort=False):
+        yield symbol, group.set_index('date')[list(FIELDS)]
+
+
+def import_csv(sources, out=DEFAULT_DATA_DIR, info=None, adjusted=False, dtype='float32', chunk_size=256):
+    """Import daily OHLCV CSV files (or directories of them) into a dataset at `out`.
+
+    Each file holds one ticker named after the file (Date, Open, High, Low, Close,
+    Volume, as exported by most data vendors) or many tickers with a Symbol/Ticker
+    column. `info` is an optional CSV with symbol, name and sector columns.
+    `adjusted` takes the close from an "Adj Close" column. The first pass collects
+    dates and symbols; the second writes `chunk_size` tickers at a time, so memory
+    use stays flat however large the universe is. Returns the opened MarketData.
+    """
+    paths = list(_csv_files(sources))
+    if not paths:
+        raise ValueError("No CSV files to import")
+
+    dates = set()
+    symbols = {}
+    for path in paths:
+        for symbol, frame in _read_frames(path, adjusted):
+            dates.update(frame.index.values.astype('datetime64[D]'))
+            symbols.setdefault(symbol, []).append(path)
+    dates = np.array(sorted(dates), dtype='datetime64[D]')
+    order = sorted(symbols)
+
+    names, sectors = {}, {}
+    if info:
+        table = pd.read_csv(info)
+        table.columns = [c.lower().strip() for c in table.columns]
+        symbol_column = _find_column(table.columns, SYMBOL_COLUMNS, 'symbol', info)
+        for row in table.to_dict('records'):
+            symbol = str(row[symbol_column]).upper()
+            if symbol not in symbols:
+                continue
+            if isinstance(row.get('name'), str):
+                names[symbol] = row['name']
+            if isinstance(row.get('sector'), str):
+                sectors[symbol] = row['sector']
+
+    data = MarketData.create(out, dates, order, names, sectors, dtype)
+    for start in range(0, len(order), chunk_size):
+        chunk = order[start:start + chunk_size]
+        block = {name: np.full((len(dates), len(chunk)), np.nan, dtype=dtype) for name in FIELDS}
+        wanted = {symbol: i for i, symbol in enumerate(chunk)}
+        for path in dict.fromkeys(p for symbol in chunk for p in symbols[symbol]):
+            for symbol, frame in _read_frames(path, adjusted):
+                if symbol not in wanted:
+                    continue
+                frame = frame[~frame.index.duplicated(keep='last')]
+                rows = np.searchsorted(dates, frame.index.values.astype('datetime64[D]'))
+                column = wanted[symbol]
+                for name in FIELDS:
+                    block[name][rows, column] = frame[name].to_numpy(dtype=np.float64)
+        for name in FIELDS:
+            data.fields[name][:, start:start + len(chunk)] = block[name]
+    data.flush()
+    return MarketData(out)
+
+
+# --- replay --------------------------------------------------------------------------
+
+class ReplayEngine(MarketEngine):
+    """A MarketEngine that plays recorded daily closes back instead of simulating prices.
+
+    Each tick is the next trading day of the dataset; event impacts are ignored, since
+    the recorded prices already contain whatever happened. The history starts with up
+    to `lookback` days before `start`, so charts and indicators have context from the
+    first day. Tickers without a bar on some day keep their last price. The replay
+    position follows the history's last date, so a resumed save continues where it was.
+    """
+
+    def __init__(self, data, symbols, start, lookback=0, seed=None):
+        self.data = data
+        self.symbols = list(symbols)
+        self.columns = data.columns(self.symbols)
+        if self.symbols == data.symbols:
+            # The whole universe: rows are read as contiguous slices instead of gathered
+            self.columns = slice(None)
+        row = data.seek(start)
+        first = max(0, row - lookback)
+        closes = np.asarray(data.close[first:row + 1, self.columns], dtype=np.float64)
+        if np.isnan(closes).any():
+            closes = pd.DataFrame(closes).ffill().bfill().to_numpy()
+        if np.isnan(closes[-1]).any():
+            missing = [s for s, price in zip(self.symbols, closes[-1]) if np.isnan(price)]
+            raise ValueError(f"No prices on or before {data.dates[row]} for {', '.join(missing[:5])}")
+
+        # Volatility and trend of the lookback period, for display and for saved games
+        returns = closes[1:] / closes[:-1] - 1.0
+        self.prices = closes[-1].copy()
+        self.volatility = returns.std(axis=0) if len(returns) > 1 else np.zeros(len(self.symbols))
+        self.trend = returns.mean(axis=0) if len(returns) else np.zeros(len(self.symbols))
+        self.rng = np.random.default_rng(seed)
+        self.model = make_model(None)
+        self.factors = None
+        self.season = 0
+        self._pending = None
+        self._next = 0
+
+        self.history = HistoryStore(len(self.symbols), capacity=len(closes) + 256)
+        self.history.extend(closes, data.dates[first:row + 1])
+
+    @property
+    def row(self):
+        # Dataset row of the last played day
+        return int(np.searchsorted(self.data.dates, self.history.dates[-1].astype('datetime64[D]'), side='right')) - 1
+
+    @property
+    def date(self):
+        return self.data.dates[self.row]
+
+    @property
+    def remaining(self):
+        return len(self.data) - 1 - self.row
+
+    def bar(self):
+        # Today's open/high/low/close/volume per ticker
+        row = self.row
+        return {name: values[0] for name, values in self.data.bars(row, row + 1, self.symbols).items()}
+
+    def _rows(self, ticks):
+        start = self.row + 1
+        closes = np.asarray(self.data.close[start:start + ticks, self.columns], dtype=np.float64)
+        if np.isnan(closes).any():
+            # Carry the last price through missing bars
+            closes = pd.DataFrame(np.vstack([self.prices, closes])).ffill().to_numpy()[1:]
+        return closes, self.data.dates[start:start + len(closes)]
+
+    @timed('engine.step')
+    def step(self, event_impact=0.0):
+        if not self.remaining:
+            raise EOFError(f"The replay data ends on {self.date}")
+        closes, dates = self._rows(1)
+        self.prices[:] = closes[0]
+        self.history.append(self.prices, dates[0])
+        return self.prices
+
+    @timed('engine.advance')
+    def advance(self, event_impacts, keep=None):
+        # Up to one day per row of `event_impacts`, fewer if the data runs out
+        rows, dates = self._rows(len(event_impacts))
+        count = len(rows) if keep is None else int(keep(rows))
+        rows = rows[:count]
+        if count:
+            self.prices[:] = rows[-1]
+            self.history.extend(rows, dates[:count])
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import and inspect OHLCV data for replay games.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    importer = commands.add_parser('import', help="import CSV files into a dataset")
+    importer.add_argument('sources', nargs='+', help="CSV files or directories of them")
+    importer.add_argument('--out', default=DEFAULT_DATA_DIR)
+    importer.add_argument('--info', help="CSV with symbol, name and sector columns")
+    importer.add_argument('--adjusted', action='store_true', help="use the Adj Close column as the close")
+    importer.add_argument('--dtype', choices=['float32', 'float64'], default='float32')
+    info = commands.add_parser('info', help="summarize a dataset")
+    info.add_argument('path', nargs='?', default=DEFAULT_DATA_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        data = import_csv(args.sources, args.out, args.info, args.adjusted, args.dtype)
+    else:
+        data = MarketData(args.path)
+    print(f"{data.path}: {len(data.symbols)} tickers x {len(data)} days "
+          f"({data.dates[0]} to {data.dates[-1]}), {data.nbytes / 1e6:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the NumPy path below is used instead
+    njit = None
+
+
+class PriceModel:
+    """Turns per-ticker trend/volatility into daily growth factors (new price = old price * growth).
+
+    `paths` draws `horizon` ticks for the whole universe in one call and returns a
+    (horizon, n) array; the engine can buffer these to pre-simulate a season.
+    News events are applied afterwards with `apply_event`.
+    """
+
+    name = 'base'
+
+    def paths(self, rng, trend, volatility, horizon):
+        raise NotImplementedError
+
+    def apply_event(self, growth, event_impact):
+        return growth * (1.0 + event_impact)
+
+    def simulate_prices(self, rng, prices, trend, volatility, horizon):
+        # Price paths (horizon + 1, n) starting at `prices`, events excluded
+        growth = self.paths(rng, trend, volatility, horizon)
+        return np.vstack([prices, prices * np.cumprod(growth, axis=0)])
+
+
+class UniformModel(PriceModel):
+    # The original game model: trend * U(0.8, 1.2) + U(-volatility, volatility) + U(-0.02, 0.02)
+    name = 'uniform'
+
+    def __init__(self, market_sentiment=0.02):
+        # Half-width of the independent per-ticker sentiment term; 0 when a factor model supplies it
+        self.market_sentiment = market_sentiment
+
+    def paths(self, rng, trend, volatility, horizon):
+        if not self.market_sentiment:
+            draws = rng.random((2, horizon, len(trend)))
+            return 1.0 + trend * (0.8 + 0.4 * draws[0]) + volatility * (2.0 * draws[1] - 1.0)
+        draws = rng.random((3, horizon, len(trend)))
+        return (1.0 + trend * (0.8 + 0.4 * draws[0])
+                + volatility * (2.0 * draws[1] - 1.0)
+                + self.market_sentiment * (2.0 * draws[2] - 1.0))
+
+    def apply_event(self, growth, event_impact):
+        # Events were always added to the return, not compounded
+        return growth + event_impact
+
+
+class GBMModel(PriceModel):
+    # Geometric Brownian motion with drift `trend` and daily volatility `volatility`
+    name = 'gbm'
+
+    def paths(self, rng, trend, volatility, horizon):
+        z = rng.standard_normal((horizon, len(trend)))
+        return np.exp(trend - 0.5 * volatility ** 2 + volatility * z)
+
+
+class JumpDiffusionModel(GBMModel):
+    """Merton jump-diffusion: GBM plus Poisson jumps with normally distributed log sizes.
+
+    Random jumps arrive `intensity` times per tick on average; news events are
+    additional, known jumps of size log(1 + impact) applied through `apply_event`.
+    """
+
+    name = 'jump'
+
+    def __init__(self, intensity=0.02, jump_mean=-0.02, jump_std=0.08):
+        self.intensity = intensity
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+
+    def paths(self, rng, trend, volatility, horizon):
+        shape = (horizon, len(trend))
+        # Compensate the drift so jumps don't change the expected return
+        k = np.exp(self.jump_mean + 0.5 * self.jump_std ** 2) - 1.0
+        drift = trend - 0.5 * volatility ** 2 - self.intensity * k
+        diffusion = volatility * rng.standard_normal(shape)
+        counts = rng.poisson(self.intensity, shape)
+        # Sum of `counts` normal jumps is normal with scaled mean and variance
+        jumps = counts * self.jump_mean + np.sqrt(counts) * self.jump_std * rng.standard_normal(shape)
+        return np.exp(drift + diffusion + jumps)
+
+
+def _garch_recursion(z, omega, alpha, beta, variance, shock):
+    # Sequential in time, vectorized across tickers
+    out = np.empty_like(z)
+    for t in range(z.shape[0]):
+        variance = omega + alpha * shock ** 2 + beta * variance
+        shock = np.sqrt(variance) * z[t]
+        out[t] = shock
+    return out, variance, shock
+
+
+def _garch_recursion_loops(z, omega, alpha, beta, variance, shock):
+    # Scalar loops for numba to compile
+    horizon, n = z.shape
+    out = np.empty_like(z)
+    variance = variance.copy()
+    shock = shock.copy()
+    for t in range(horizon):
+        for i in range(n):
+            variance[i] = omega[i] + alpha * shock[i] ** 2 + beta * variance[i]
+            shock[i] = np.sqrt(variance[i]) * z[t, i]
+            out[t, i] = shock[i]
+    return out, variance, shock
+
+
+if njit is not None:
+    _garch_compiled = njit(cache=True)(_garch_recursion_loops)
+else:
+    _garch_compiled = None
+
+
+class GarchModel(PriceModel):
+    """GARCH(1,1) volatility clustering around each stock's `volatility`.
+
+    The conditional variance follows omega + alpha * shock^2 + beta * variance, with
+    omega chosen so the long-run daily volatility equals the stock's `volatility`.
+    State carries over between calls, so pre-simulated horizons continue seamlessly.
+    """
+
+    name = 'garch'
+
+    def __init__(self, alpha=0.08, beta=0.9):
+        if alpha + beta >= 1:
+            raise ValueError("GARCH(1,1) needs alpha + beta < 1 to be stationary")
+        self.alpha = alpha
+        self.beta = beta
+        self.variance = None
+        self.shock = None
+
+    def paths(self, rng, trend, volatility, horizon):
+        n = len(trend)
+        long_run = volatility ** 2
+        if self.variance is None or len(self.variance) != n:
+            self.variance = long_run.copy()
+            self.shock = np.zeros(n)
+        omega = long_run * (1.0 - self.alpha - self.beta)
+        z = rng.standard_normal((horizon, n))
+
+        recursion = _garch_compiled if _garch_compiled is not None else _garch_recursion
+        shocks, self.variance, self.shock = recursion(z, omega, self.alpha, self.beta, self.variance, self.shock)
+        return np.exp(trend - 0.5 * long_run + shocks)
+
+
+MODELS = {
+    'uniform': UniformModel,
+    'gbm': GBMModel,
+    'jump': JumpDiffusionModel,
+    'garch': GarchModel,
+}
+
+
+def make_model(model):
+    # Accepts a model instance, a registered name, or None for the original uniform model
+    if model is None:
+        return UniformModel()
+    if isinstance(model, str):
+        if model not in MODELS:
+            raise ValueError(f"Unknown price model {model!r}; choose from {sorted(MODELS)}")
+        return MODELS[model]()
+    return model
@@ -0,0 +1,84 @@
+"""Monte Carlo runner: spreads thousands of seeded games across a process pool.
+
+    python montecarlo.py --games 10000 --days 365 --strategy random --workers 8
+
+Each game's seed comes from one SeedSequence, not from the worker that plays it,
+so results are identical for any worker count or chunk size.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from game import MILESTONES
+from models import MODELS
+from simulation import Simulation, STRATEGIES, write_results
+
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+def _run_chunk(games, days, strategy, seed, model, game_ids):
+    return Simulation(games, days, strategy, seed, model).run(game_ids=game_ids)
+
+
+def run_monte_carlo(games=1000, days=365, strategy='buy_and_hold', seed=0, workers=None, chunk_size=None,
+                    model='uniform'):
+    """Play `games` games in parallel and return the per-game summary, ordered by game id."""
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker keeps the pool busy when some games run longer than others
+    chunk_size = chunk_size or max(1, games // (workers * 4))
+    chunks = [list(range(start, min(start + chunk_size, games))) for start in range(0, games, chunk_size)]
+
+    if workers == 1:
+        frames = [_run_chunk(games, days, strategy, seed, model, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(_run_chunk, *zip(*[(games, days, strategy, seed, model, chunk) for chunk in chunks])))
+    return pd.concat(frames, ignore_index=True).sort_values('game', ignore_index=True)
+
+
+def aggregate(summary):
+    """Distribution of final value, drawdown and days-to-milestone across games."""
+    rows = {
+        'final_value': summary['final_value'],
+        'max_drawdown': summary['max_drawdown'],
+    }
+    for milestone in MILESTONES:
+        rows[f'day_to_{milestone}'] = summary[f'day_to_{milestone}']
+
+    table = pd.DataFrame({name: values.quantile(QUANTILES) for name, values in rows.items()}).T
+    table.columns = [f'p{int(q * 100)}' for q in QUANTILES]
+    table.insert(0, 'mean', [values.mean() for values in rows.values()])
+    # Share of games in which each metric exists (i.e. the milestone was reached)
+    table.insert(0, 'reached', [values.notna().mean() for values in rows.values()])
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Monte Carlo Stock Game simulations on a process pool.")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), default='buy_and_hold')
+    parser.add_argument('--model', choices=sorted(MODELS), default='uniform', help="price model")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument('--out', help="optional per-game summary (.csv or .parquet)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summary = run_monte_carlo(args.games, args.days, args.strategy, args.seed, args.workers, model=args.model)
+    elapsed = time.perf_counter() - start
+
+    if args.out:
+        write_results(summary, args.out)
+    workers = args.workers or os.cpu_count()
+    print(f"{args.games} games x {args.days} days on {workers} workers in {elapsed:.1f}s "
+          f"({args.games / elapsed:.1f} games/s)")
+    with pd.option_context('display.float_format', '{:,.2f}'.format, 'display.width', 120):
+        print(aggregate(summary).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from profiling import timed
+
+SIDES = ('buy', 'sell')
+KINDS = ('market', 'limit', 'stop')
+TIME_IN_FORCE = ('day', 'gtc')
+
+
+@dataclass
+class Order:
+    id: int
+    account: str
+    symbol: str
+    side: str              # 'buy' or 'sell'
+    kind: str              # 'market', 'limit' or 'stop'
+    shares: int
+    price: Optional[float] = None   # limit or stop price
+    tif: str = 'gtc'       # 'day' orders expire at the end of the trading day
+    day: int = 0           # day the order was placed
+    status: str = 'open'   # 'open', 'filled', 'cancelled' or 'expired'
+
+
+@dataclass
+class Fill:
+    order: Order
+    price: float
+    day: int
+
+
+class OrderBook:
+    """Resting limit and stop orders for every ticker, matched against each new price tick.
+
+    Each ticker has four heaps (buy limits, sell limits, buy stops, sell stops) ordered
+    so the order that triggers first is on top. The top trigger price of every heap is
+    mirrored in a NumPy array, so one vectorized comparison with the tick's prices
+    finds the tickers that have anything to fill. Only those heaps are popped.
+    Cancelled orders are removed lazily when they reach the top of a heap.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self._heaps = {key: [[] for _ in range(n)] for key in ('buy_limit', 'sell_limit', 'buy_stop', 'sell_stop')}
+        # Best trigger price per ticker; +/-inf when nothing is resting on that side
+        self._best = {
+            'buy_limit': np.full(n, -np.inf),   # fills when price <= best
+            'sell_limit': np.full(n, np.inf),   # fills when price >= best
+            'buy_stop': np.full(n, np.inf),     # triggers when price >= best
+            'sell_stop': np.full(n, -np.inf),   # triggers when price <= best
+        }
+        self.orders = {}
+        self.fills = {}   # account -> fills not yet picked up
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # Heap keys: smallest first, so negate where the highest price should come out first
+    @staticmethod
+    def _heap_key(book, price):
+        return -price if book in ('buy_limit', 'sell_stop') else price
+
+    def place(self, account, symbol, side, kind, shares, price=None, tif='gtc', day=0, current_price=None):
+        if side not in SIDES or kind not in KINDS or tif not in TIME_IN_FORCE:
+            raise ValueError(f"Invalid order: {side} {kind} {tif}")
+        if shares <= 0:
+            raise ValueError("Order size must be positive")
+        if kind != 'market' and (price is None or price <= 0):
+            raise ValueError(f"A {kind} order needs a positive price")
+
+        with self._lock:
+            order = Order(next(self._ids), account, symbol, side, kind, int(shares), price, tif, day)
+            self.orders[order.id] = order
+            if kind == 'market':
+                # Market orders don't rest; they fill at the current price right away
+                self._fill(order, current_price, day)
+                return order
+            book = f'{side}_{kind}'
+            i = self.index[symbol]
+            heapq.heappush(self._heaps[book][i], (self._heap_key(book, price), order.id))
+            self._refresh(book, i)
+            return order
+
+    def cancel(self, order_id, status='cancelled'):
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None or order.status != 'open':
+                return False
+            order.status = status
+            del self.orders[order_id]
+            book = f'{order.side}_{order.kind}'
+            self._refresh(book, self.index[order.symbol])
+            return True
+
+    def expire_day_orders(self):
+        # Called at the end of each trading day; the list is taken under the lock, since
+        # sessions place and cancel orders from other threads
+        with self._lock:
+            expiring = [o.id for o in self.orders.values() if o.tif == 'day']
+        for order_id in expiring:
+            self.cancel(order_id, status='expired')
+
+    def open_orders(self, account=None):
+        with self._lock:
+            orders = list(self.orders.values())
+        return [o for o in orders if account is None or o.account == account]
+
+    def pop_fills(self, account, before_day=None):
+        # Fills not yet picked up; with `before_day`, only those of earlier days
+        with self._lock:
+            fills = self.fills.pop(account, [])
+            if before_day is not None:
+                later = [fill for fill in fills if fill.day >= before_day]
+                if later:
+                    self.fills[account] = later
+                fills = [fill for fill in fills if fill.day < before_day]
+            return fills
+
+    def _refresh(self, book, i):
+        # Drop cancelled orders from the top, then mirror the top price in the best array
+        heap = self._heaps[book][i]
+        while heap and heap[0][1] not in self.orders:
+            heapq.heappop(heap)
+        if heap:
+            key = heap[0][0]
+            self._best[book][i] = -key if book in ('buy_limit', 'sell_stop') else key
+        else:
+            self._best[book][i] = -np.inf if book in ('buy_limit', 'sell_stop') else np.inf
+
+    def _fill(self, order, price, day):
+        order.status = 'filled'
+        self.orders.pop(order.id, None)
+        fill = Fill(order, float(price), day)
+        self.fills.setdefault(order.account, []).append(fill)
+        return fill
+
+    @timed('orders.match')
+    def match(self, prices, day=0):
+        """Fill every resting order triggered by `prices` (one per ticker). Returns the fills."""
+        best = self._best
+        triggered = {
+            'buy_limit': prices <= best['buy_limit'],
+            'sell_limit': prices >= best['sell_limit'],
+            'buy_stop': prices >= best['buy_stop'],
+            'sell_stop': prices <= best['sell_stop'],
+        }
+        fills = []
+        with self._lock:
+            for book, mask in triggered.items():
+                for i in np.flatnonzero(mask):
+                    heap = self._heaps[book][i]
+                    price = prices[i]
+                    while heap:
+                        key, order_id = heap[0]
+                        limit = -key if book in ('buy_limit', 'sell_stop') else key
+                        still = {
+                            'buy_limit': price <= limit,
+                            'sell_limit': price >= limit,
+                            'buy_stop': price >= limit,
+                            'sell_stop': price <= limit,
+                        }[book]
+                        if not still:
+                            break
+                        heapq.heappop(heap)
+                        order = self.orders.get(order_id)
+                        if order is not None:
+                            # Limits fill at the tick price (never worse than the limit); triggered stops fill as market orders
+                            fills.append(self._fill(order, price, day))
+                    self._refresh(book, i)
+        return fills
+
+    def __len__(self):
+        return len(self.orders)
+
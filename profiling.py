@@ -0,0 +1,216 @@
+"""Lightweight timing and counters for the hot paths, with JSON and Prometheus text export.
+
+    from profiling import METRICS, timed
+
+    @timed('charts.build')
+    def build_stock_chart(...): ...
+
+    with METRICS.timer('ui.rerun'):
+        ...
+
+Timings go into histograms (Prometheus-style cumulative buckets plus a window of
+recent samples for p50/p95/p99). `profile()` captures one block with cProfile, or
+pyinstrument when it is installed. `serve(port)` exposes /metrics and /metrics.json
+over HTTP for local scraping.
+"""
+import bisect
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+try:
+    from pyinstrument import Profiler as _Pyinstrument
+except ImportError:  # pyinstrument is optional; cProfile is used instead
+    _Pyinstrument = None
+
+# Upper bounds in seconds, like Prometheus' default latency buckets
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PERCENTILES = (50, 95, 99)
+PREFIX = 'stockgame'
+
+
+class Histogram:
+    # Count, sum, cumulative-bucket counts and the last `window` samples (for percentiles)
+    def __init__(self, window=1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)   # the last one is +Inf
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+    def summary(self):
+        row = {'count': self.count, 'sum': self.total, 'mean': self.total / self.count if self.count else 0.0,
+               'max': self.max}
+        values = np.percentile(self.recent, PERCENTILES) if self.recent else [0.0] * len(PERCENTILES)
+        for p, value in zip(PERCENTILES, values):
+            row[f'p{p}'] = float(value)
+        return row
+
+
+class Metrics:
+    """Process-wide registry of timing histograms and counters.
+
+    Recording costs a lock and a few list operations. With `enabled` off, `timer` and
+    `timed` only check the flag.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'timings': {name: h.summary() for name, h in sorted(self.histograms.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        # Prometheus text exposition format
+        lines = []
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                metric = f"{PREFIX}_{_metric_name(name)}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ('+Inf',), h.buckets):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f"{metric}_sum {h.total}")
+                lines.append(f"{metric}_count {h.count}")
+            for name, value in sorted(self.counters.items()):
+                metric = f"{PREFIX}_{_metric_name(name)}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(name):
+    return ''.join(c if c.isalnum() else '_' for c in name)
+
+
+METRICS = Metrics()
+
+
+def timed(name):
+    # Decorator form of METRICS.timer
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                METRICS.observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class Capture:
+    # Result of profile(): the report text once the block has finished
+    def __init__(self, engine):
+        self.engine = engine
+        self.text = ''
+
+
+@contextmanager
+def profile(limit=30):
+    """Profile the enclosed block; the yielded Capture holds the report afterwards."""
+    capture = Capture('pyinstrument' if _Pyinstrument is not None else 'cProfile')
+    if _Pyinstrument is not None:
+        profiler = _Pyinstrument()
+        profiler.start()
+        try:
+            yield capture
+        finally:
+            profiler.stop()
+            capture.text = profiler.output_text()
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield capture
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+        capture.text = out.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/metrics':
+            body, kind = METRICS.to_prometheus(), 'text/plain; version=0.0.4'
+        elif self.path == '/metrics.json':
+            body, kind = METRICS.to_json(), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', kind)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=9464, host='127.0.0.1'):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+
+from charts import FigureCache
+from leaderboard import STARTING_CASH, Leaderboard
+from ledger import Ledger
+from profiling import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+class SharedMarket:
+    """One market engine shared by every session in the process.
+
+    A background thread advances the game one trading day every `day_seconds`.
+    Sessions never advance or modify it. They read prices through the game's
+    stocks, whose history is exposed as read-only views, and each session keeps only
+    its own cash and portfolio. Chart figures and indicators are cached once for all
+    sessions. Sessions report their trades to the shared leaderboard, which is
+    revalued at the new prices every trading day.
+
+    Each player's ledger is kept here under their player id, so a session that
+    reconnects with the same id picks up the same account. Players not seen for
+    `idle_seconds` leave the leaderboard and their resting orders are cancelled; they
+    are put back when they return.
+    """
+
+    def __init__(self, game, day_seconds=60.0, max_events=1000, idle_seconds=3600.0):
+        self.game = game
+        self.day_seconds = day_seconds
+        self.max_events = max_events
+        self.events_history = []
+        self.figures = FigureCache(max_entries=4 * len(game.stocks))
+        self.leaderboard = Leaderboard(game.stocks)
+        self.leaderboard.mark(game.engine.prices, game.day)
+        self.idle_seconds = idle_seconds
+        self.accounts = {}    # player id -> Ledger
+        self.last_seen = {}   # player id -> time.monotonic() of their last rerun, for players on the board
+        self.lock = threading.Lock()
+        self.last_tick = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="shared-market", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _run(self):
+        # A replayed market stops at the end of its data
+        while not self._stop.wait(self.seconds_until_next_day()) and not self.game.finished:
+            try:
+                self.advance()
+            except Exception:
+                # One bad day mustn't stop the market for every session; try again next interval
+                METRICS.count('shared.advance_errors')
+                logger.exception("Shared market failed to advance day %d", self.game.day)
+                self.last_tick = time.monotonic()
+
+    def advance(self):
+        with self.lock:
+            events = self.game.advance_day()
+            self.events_history.extend(events)
+            # Rebinding (rather than trimming in place) keeps lists already handed to sessions intact
+            self.events_history = self.events_history[-self.max_events:]
+            self.leaderboard.mark(self.game.engine.prices, self.game.day)
+            self.last_tick = time.monotonic()
+            self._drop_idle_players(self.last_tick)
+        return events
+
+    def join(self, player):
+        """The player's ledger, created on their first visit; also (re)joins the leaderboard.
+
+        Sessions call this on every rerun, which is what keeps an active player on the board.
+        """
+        with self.lock:
+            ledger = self.accounts.get(player)
+            if ledger is None:
+                ledger = self.accounts[player] = Ledger(self.game.symbol_index, cash=STARTING_CASH)
+            if player not in self.leaderboard:
+                self.leaderboard.join(player, f"Player {player[:4]}", cash=ledger.cash)
+                self.leaderboard.update(player, ledger.cash, ledger.portfolio)
+            self.last_seen[player] = time.monotonic()
+            return ledger
+
+    def _drop_idle_players(self, now):
+        for player, seen in list(self.last_seen.items()):
+            if now - seen > self.idle_seconds:
+                del self.last_seen[player]
+                self.leaderboard.leave(player)
+                for order in self.game.orders.open_orders(player):
+                    self.game.orders.cancel(order.id)
+
+    def seconds_until_next_day(self):
+        return max(0.0, self.last_tick + self.day_seconds - time.monotonic())
+
+    @property
+    def day(self):
+        return self.game.day
+
+    @property
+    def prices(self):
+        # Read-only view of the live price array; one float per ticker, shared by all sessions
+        view = self.game.engine.prices.view()
+        view.flags.writeable = False
+        return view
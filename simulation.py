@@ -0,0 +1,161 @@
+"""Headless batch simulation: run N trading days over M independent games without Streamlit.
+
+    python simulation.py --games 1000 --days 365 --strategy buy_and_hold --out results.parquet
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from game import MILESTONES, StockMarketGame
+from models import MODELS
+
+STARTING_CASH = 10000
+# Headless games pre-simulate this many ticks at a time instead of drawing per tick:
+# at most 3 ticks a day, so at least a year of trading days
+SEASON_TICKS = 3 * 365
+
+
+def hold_cash(game, cash, shares, rng):
+    return cash, shares
+
+
+def buy_and_hold(game, cash, shares, rng):
+    # Spread the starting cash evenly on day 1, then never trade again
+    if game.day == 1:
+        prices = game.engine.prices
+        budget = cash / len(prices)
+        shares = np.floor(budget / prices)
+        cash -= float(shares @ prices)
+    return cash, shares
+
+
+def random_trader(game, cash, shares, rng):
+    # Each day, sell a random holding or put a slice of cash into a random stock
+    prices = game.engine.prices
+    index = rng.integers(len(prices))
+    if shares[index] > 0 and rng.random() < 0.5:
+        cash += shares[index] * prices[index]
+        shares = shares.copy()
+        shares[index] = 0
+    else:
+        count = math.floor(cash * rng.uniform(0.1, 0.5) / prices[index])
+        if count > 0:
+            shares = shares.copy()
+            shares[index] += count
+            cash -= count * prices[index]
+    return cash, shares
+
+
+STRATEGIES = {
+    'hold_cash': hold_cash,
+    'buy_and_hold': buy_and_hold,
+    'random': random_trader,
+}
+
+
+def game_seeds(seed, games):
+    # Independent, reproducible seeds for each game
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(games)]
+
+
+def run_game(seed, days, strategy='buy_and_hold', cash=STARTING_CASH, model=None):
+    """Play one game for `days` days. Returns the daily portfolio value path (day 1 first)."""
+    game = StockMarketGame(seed=seed, model=model, season=SEASON_TICKS)
+    rng = np.random.default_rng([seed, 1])  # separate stream from the market engine
+    play = STRATEGIES[strategy]
+    shares = np.zeros(len(game.engine))
+
+    values = np.empty(days + 1)
+    for day in range(days + 1):
+        cash, shares = play(game, cash, shares, rng)
+        values[day] = cash + float(shares @ game.engine.prices)
+        if day < days:
+            game.advance_day()
+    return values
+
+
+def summarize(game_id, seed, values):
+    peak = np.maximum.accumulate(values)
+    row = {
+        'game': game_id,
+        'seed': seed,
+        'final_value': values[-1],
+        'max_value': peak[-1],
+        'max_drawdown': float(np.max(1 - values / peak)),
+    }
+    for milestone in MILESTONES:
+        reached = np.flatnonzero(values >= milestone)
+        # Day numbers start at 1, like the game; NaN if the milestone was never reached
+        row[f'day_to_{milestone}'] = reached[0] + 1 if len(reached) else np.nan
+    return row
+
+
+class Simulation:
+    """Runs `games` independent seeded games for `days` days each."""
+
+    def __init__(self, games=100, days=365, strategy='buy_and_hold', seed=0, model='uniform'):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}; choose from {sorted(STRATEGIES)}")
+        if model not in MODELS:
+            raise ValueError(f"Unknown price model {model!r}; choose from {sorted(MODELS)}")
+        self.model = model
+        self.games = games
+        self.days = days
+        self.strategy = strategy
+        self.seed = seed
+        self.paths = None
+
+    def run(self, keep_paths=False, game_ids=None):
+        seeds = game_seeds(self.seed, self.games)
+        game_ids = range(self.games) if game_ids is None else game_ids
+        rows, paths = [], []
+        for game_id in game_ids:
+            values = run_game(seeds[game_id], self.days, self.strategy, model=self.model)
+            rows.append(summarize(game_id, seeds[game_id], values))
+            if keep_paths:
+                paths.append(values)
+        if keep_paths:
+            self.paths = pd.DataFrame(np.array(paths).T, columns=list(game_ids)).rename_axis('day')
+            self.paths.index += 1
+        return pd.DataFrame(rows)
+
+
+def write_results(df, path):
+    # Format follows the file extension; Parquet needs pyarrow or fastparquet installed
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless Stock Game simulations.")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), default='buy_and_hold')
+    parser.add_argument('--model', choices=sorted(MODELS), default='uniform', help="price model")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='simulation.csv', help="summary output (.csv or .parquet)")
+    parser.add_argument('--paths', help="optional daily portfolio values per game (.csv or .parquet)")
+    args = parser.parse_args(argv)
+
+    sim = Simulation(args.games, args.days, args.strategy, args.seed, args.model)
+    start = time.perf_counter()
+    summary = sim.run(keep_paths=bool(args.paths))
+    elapsed = time.perf_counter() - start
+
+    write_results(summary, args.out)
+    if args.paths:
+        paths = sim.paths.copy()
+        paths.columns = [str(c) for c in paths.columns]
+        write_results(paths.reset_index(), args.paths)
+
+    print(f"{args.games} games x {args.days} days in {elapsed:.1f}s ({args.games / elapsed:.1f} games/s)")
+    print(summary[['final_value', 'max_drawdown']].describe().to_string())
+
+
+if __name__ == "__main__":
+    main()
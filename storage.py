@@ -0,0 +1,238 @@
+import glob
+import json
+import os
+import uuid
+
+import numpy as np
+
+from game import StockMarketGame
+from history import HistoryStore
+from ledger import Ledger
+
+DEFAULT_SAVE_DIR = 'saves'
+FORMAT_VERSION = 1
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class GameStore:
+    """Durable storage for one game: an append-only log plus periodic binary snapshots.
+
+    log.jsonl gets one record per price tick (the new prices), per trade and per
+    finished day. Every `snapshot_every` ticks the history matrix, dates and the
+    player's equity curve are written as .npy files next to a small JSON state file
+    (cash, portfolio, cost basis, RNG state and the log offset). Resuming memory-maps the newest snapshot and replays only the log
+    records written after it, so no prices are ever re-simulated.
+    """
+
+    def __init__(self, root=DEFAULT_SAVE_DIR, game_id=None, snapshot_every=500):
+        self.game_id = game_id or uuid.uuid4().hex[:12]
+        self.path = os.path.join(root, self.game_id)
+        self.snapshot_every = snapshot_every
+        self.logged_ticks = 0
+        self.snapshot_ticks = 0
+        self._log = None
+
+    @property
+    def exists(self):
+        return os.path.exists(os.path.join(self.path, 'meta.json'))
+
+    def _open_log(self):
+        if self._log is None:
+            self._log = open(os.path.join(self.path, 'log.jsonl'), 'ab')
+        return self._log
+
+    def _append(self, record):
+        log = self._open_log()
+        log.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+        log.flush()
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def create(self, game, state):
+        os.makedirs(self.path, exist_ok=True)
+        meta = {
+            'version': FORMAT_VERSION,
+            'symbols': list(game.stocks),
+            'volatility': game.engine.volatility.tolist(),
+            'trend': game.engine.trend.tolist(),
+            'replay': game.replay,
+        }
+        _write_atomic(os.path.join(self.path, 'meta.json'), lambda f: f.write(json.dumps(meta).encode()))
+        self.logged_ticks = len(game.engine.history)
+        self.snapshot(game, state)
+
+    # --- writing -------------------------------------------------------------
+
+    def log_ticks(self, history, stop=None):
+        # Log the ticks the engine made since the last call, up to `stop`
+        stop = len(history) if stop is None else stop
+        for row, date in zip(history.values[self.logged_ticks:stop], history.dates[self.logged_ticks:stop]):
+            self._append({'t': 'tick', 'date': str(date), 'prices': row.tolist()})
+        self.logged_ticks = stop
+
+    def log_day(self, day, events=()):
+        # Trades settled at the day's prices must be logged before this, as `load` replays them in log order
+        self._append({'t': 'day', 'day': day, 'events': list(events)})
+
+    def checkpoint(self, game, state):
+        # Snapshot once enough ticks were logged since the last one; only call with the whole game logged
+        if self.logged_ticks - self.snapshot_ticks >= self.snapshot_every:
+            self.snapshot(game, state)
+
+    def sync(self, game, state, events=()):
+        # Log every tick the engine made since the last sync, then the end of the day
+        self.log_ticks(game.engine.history)
+        self.log_day(game.day, events)
+        self.checkpoint(game, state)
+
+    def log_trade(self, symbol, shares, price, cash):
+        # Positive shares for a buy, negative for a sell; cash is the balance afterwards
+        self._append({'t': 'trade', 'symbol': symbol, 'shares': shares, 'price': price, 'cash': cash})
+
+    def snapshot(self, game, state):
+        ticks = len(game.engine.history)
+        values = np.ascontiguousarray(game.engine.history.values)
+        dates = game.engine.history.dates
+        _write_atomic(os.path.join(self.path, f'history-{ticks}.npy'), lambda f: np.save(f, values))
+        _write_atomic(os.path.join(self.path, f'dates-{ticks}.npy'), lambda f: np.save(f, dates))
+        ledger = state.get('ledger')
+        if ledger is not None:
+            equity = np.ascontiguousarray(ledger.equity.values)
+            equity_dates = ledger.equity.dates
+            _write_atomic(os.path.join(self.path, f'equity-{ticks}.npy'), lambda f: np.save(f, equity))
+            _write_atomic(os.path.join(self.path, f'equitydates-{ticks}.npy'), lambda f: np.save(f, equity_dates))
+
+        log = self._open_log()
+        snapshot = {
+            'ticks': ticks,
+            'log_offset': log.tell(),
+            'day': game.day,
+            'cash': state['cash'],
+            'portfolio': state['portfolio'],
+            'cost': ledger.cost_basis() if ledger is not None else None,
+            'realized': ledger.realized if ledger is not None else 0.0,
+            'events_history': state['events_history'][-1000:],
+            'used_events': sorted(game.used_events),
+            'last_reset_day': game.last_reset_day,
+            'rng': _rng_state(game),
+        }
+        # The state file is written last, so a snapshot only counts once it is complete
+        _write_atomic(os.path.join(self.path, f'state-{ticks}.json'), lambda f: f.write(json.dumps(snapshot).encode()))
+        self._remove_snapshots(keep=ticks)
+        self.snapshot_ticks = ticks
+
+    def _remove_snapshots(self, keep):
+        for path in glob.glob(os.path.join(self.path, '*-*.*')):
+            name = os.path.basename(path)
+            ticks = name.split('-', 1)[1].split('.', 1)[0]
+            if ticks.isdigit() and int(ticks) != keep:
+                os.remove(path)
+
+    # --- reading -------------------------------------------------------------
+
+    def _latest_snapshot(self):
+        states = glob.glob(os.path.join(self.path, 'state-*.json'))
+        if not states:
+            raise FileNotFoundError(f"No snapshot in {self.path}")
+        return max(int(os.path.basename(p)[6:-5]) for p in states)
+
+    def load(self, **game_kwargs):
+        """Resume the game. Returns (game, state) with state holding cash, portfolio, events and the ledger."""
+        with open(os.path.join(self.path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        ticks = self._latest_snapshot()
+        with open(os.path.join(self.path, f'state-{ticks}.json'), encoding='utf-8') as f:
+            snapshot = json.load(f)
+
+        # A saved game keeps its mode: replay games reopen their own dataset and universe
+        # (the replay position follows the saved history), simulated ones stay simulated
+        game_kwargs = {**game_kwargs, 'replay': meta.get('replay')}
+        game = StockMarketGame(**game_kwargs)
+        if list(game.stocks) != meta['symbols']:
+            raise ValueError(f"Saved game {self.game_id} has a different set of stocks")
+        engine = game.engine
+        engine.volatility[:] = meta['volatility']
+        engine.trend[:] = meta['trend']
+
+        # Memory-mapped: nothing is read from disk until a chart or the next tick needs it
+        values = np.load(os.path.join(self.path, f'history-{ticks}.npy'), mmap_mode='r')
+        dates = np.load(os.path.join(self.path, f'dates-{ticks}.npy'), mmap_mode='r')
+        engine.history = HistoryStore.from_arrays(values, dates)
+
+        game.day = snapshot['day']
+        game.used_events = set(snapshot['used_events'])
+        game.last_reset_day = snapshot['last_reset_day']
+        _restore_rng(game, snapshot['rng'])
+
+        equity = None
+        if os.path.exists(os.path.join(self.path, f'equity-{ticks}.npy')):
+            equity = HistoryStore.from_arrays(
+                np.load(os.path.join(self.path, f'equity-{ticks}.npy'), mmap_mode='r'),
+                np.load(os.path.join(self.path, f'equitydates-{ticks}.npy'), mmap_mode='r')
+            )
+        cost = snapshot.get('cost')
+        if cost is None:
+            # Saved before cost basis was tracked: holdings start at the snapshot's prices
+            prices = engine.history.values[-1]
+            cost = {s: n * prices[game.symbol_index[s]] for s, n in snapshot['portfolio'].items()}
+        ledger = Ledger(game.symbol_index, snapshot['cash'], snapshot['portfolio'], cost, snapshot.get('realized', 0.0), equity)
+        ledger.mark(engine.history.values[-1], len(engine.history))
+        events_history = snapshot['events_history']
+
+        # Replay what happened after the snapshot
+        with open(os.path.join(self.path, 'log.jsonl'), 'rb') as f:
+            f.seek(snapshot['log_offset'])
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # torn write from a crash; everything before it is intact
+                record = json.loads(line)
+                kind = record['t']
+                if kind == 'tick':
+                    engine.history.append(record['prices'], np.datetime64(record['date']))
+                    ledger.mark(record['prices'], len(engine.history))
+                elif kind == 'trade':
+                    ledger.trade(record['symbol'], record['shares'], record['price'])
+                    ledger.cash = record['cash']
+                elif kind == 'day':
+                    game.day = record['day']
+                    events_history.extend(record['events'])
+                    game.used_events.update(record['events'])
+                    ledger.record(game.day, engine.history.dates[-1])
+
+        engine.prices[:] = engine.history.values[-1]
+        replayed = len(engine.history) - ticks
+        if replayed:
+            # The snapshot's RNG state already produced the replayed ticks; move to a fresh,
+            # still deterministic stream instead of repeating those draws
+            engine.rng = np.random.Generator(engine.rng.bit_generator.jumped(replayed))
+            game.random.seed(int(engine.rng.integers(2 ** 63)))
+        self.logged_ticks = len(engine.history)
+        self.snapshot_ticks = ticks
+        state = {
+            'cash': ledger.cash,
+            'portfolio': ledger.portfolio,
+            'events_history': events_history,
+            'ledger': ledger,
+        }
+        return game, state
+
+
+def _rng_state(game):
+    return {'engine': game.engine.rng.bit_generator.state, 'game': game.random.getstate()}
+
+
+def _restore_rng(game, rng):
+    game.engine.rng.bit_generator.state = rng['engine']
+    version, internal, gauss = rng['game']
+    game.random.setstate((version, tuple(internal), gauss))
@@ -0,0 +1,42 @@
+import colorsys
+import zlib
+
+# Hand-picked styles for the original tickers
+STOCK_STYLES = {
+    'AAPL': {'color': '#FF6B6B', 'pattern': 'lines', 'dash': 'solid', 'symbol': 'circle'},
+    'GOOGL': {'color': '#4ECDC4', 'pattern': 'lines+markers', 'dash': 'solid', 'symbol': 'diamond'},
+    'TSLA': {'color': '#FFE66D', 'pattern': 'lines', 'dash': 'dash', 'symbol': 'x'},
+    'AMZN': {'color': '#FF8B94', 'pattern': 'lines+markers', 'dash': 'solid', 'symbol': 'triangle-up'},
+    'MSFT': {'color': '#96CEB4', 'pattern': 'lines', 'dash': 'dot', 'symbol': 'square'},
+    'META': {'color': '#FFEEAD', 'pattern': 'lines+markers', 'dash': 'dashdot', 'symbol': 'star'},
+    'NVDA': {'color': '#D4A5A5', 'pattern': 'lines', 'dash': 'longdash', 'symbol': 'pentagon'},
+    'JPM': {'color': '#9AC1D9', 'pattern': 'lines+markers', 'dash': 'solid', 'symbol': 'hexagon'},
+    'DIS': {'color': '#FFB6B9', 'pattern': 'lines', 'dash': 'dash', 'symbol': 'cross'},
+    'NFLX': {'color': '#A8E6CF', 'pattern': 'lines+markers', 'dash': 'dot', 'symbol': 'triangle-down'},
+    'COIN': {'color': '#DCEDC1', 'pattern': 'lines', 'dash': 'dashdot', 'symbol': 'hourglass'},
+    'ADBE': {'color': '#FFD3B6', 'pattern': 'lines+markers', 'dash': 'longdashdot', 'symbol': 'octagon'}
+}
+
+DEFAULT_STYLE = {'color': '#64ffda', 'pattern': 'lines', 'dash': 'solid', 'symbol': 'circle'}
+
+PATTERNS = ['lines', 'lines+markers']
+DASHES = ['solid', 'dash', 'dot', 'dashdot', 'longdash', 'longdashdot']
+MARKERS = ['circle', 'diamond', 'x', 'triangle-up', 'square', 'star', 'pentagon',
+           'hexagon', 'cross', 'triangle-down', 'hourglass', 'octagon']
+
+
+def style_for(symbol):
+    # Any other ticker gets a pastel style derived from a stable hash of its symbol,
+    # so the same symbol looks the same in every session and process
+    if symbol in STOCK_STYLES:
+        return STOCK_STYLES[symbol]
+    if not symbol:
+        return DEFAULT_STYLE
+    h = zlib.crc32(symbol.encode())
+    r, g, b = colorsys.hls_to_rgb((h % 360) / 360, 0.72, 0.65)
+    return {
+        'color': f'#{int(r * 255):02X}{int(g * 255):02X}{int(b * 255):02X}',
+        'pattern': PATTERNS[(h >> 9) % len(PATTERNS)],
+        'dash': DASHES[(h >> 10) % len(DASHES)],
+        'symbol': MARKERS[(h >> 13) % len(MARKERS)],
+    }
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules live at the project root, next to main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from marketdata import FIELDS, MarketData  # noqa: E402
+
+
+@pytest.fixture
+def replay_data(tmp_path):
+    # 3 tickers x 60 business days from 2020-01-01; CCC has no bars on rows 30-32
+    path = str(tmp_path / 'market')
+    dates = pd.bdate_range('2020-01-01', periods=60).values
+    data = MarketData.create(path, dates, ['AAA', 'BBB', 'CCC'], names={'AAA': 'Aaa Corp'},
+                             sectors={'AAA': 'Technology'})
+    closes = 100.0 + np.arange(60)[:, None] + np.array([0.0, 1000.0, 2000.0])
+    for name in FIELDS:
+        data.fields[name][:] = closes
+    data.fields['close'][30:33, 2] = np.nan
+    data.flush()
+    return path
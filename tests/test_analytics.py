@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import historical_var, max_drawdown, monte_carlo_var, risk_report, rolling_volatility
+
+
+def test_rolling_volatility_matches_pandas():
+    returns = np.random.default_rng(0).normal(0, 0.01, (100, 3))
+    expected = pd.DataFrame(returns).rolling(20).std().to_numpy()[19:]
+    np.testing.assert_allclose(rolling_volatility(returns, 20), expected)
+    assert rolling_volatility(returns[:5], 20).shape == (0, 3)
+
+
+def test_max_drawdown():
+    np.testing.assert_allclose(max_drawdown(np.array([[100.0, 10.0], [120.0, 8.0], [90.0, 12.0], [130.0, 6.0]])),
+                               [0.25, 0.5])
+
+
+def test_historical_var():
+    assert historical_var(np.linspace(-100, 100, 201), level=0.9) == pytest.approx(80.0)
+    assert historical_var(np.full(10, 5.0)) == 0.0
+    assert historical_var([]) == 0.0
+
+
+def test_monte_carlo_var_matches_the_normal_quantile():
+    rng = np.random.default_rng(0)
+    cov = np.array([[4.0, 1.0, 0.0], [1.0, 2.0, -0.5], [0.0, -0.5, 1.0]]) * 1e-4
+    returns = rng.multivariate_normal(np.zeros(3), cov, size=5_000)
+    exposure = np.array([10_000.0, -5_000.0, 20_000.0])
+    sigma = np.sqrt(exposure @ np.cov(returns, rowvar=False) @ exposure)
+    expected = 1.6449 * sigma - returns.mean(axis=0) @ exposure
+    assert monte_carlo_var(returns, exposure, simulations=50_000) == pytest.approx(expected, rel=0.03)
+
+
+def test_monte_carlo_var_with_more_tickers_than_rows():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0, 0.01, (20, 200))
+    var = monte_carlo_var(returns, np.full(200, 100.0), chunk=300)
+    assert np.isfinite(var) and var > 0
+    assert monte_carlo_var(returns[:1], np.full(200, 100.0)) == 0.0
+
+
+def test_risk_report_lookback_bounds_the_history():
+    rng = np.random.default_rng(2)
+    history = 100 * np.cumprod(1 + rng.normal(0, 0.01, (3_000, 4)), axis=0)
+    recent = risk_report(history, np.array([10.0, 5.0]), [0, 2], lookback=500)
+    tail = risk_report(history[-500:], np.array([10.0, 5.0]), [0, 2])
+    assert recent['portfolio'] == pytest.approx(tail['portfolio'])
+    for name, values in recent['positions'].items():
+        np.testing.assert_allclose(values, tail['positions'][name])
+    assert recent['portfolio']['value'] == pytest.approx(10 * history[-1, 0] + 5 * history[-1, 2])
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from storage import GameStore
+
+pytest.importorskip('streamlit')
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+
+@pytest.fixture
+def app(tmp_path):
+    at = AppTest.from_file(MAIN, default_timeout=60)
+    at.secrets['save_dir'] = str(tmp_path)
+    at.secrets['openai_api_key'] = ''
+    at.run()
+    assert not at.exception
+    return at
+
+
+def place_fillable_order(at):
+    # A limit buy above the price fills on the next tick
+    game = at.session_state.game
+    game.place_order(at.session_state.account, 'AAPL', 'buy', 'limit', 5, game.stocks['AAPL'].price * 1.2)
+
+
+def assert_resumes_with_the_same_books(at, tmp_path):
+    ledger, store = at.session_state.ledger, at.session_state.store
+    store.close()
+    _, state = GameStore(str(tmp_path), store.game_id).load()
+    resumed = state['ledger']
+    assert resumed.cash == pytest.approx(ledger.cash)
+    assert resumed.portfolio == ledger.portfolio
+    np.testing.assert_allclose(resumed.equity.values, ledger.equity.values)
+    np.testing.assert_array_equal(resumed.equity.dates, ledger.equity.dates)
+
+
+def test_order_fills_survive_a_resume(app, tmp_path):
+    # Regression: the day record was logged before the fills of its ticks were settled
+    for day in range(6):
+        if day in (1, 3):
+            place_fillable_order(app)
+        app.sidebar.button[0].click().run()
+        assert not app.exception
+    assert app.session_state.ledger.portfolio == {'AAPL': 10}
+    assert_resumes_with_the_same_books(app, tmp_path)
+
+
+def test_fast_forward_fills_survive_a_resume(app, tmp_path):
+    place_fillable_order(app)
+    app.sidebar.number_input[0].set_value(5)
+    next(button for button in app.sidebar.button if 'Fast Forward' in button.label).click().run()
+    assert not app.exception
+    assert app.session_state.day == 6
+    assert app.session_state.ledger.portfolio == {'AAPL': 5}
+    assert_resumes_with_the_same_books(app, tmp_path)
+
+
+def test_risk_metrics_say_how_much_history_they_cover(app):
+    place_fillable_order(app)
+    app.sidebar.button[0].click().run()
+    app.session_state.tab = "Portfolio"
+    app.run()
+    assert not app.exception
+    ticks = min(len(app.session_state.game.engine.history), 1_000)
+    assert f"Over the last {ticks:,} ticks" in [caption.value for caption in app.caption]
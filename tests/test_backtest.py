@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from backtest import MACrossover, backtest, grid_search, ma_crossover_equity, parse_windows, simulated_paths
+
+
+def trending_paths(ticks=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal([0.002, -0.002, 0.0], 0.01, (ticks, 3)), axis=0)
+
+
+def test_ma_crossover_equity_holds_only_while_long():
+    # Rising prices: long once both averages have history, with as many whole shares as the cash covers
+    paths = np.linspace(100, 200, 50)[:, None]
+    equity = ma_crossover_equity(paths, 2, 5)
+    assert equity[0] == 10_000
+    shares = 10_000 // paths[5, 0]
+    np.testing.assert_allclose(equity[-1], 10_000 + shares * (paths[-1, 0] - paths[5, 0]))
+    # Falling prices: never long, the cash is untouched
+    np.testing.assert_allclose(ma_crossover_equity(paths[::-1], 2, 5), 10_000)
+
+
+def test_grid_search_ranks_every_pair():
+    paths = trending_paths()
+    results, bars_per_second = grid_search(paths, [2, 5, 10], [5, 10, 20], workers=1)
+    assert len(results) == 6
+    assert results['final_value'].is_monotonic_decreasing
+    best = results.iloc[0]
+    assert best['final_value'] == pytest.approx(ma_crossover_equity(paths, int(best['fast']), int(best['slow']))[-1])
+    assert bars_per_second > 0
+    with pytest.raises(ValueError):
+        grid_search(paths, [20], [5], workers=1)
+
+
+def test_bar_by_bar_backtest_runs_through_the_order_book():
+    paths = trending_paths()
+    run = backtest(MACrossover(2, 10), paths, ['A', 'B', 'C'])
+    assert len(run['equity']) == len(paths) and run['trades'] > 0
+    assert run['equity'][0] == 10_000
+    with pytest.raises(ValueError):
+        MACrossover(10, 5)
+
+
+@pytest.mark.parametrize('fast, slow', [(2, 20), (5, 10)])
+def test_bar_by_bar_and_vectorized_runs_agree(fast, slow):
+    # Same sleeves and whole-share sizing in both, so --event reproduces the grid's numbers
+    symbols, paths = simulated_paths(150, seed=0)
+    run = backtest(MACrossover(fast, slow), paths, symbols)
+    np.testing.assert_allclose(run['equity'], ma_crossover_equity(paths, fast, slow), rtol=1e-9)
+
+
+def test_parse_windows():
+    assert parse_windows('5') == [5]
+    assert parse_windows('2,5,10') == [2, 5, 10]
+    assert parse_windows('10:20:5') == [10, 15, 20]
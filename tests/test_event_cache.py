@@ -0,0 +1,41 @@
+import pytest
+
+from event_cache import EventCache
+
+
+@pytest.fixture
+def cache():
+    cache = EventCache(':memory:')
+    yield cache
+    cache.close()
+
+
+def test_duplicates_are_rejected_after_normalizing(cache):
+    assert cache.put('AAPL', 'had news', 'Apple ships a phone!', 0.05)
+    assert not cache.put('AAPL', 'had news', 'apple ships a  PHONE', 0.01)
+    assert cache.get('AAPL', 'had news') == ('Apple ships a phone!', 0.05)
+    assert cache.get('AAPL', 'had news', exclude={'apple ships a phone'}) is None
+    assert cache.get('MSFT', 'had news') is None
+
+
+def test_savings_count_a_hit_as_its_share_of_a_batched_call(cache):
+    # Two requests of 8 events each, 2 s each; 4 hits save half a request, not 4
+    cache.record_api_call(2.0, 8)
+    cache.record_api_call(2.0, 8)
+    cache.put('AAPL', 'had news', 'Apple ships a phone', 0.05)
+    for _ in range(4):
+        cache.get('AAPL', 'had news')
+    stats = cache.stats()
+    assert stats['events_per_api_call'] == 8.0
+    assert stats['events_saved'] == 4
+    assert stats['api_calls_saved'] == pytest.approx(0.5)
+    assert stats['latency_saved'] == pytest.approx(1.0)
+
+
+def test_unbatched_calls_save_one_call_per_hit(cache):
+    cache.record_api_call(1.5)
+    cache.put('AAPL', 'had news', 'Apple ships a phone', 0.05)
+    cache.get('AAPL', 'had news')
+    stats = cache.stats()
+    assert stats['api_calls_saved'] == pytest.approx(1.0)
+    assert stats['latency_saved'] == pytest.approx(1.5)
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+from openai import OpenAI
+
+from benchmarks.stub_openai import serve
+from events import EventPrefetcher, parse_events, request_events
+
+
+def reply(*entries):
+    return json.dumps({'events': list(entries)})
+
+
+def test_parse_events_keeps_valid_entries():
+    text = reply({'company': 'AAPL', 'event': ' Apple ships a phone ', 'impact': 0.05},
+                 {'company': 'MSFT', 'event': 'Microsoft buys a studio', 'impact': '-0.1'})
+    events, rejected = parse_events(text, ['AAPL', 'MSFT'])
+    assert events == [('AAPL', 'Apple ships a phone', 0.05), ('MSFT', 'Microsoft buys a studio', -0.1)]
+    assert rejected == 0
+
+
+@pytest.mark.parametrize('entry', [
+    {'company': 'AAPL', 'event': 'Shares soar', 'impact': 0.9},          # out of range
+    {'company': 'AAPL', 'event': 'Shares dip', 'impact': float('nan')},  # not finite
+    {'company': 'AAPL', 'event': 'Shares dip', 'impact': 'a lot'},
+    {'company': 'AAPL', 'event': '   ', 'impact': 0.01},                 # no text
+    {'company': 'AAPL', 'event': None, 'impact': 0.01},
+    {'company': 'ZZZZ', 'event': 'Unknown company', 'impact': 0.01},     # not requested
+    {'company': 'AAPL', 'impact': 0.01},
+    'not an object',
+])
+def test_parse_events_rejects_invalid_entries(entry):
+    events, rejected = parse_events(reply(entry, {'company': 'MSFT', 'event': 'Fine', 'impact': 0.0}), ['AAPL', 'MSFT'])
+    assert events == [('MSFT', 'Fine', 0.0)]
+    assert rejected == 1
+
+
+def test_parse_events_takes_each_company_once():
+    entry = {'company': 'AAPL', 'event': 'Apple news', 'impact': 0.01}
+    events, rejected = parse_events(reply(entry, entry), ['AAPL'])
+    assert len(events) == 1 and rejected == 1
+
+
+@pytest.mark.parametrize('text', ['Sorry, no JSON today', '[]', '{"items": []}', '{"events": {"company": "AAPL"}}', None])
+def test_parse_events_raises_on_malformed_replies(text):
+    with pytest.raises(ValueError):
+        parse_events(text, ['AAPL'])
+
+
+def test_request_events_against_the_stub():
+    with serve() as (base_url, counter):
+        client = OpenAI(api_key='stub', base_url=base_url, max_retries=0)
+        try:
+            requests = [('AAPL', 'announced a new partnership'), ('MSFT', 'faced supply chain issues')]
+            events, rejected, usage = request_events(client, requests)
+        finally:
+            client.close()
+    assert [company for company, _, _ in events] == ['AAPL', 'MSFT']
+    assert rejected == 0 and usage.completion_tokens > 0
+    assert counter['requests'] == 1
+
+
+def test_prefetcher_batches_requests_and_closes():
+    with serve() as (base_url, counter):
+        feed = EventPrefetcher(['AAPL', 'MSFT', 'NVDA', 'JPM'], 'stub', base_url=base_url, size=8, workers=1,
+                               batch_size=4).start()
+        threads = list(feed._threads)
+        try:
+            assert feed.wait_until_filled(8, timeout=10.0)
+            items = [feed.get(0) for _ in range(8)]
+        finally:
+            feed.close()
+    assert all(item is not None for item in items)
+    assert threads and not any(thread.is_alive() for thread in threads)
+    stats = feed.stats()
+    assert stats['events'] >= 8 and stats['requests'] <= counter['requests']
+    assert stats['events'] / stats['requests'] == pytest.approx(4.0)
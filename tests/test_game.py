@@ -0,0 +1,92 @@
+import numpy as np
+
+from game import StockMarketGame
+
+
+class FakeFeed:
+    # Stands in for an EventPrefetcher: hands out numbered events until it runs dry
+    def __init__(self, companies, count):
+        self.items = [(companies[i % len(companies)], f"Story {i}", 0.01, ['had news']) for i in range(count)]
+
+    def get(self, deadline=0.0):
+        return self.items.pop(0) if self.items else None
+
+
+def test_fast_forward_plays_every_day():
+    game = StockMarketGame(seed=3)
+    ticks = len(game.engine.history)
+    played = game.fast_forward(10)
+    assert [day for day, _, _ in played] == list(range(2, 12))
+    assert game.day == 11
+    assert len(game.engine.history) == ticks + sum(len(events) for _, events, _ in played)
+    np.testing.assert_allclose(played[-1][2], game.engine.prices)
+
+
+def test_fast_forward_stops_after_the_first_day_that_meets_the_condition():
+    game = StockMarketGame(seed=3)
+    played = game.fast_forward(40, until=lambda closes: np.arange(len(closes)) == 4)
+    assert len(played) == 5 and game.day == 6
+    np.testing.assert_allclose(game.engine.history.values[-1], played[-1][2])
+
+
+def test_resting_orders_see_every_skipped_tick():
+    game = StockMarketGame(seed=3)
+    price = game.stocks['AAPL'].price
+    ticks = len(game.engine.history)
+    buy = game.place_order('p1', 'AAPL', 'buy', 'limit', 1, price=price * 10)
+    day = game.place_order('p1', 'AAPL', 'buy', 'limit', 1, price=price * 0.01, tif='day')
+    game.fast_forward(3)
+    assert buy.status == 'filled' and day.status == 'expired'
+    # The limit buy fills on the first skipped tick, at that tick's price
+    fills = game.orders.pop_fills('p1')
+    assert [fill.price for fill in fills] == [game.engine.history.values[ticks, game.symbol_index['AAPL']]]
+
+
+def test_early_stop_leaves_no_trace_of_unplayed_days():
+    # The game's RNG ends up the same however many days are played, and only played events count as used
+    stopped = StockMarketGame(seed=5)
+    full = StockMarketGame(seed=5)
+    played = stopped.fast_forward(40, until=lambda closes: np.arange(len(closes)) == 2)
+    assert len(played) == 3 and stopped.day == 4
+    full.fast_forward(3)
+    assert stopped.random.getstate() == full.random.getstate()
+    assert stopped.used_events == {event for _, events, _ in played for event in events}
+    assert stopped.last_reset_day <= stopped.day
+    assert not stopped.requeued_events
+
+    # Past the 30-day reset, the rollback restores the reset day of the first unplayed day
+    game = StockMarketGame(seed=5)
+    game.fast_forward(29)
+    game.fast_forward(10, until=lambda closes: np.arange(len(closes)) == 0)
+    assert game.day == 31 and game.last_reset_day == 1
+
+
+def test_unplayed_prefetched_events_go_back_in_line():
+    game = StockMarketGame(seed=2)
+    game.event_feed = FakeFeed(list(game.stocks), 50)
+    played = game.fast_forward(10, until=lambda closes: np.arange(len(closes)) == 1)
+    used = [event for _, events, _ in played for event in events]
+    assert used == [f"Story {i}" for i in range(len(used))]
+    # The events of the unplayed days come first next time, in their original order
+    assert [item[1] for item in game.requeued_events][:1] == [f"Story {len(used)}"]
+    event, _, _ = game.generate_event(deadline=0)
+    assert event == f"Story {len(used)}"
+
+
+def test_a_malformed_prefetched_event_falls_back_and_still_ticks():
+    game = StockMarketGame(seed=2)
+    game.event_feed = FakeFeed(['ZZZZ'], 1)   # a company the game doesn't list
+    ticks = len(game.engine.history)
+    game.used_events.add("Story 0")           # so the duplicate path looks the company up
+    event = game.update_prices()
+    assert event != "Story 0" and len(game.engine.history) == ticks + 1
+    assert not game.finished
+
+
+def test_fast_forwarded_ticks_get_distinct_timestamps():
+    game = StockMarketGame(seed=3)
+    game.advance_day()
+    ticks = len(game.engine.history)
+    game.fast_forward(20)
+    dates = game.engine.dates[ticks - 1:]
+    assert len(dates) > 21 and (np.diff(dates) > np.timedelta64(0, 'us')).all()
@@ -0,0 +1,118 @@
+import random
+
+import numpy as np
+import pytest
+
+from leaderboard import Leaderboard, RankIndex
+
+
+def test_rank_index_matches_a_sorted_list():
+    rng = random.Random(0)
+    index = RankIndex(load=4)   # small buckets, so splits and empty buckets happen often
+    expected = []
+    for _ in range(2000):
+        if expected and rng.random() < 0.4:
+            key = rng.choice(expected)
+            expected.remove(key)
+            index.remove(key)
+        else:
+            key = (rng.randint(0, 50), rng.randint(0, 10 ** 6))
+            expected.append(key)
+            index.add(key)
+        expected.sort()
+        assert len(index) == len(expected)
+    assert list(index) == expected
+    for i, key in enumerate(expected):
+        assert index.select(i) == key
+        assert index.rank(key) == expected.index(key)
+    assert index.slice(5, 25) == expected[5:25]
+    assert index.slice(len(expected) - 3, len(expected) + 10) == expected[-3:]
+
+
+def test_rank_index_errors():
+    index = RankIndex([(1, 0), (2, 0)])
+    with pytest.raises(KeyError):
+        index.remove((3, 0))
+    with pytest.raises(IndexError):
+        index.select(2)
+    assert index.slice(2, 5) == []
+
+
+def expected_order(cash, shares, prices):
+    # Best value first, ties by join order
+    values = cash + shares @ prices
+    return list(np.lexsort((np.arange(len(values)), -values)))
+
+
+def test_leaderboard_matches_a_full_sort():
+    rng = np.random.default_rng(0)
+    players, tickers = 300, 4
+    prices = rng.uniform(10, 100, tickers)
+    board = Leaderboard([f'T{i}' for i in range(tickers)])
+    board.mark(prices, 0)
+    cash = np.full(players, 10_000.0)
+    shares = np.zeros((players, tickers))
+    for p in range(players):
+        board.join(f'p{p}')
+
+    for day in range(1, 30):
+        # A few trades (incremental re-ranks), then a tick that moves everyone (a rebuild) or only a few
+        for p in rng.choice(players, 5, replace=False):
+            i = rng.integers(tickers)
+            n = np.floor(cash[p] * 0.3 / prices[i])
+            cash[p] -= n * prices[i]
+            shares[p, i] += n
+            board.update(f'p{p}', cash[p], dict(zip(board.symbols, shares[p])))
+        prices = prices * (1 + rng.normal(0, 0.02, tickers)) if day % 3 else prices
+        board.mark(prices, day)
+
+        order = expected_order(cash, shares, prices)
+        assert [row['player'] for row in board.top(50)] == [f'p{p}' for p in order[:50]]
+        for p in rng.choice(players, 10, replace=False):
+            assert board.rank(f'p{p}') == order.index(p) + 1
+
+
+def test_leave_and_rejoin():
+    board = Leaderboard(['A'])
+    board.mark([10.0], 0)
+    for player in ('alice', 'bob', 'carol'):
+        board.join(player)
+    board.update('bob', 5_000.0, {'A': 600})   # worth 11,000: first
+    board.leave('bob')
+    assert 'bob' not in board and len(board) == 2
+    assert [row['player'] for row in board.top(10)] == ['alice', 'carol']
+
+    board.join('bob')
+    assert 'bob' in board and len(board) == 3
+    assert board.standing('bob')['rank'] == 1
+    assert board.standing('bob')['value'] == pytest.approx(11_000.0)
+
+
+def test_return_and_milestone_rankings():
+    board = Leaderboard(['A'], milestones={20_000: 'Double'})
+    board.mark([10.0], 0)
+    board.join('small', cash=1_000)
+    board.join('big', cash=10_000)
+    board.update('small', 0.0, {'A': 100})
+    board.update('big', 0.0, {'A': 1_000})
+    board.mark([25.0], 3)   # small: 2,500 (+150%), big: 25,000 (+150%) and past 20,000 on day 3
+    assert [row['player'] for row in board.top(2, by='return')] == ['small', 'big']
+    assert board.standing('big', by='milestone')['milestone'] == 'Double'
+    assert board.standing('big', by='milestone')['milestone_day'] == 3
+    assert board.rank('big', by='milestone') == 1
+
+
+def test_holdings_are_stored_per_position():
+    board = Leaderboard([f'T{i}' for i in range(5_000)])
+    board.mark(np.arange(1.0, 5_001.0), 0)
+    board.join('alice')
+    board.join('bob')
+    board.update('alice', 9_000.0, {'T9': 100, 'T4999': 0})
+    board.update('bob', 5_000.0, {'T4999': 1})
+    board.update('alice', 9_000.0, {'T9': 0, 'T19': 50})   # sold T9, bought T19
+    board.update('alice', 8_000.0, {'T9': 100, 'T19': 50})  # T9 again reuses its slot
+    assert board.positions == 3
+    board.mark(np.arange(1.0, 5_001.0) * 2, 1)
+    assert [row['player'] for row in board.top(2)] == ['bob', 'alice']
+    assert board.standing('alice')['value'] == pytest.approx(8_000.0 + 100 * 20.0 + 50 * 40.0)
+    assert board.standing('bob')['value'] == pytest.approx(5_000.0 + 10_000.0)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from ledger import Ledger
+
+
+def test_average_cost_basis_and_realized_pnl():
+    ledger = Ledger(['A', 'B'], cash=1_000.0).mark([10.0, 50.0], 0)
+    assert ledger.trade('A', 10, 10.0)
+    assert ledger.trade('A', 10, 20.0)
+    assert ledger.positions()['avg_cost'][0] == pytest.approx(15.0)
+
+    assert ledger.trade('A', -5, 30.0)
+    assert ledger.realized == pytest.approx(5 * (30.0 - 15.0))
+    assert ledger.cost_basis() == {'A': pytest.approx(15 * 15.0)}
+    assert ledger.cash == pytest.approx(1_000.0 - 100.0 - 200.0 + 150.0)
+    assert ledger.portfolio == {'A': 15}
+
+    assert ledger.trade('A', -15, 12.0)
+    assert ledger.portfolio == {}
+    assert ledger.cost_total == pytest.approx(0.0)
+    assert ledger.realized == pytest.approx(75.0 + 15 * (12.0 - 15.0))
+
+
+def test_rejected_trades_change_nothing():
+    ledger = Ledger(['A'], cash=100.0).mark([10.0], 0)
+    assert not ledger.trade('A', 11, 10.0)    # more than the cash
+    assert not ledger.trade('A', -1, 10.0)    # nothing to sell
+    assert not ledger.trade('A', 0, 10.0)
+    assert ledger.cash == 100.0 and ledger.portfolio == {} and ledger.cost_total == 0.0
+
+
+def test_value_follows_marks_and_trades():
+    ledger = Ledger(['A', 'B'], cash=1_000.0).mark([10.0, 20.0], 0)
+    ledger.trade('A', 10, 10.0)
+    ledger.trade('B', 5, 20.0)
+    ledger.mark([12.0, 18.0], 1)
+    assert ledger.value == pytest.approx(ledger.cash + 10 * 12.0 + 5 * 18.0)
+    assert ledger.unrealized == pytest.approx(10 * 2.0 - 5 * 2.0)
+    # The same tick again is a no-op, even with other prices
+    ledger.mark([100.0, 100.0], 1)
+    assert ledger.value == pytest.approx(ledger.cash + 10 * 12.0 + 5 * 18.0)
+
+
+def test_equity_curve_has_one_row_per_day():
+    ledger = Ledger(['A'], cash=1_000.0).mark([10.0], 0)
+    ledger.record(1)
+    ledger.trade('A', 10, 10.0)
+    ledger.mark([11.0], 1).record(1)   # already recorded
+    ledger.record(2)
+    days, equity = ledger.equity_curve
+    assert list(days) == [1, 2]
+    np.testing.assert_allclose(equity, [1_000.0, 1_010.0])
+
+
+def test_only_held_positions_are_stored():
+    index = {f'T{i}': i for i in range(5_000)}
+    prices = np.arange(1.0, 5_001.0)
+    ledger = Ledger(index, cash=100_000.0).mark(prices, 0)
+    assert ledger.index is index   # shared, not copied
+    for symbol, shares in (('T10', 3), ('T4000', 2), ('T7', 5)):
+        ledger.trade(symbol, shares, prices[index[symbol]])
+    ledger.trade('T10', -3, 11.0)   # closing a slot moves the last one into it
+    assert len(ledger.shares) == 2 and ledger.portfolio == {'T4000': 2, 'T7': 5}
+    assert ledger.positions()['symbol'] == ['T7', 'T4000']
+    np.testing.assert_allclose(ledger.positions()['avg_cost'], [8.0, 4001.0])
+    ledger.mark(prices * 2, 1)
+    assert ledger.market_value == pytest.approx(2 * (5 * 8.0 + 2 * 4001.0))
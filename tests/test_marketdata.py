@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from game import StockMarketGame
+from marketdata import MarketData, ReplayEngine
+from storage import GameStore
+
+
+def test_seek_finds_the_first_trading_day_on_or_after(replay_data):
+    data = MarketData(replay_data)
+    assert data.seek('2020-01-01') == 0
+    assert data.seek('2020-01-04') == 3     # a Saturday: the next Monday
+    assert data.seek(data.dates[-1]) == len(data) - 1
+    with pytest.raises(ValueError):
+        data.seek('2021-01-01')
+    assert data.name('AAA') == 'Aaa Corp' and data.name('BBB') == 'BBB'
+    assert data.listed(30) == ['AAA', 'BBB']
+
+
+def test_replay_engine_starts_at_the_date_with_lookback(replay_data):
+    data = MarketData(replay_data)
+    engine = ReplayEngine(data, ['AAA', 'CCC'], data.dates[10], lookback=5)
+    assert len(engine.history) == 6
+    assert engine.row == 10 and engine.remaining == 49
+    np.testing.assert_allclose(engine.prices, [110.0, 2110.0])
+    np.testing.assert_allclose(engine.volatility, np.std(np.diff(engine.history.values, axis=0)
+                                                         / engine.history.values[:-1], axis=0))
+
+
+def test_replay_engine_steps_through_missing_bars_to_the_end(replay_data):
+    data = MarketData(replay_data)
+    engine = ReplayEngine(data, data.symbols, data.dates[28])
+    np.testing.assert_allclose(engine.step(), [129.0, 1129.0, 2129.0])
+    # CCC has no bars on rows 30-32 and keeps its last price
+    np.testing.assert_allclose(engine.step(), [130.0, 1130.0, 2129.0])
+    rows = engine.advance(np.zeros((5, 3)))
+    np.testing.assert_allclose(rows[:, 2], [2129.0, 2129.0, 2133.0, 2134.0, 2135.0])
+    assert engine.date == data.dates[35]
+
+    engine.advance(np.zeros((engine.remaining, 3)))
+    assert engine.remaining == 0
+    with pytest.raises(EOFError):
+        engine.step()
+    assert len(engine.advance(np.zeros((3, 3)))) == 0
+
+
+def test_replay_game_plays_the_recorded_days_and_resumes_there(replay_data, tmp_path):
+    game = StockMarketGame(seed=1, replay={'path': replay_data, 'start': '2020-02-03', 'lookback': 5})
+    assert list(game.stocks) == ['AAA', 'BBB', 'CCC']
+    assert game.stocks['AAA'].name == 'Aaa Corp' and game.stocks['AAA'].sector == 'Technology'
+    state = {'cash': 10_000.0, 'portfolio': {}, 'events_history': []}
+    store = GameStore(str(tmp_path))
+    store.create(game, state)
+    for _ in range(3):
+        events = game.advance_day()
+        assert len(events) == 1   # one bar per trading day
+        store.sync(game, state, events)
+    store.close()
+    assert game.engine.date == np.datetime64('2020-02-06')
+
+    loaded, _ = GameStore(str(tmp_path), game_id=store.game_id).load()
+    assert loaded.replay == game.replay
+    assert loaded.engine.date == game.engine.date
+    loaded.advance_day()
+    np.testing.assert_allclose(loaded.engine.prices, [127.0, 1127.0, 2127.0])
+
+
+def test_replay_fast_forward_stops_at_the_end_of_the_data(replay_data):
+    # Regression: asking for more days than the data has left raised IndexError
+    game = StockMarketGame(seed=1, replay={'path': replay_data, 'start': '2020-03-02', 'lookback': 5})
+    remaining = game.engine.remaining
+    played = game.fast_forward(remaining + 10)
+    assert len(played) == remaining
+    assert game.engine.remaining == 0
+    assert game.fast_forward(5) == []
+    assert game.fast_forward(5, until=lambda closes: closes[:, 0] > 0) == []
+
+    # An early stop near the end of the data
+    game = StockMarketGame(seed=1, replay={'path': replay_data, 'start': '2020-03-02', 'lookback': 5})
+    played = game.fast_forward(100, until=lambda closes: closes[:, 0] >= 150.0)
+    assert played[-1][2][0] == 150.0
+    assert game.engine.remaining == len(game.engine.data) - 1 - 50
+
+
+def test_advance_day_stops_at_the_end_of_the_data(replay_data):
+    game = StockMarketGame(seed=1, replay={'path': replay_data, 'start': '2020-03-02', 'lookback': 5})
+    game.fast_forward(game.engine.remaining)
+    assert game.finished
+    day, ticks = game.day, len(game.engine.history)
+    with pytest.raises(EOFError):
+        game.advance_day()
+    assert game.day == day and len(game.engine.history) == ticks
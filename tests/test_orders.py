@@ -0,0 +1,93 @@
+import threading
+
+import numpy as np
+import pytest
+
+from orders import OrderBook
+
+
+@pytest.fixture
+def book():
+    return OrderBook(['A', 'B'])
+
+
+def test_limit_orders_fill_at_the_tick_price(book):
+    buy = book.place('p1', 'A', 'buy', 'limit', 10, price=95.0)
+    sell = book.place('p1', 'B', 'sell', 'limit', 5, price=210.0)
+    assert book.match(np.array([96.0, 209.0])) == []
+
+    fills = book.match(np.array([94.0, 211.0]), day=3)
+    assert {(fill.order.id, fill.price, fill.day) for fill in fills} == {(buy.id, 94.0, 3), (sell.id, 211.0, 3)}
+    assert buy.status == sell.status == 'filled'
+    assert len(book) == 0
+
+
+def test_stop_orders_trigger_through_their_price(book):
+    stop_loss = book.place('p1', 'A', 'sell', 'stop', 10, price=90.0)
+    breakout = book.place('p1', 'A', 'buy', 'stop', 10, price=110.0)
+    assert book.match(np.array([100.0, 1.0])) == []
+    assert [fill.order.id for fill in book.match(np.array([89.0, 1.0]))] == [stop_loss.id]
+    assert [fill.order.id for fill in book.match(np.array([111.0, 1.0]))] == [breakout.id]
+
+
+def test_best_priced_orders_fill_first(book):
+    low = book.place('p1', 'A', 'buy', 'limit', 1, price=90.0)
+    high = book.place('p2', 'A', 'buy', 'limit', 1, price=95.0)
+    assert [fill.order.id for fill in book.match(np.array([93.0, 1.0]))] == [high.id]
+    assert [fill.order.id for fill in book.match(np.array([85.0, 1.0]))] == [low.id]
+
+
+def test_cancel_and_day_expiry(book):
+    gtc = book.place('p1', 'A', 'buy', 'limit', 1, price=90.0)
+    day = book.place('p1', 'A', 'buy', 'limit', 1, price=95.0, tif='day')
+    assert book.cancel(gtc.id) and not book.cancel(gtc.id)
+    book.expire_day_orders()
+    assert day.status == 'expired' and gtc.status == 'cancelled'
+    assert book.match(np.array([1.0, 1.0])) == []
+
+
+def test_market_orders_fill_immediately_and_fills_are_per_account(book):
+    book.place('p1', 'A', 'buy', 'market', 3, current_price=100.0, day=1)
+    book.place('p2', 'A', 'sell', 'limit', 1, price=50.0)
+    book.match(np.array([60.0, 1.0]), day=2)
+    assert [(fill.order.shares, fill.price) for fill in book.pop_fills('p1')] == [(3, 100.0)]
+    assert book.pop_fills('p1') == []
+    assert len(book.pop_fills('p2')) == 1
+
+
+def test_pop_fills_before_day(book):
+    for day in (1, 2, 3):
+        book.place('p1', 'A', 'buy', 'market', day, current_price=10.0, day=day)
+    assert [fill.day for fill in book.pop_fills('p1', before_day=3)] == [1, 2]
+    assert [fill.day for fill in book.pop_fills('p1')] == [3]
+
+
+def test_invalid_orders(book):
+    with pytest.raises(ValueError):
+        book.place('p1', 'A', 'buy', 'limit', 1)
+    with pytest.raises(ValueError):
+        book.place('p1', 'A', 'buy', 'limit', 0, price=1.0)
+    with pytest.raises(ValueError):
+        book.place('p1', 'A', 'hold', 'limit', 1, price=1.0)
+
+
+def test_expiring_day_orders_while_others_trade(book):
+    # Sessions place and cancel orders while the market thread expires the day's orders
+    stop = threading.Event()
+
+    def trade():
+        while not stop.is_set():
+            order = book.place('p2', 'B', 'buy', 'limit', 1, price=1.0, tif='day')
+            book.cancel(order.id)
+
+    thread = threading.Thread(target=trade)
+    thread.start()
+    try:
+        for _ in range(200):
+            book.place('p1', 'A', 'buy', 'limit', 1, price=1.0, tif='day')
+            book.expire_day_orders()
+            book.open_orders('p2')
+    finally:
+        stop.set()
+        thread.join()
+    assert not [o for o in book.open_orders() if o.account == 'p1']
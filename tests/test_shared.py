@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+import pytest
+
+from game import StockMarketGame
+from shared import SharedMarket
+
+
+def test_advance_moves_the_shared_game_one_day():
+    market = SharedMarket(StockMarketGame(seed=4), day_seconds=60.0, max_events=5)
+    ticks = len(market.game.engine.history)
+    for _ in range(6):
+        market.advance()
+    assert market.day == 7
+    assert len(market.game.engine.history) > ticks
+    # Only the newest events are kept, and a list handed out earlier isn't trimmed under its reader
+    seen = list(market.events_history)
+    handed_out = market.events_history
+    market.advance()
+    assert len(market.events_history) == 5
+    assert handed_out[:5] == seen
+    assert 0 < market.seconds_until_next_day() <= 60.0
+
+
+def test_prices_are_read_only():
+    market = SharedMarket(StockMarketGame(seed=4))
+    np.testing.assert_array_equal(market.prices, market.game.engine.prices)
+    with pytest.raises(ValueError):
+        market.prices[0] = 1.0
+
+
+def test_the_market_thread_advances_on_a_timer():
+    market = SharedMarket(StockMarketGame(seed=4), day_seconds=0.01).start()
+    try:
+        deadline = time.monotonic() + 5.0
+        while market.day < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        market.stop()
+    assert market.day >= 4
+    day = market.day
+    time.sleep(0.05)
+    assert market.day == day
+
+
+def test_the_market_thread_survives_a_failed_day(monkeypatch, caplog):
+    market = SharedMarket(StockMarketGame(seed=4), day_seconds=0.01)
+    advance = market.advance
+    failures = []
+
+    def flaky():
+        if not failures:
+            failures.append(market.day)
+            raise RuntimeError("bad day")
+        advance()
+
+    monkeypatch.setattr(market, 'advance', flaky)
+    market.start()
+    try:
+        deadline = time.monotonic() + 5.0
+        while market.day < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        market.stop()
+    assert failures == [1] and market.day >= 3
+    assert "failed to advance day 1" in caplog.text
+
+
+def test_players_keep_their_account_and_idle_ones_leave_the_board():
+    market = SharedMarket(StockMarketGame(seed=4), idle_seconds=0.05)
+    ledger = market.join('alice')
+    assert market.join('alice') is ledger
+    market.join('bob')
+    order = market.game.place_order('bob', 'AAPL', 'buy', 'limit', 1, price=1.0)
+    assert len(market.leaderboard) == 2
+
+    time.sleep(0.1)
+    market.join('alice')
+    market.advance()
+    assert 'alice' in market.leaderboard and 'bob' not in market.leaderboard
+    assert order.status == 'cancelled'
+    # Coming back puts the player on the board again, with the same account
+    bob = market.accounts['bob']
+    assert market.join('bob') is bob and 'bob' in market.leaderboard
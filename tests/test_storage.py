@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+import pytest
+
+from game import StockMarketGame
+from ledger import Ledger
+from storage import GameStore
+
+
+def new_game(seed=7):
+    game = StockMarketGame(seed=seed)
+    ledger = Ledger(game.symbol_index, 10_000.0).mark(game.engine.prices, len(game.engine.history))
+    state = {'cash': ledger.cash, 'portfolio': ledger.portfolio, 'events_history': [], 'ledger': ledger}
+    return game, state
+
+
+def play_day(game, state, store, trade=None):
+    # The order main.py uses: ticks, then the day's trades, then the day record
+    events = game.advance_day()
+    store.log_ticks(game.engine.history)
+    ledger = state['ledger']
+    ledger.mark(game.engine.prices, len(game.engine.history))
+    if trade is not None:
+        symbol, shares = trade
+        price = game.stocks[symbol].price
+        if ledger.trade(symbol, shares, price):
+            store.log_trade(symbol, shares, price, ledger.cash)
+    state['cash'] = ledger.cash
+    ledger.record(game.day, game.engine.history.dates[-1])
+    state['events_history'].extend(events)
+    store.log_day(game.day, events)
+    store.checkpoint(game, state)
+
+
+def assert_same_game(game, state, loaded, loaded_state):
+    assert loaded.day == game.day
+    np.testing.assert_allclose(loaded.engine.history.values, game.engine.history.values)
+    np.testing.assert_array_equal(loaded.engine.history.dates, game.engine.history.dates)
+    np.testing.assert_allclose(loaded.engine.prices, game.engine.prices)
+    assert loaded_state['cash'] == pytest.approx(state['cash'])
+    assert loaded_state['portfolio'] == state['portfolio']
+    assert loaded_state['events_history'] == state['events_history']
+    assert loaded_state['ledger'].cost_basis() == pytest.approx(state['ledger'].cost_basis())
+    for ours, theirs in zip(loaded_state['ledger'].equity_curve, state['ledger'].equity_curve):
+        np.testing.assert_allclose(ours, theirs)
+
+
+def test_snapshot_and_log_replay_round_trip(tmp_path):
+    game, state = new_game()
+    store = GameStore(str(tmp_path), snapshot_every=10)
+    store.create(game, state)
+    trades = {3: ('AAPL', 5), 8: ('MSFT', 10), 12: ('AAPL', -2), 17: ('NVDA', 3)}
+    for day in range(20):
+        play_day(game, state, store, trades.get(day))
+    while store.snapshot_ticks == len(game.engine.history):
+        play_day(game, state, store)   # end with log records after the last snapshot
+    store.close()
+
+    # Several snapshots were due; only the newest is kept, and the log after it is replayed
+    assert len([name for name in os.listdir(store.path) if name.startswith('state-')]) == 1
+    assert store.snapshot_ticks < len(game.engine.history)
+    loaded, loaded_state = GameStore(str(tmp_path), game_id=store.game_id).load()
+    assert_same_game(game, state, loaded, loaded_state)
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    game, state = new_game()
+    store = GameStore(str(tmp_path), snapshot_every=1000)
+    store.create(game, state)
+    for day in range(3):
+        play_day(game, state, store, ('AAPL', 1) if day == 1 else None)
+    store.close()
+    with open(os.path.join(store.path, 'log.jsonl'), 'ab') as f:
+        f.write(b'{"t":"tick","date":"2021-')
+
+    loaded, loaded_state = GameStore(str(tmp_path), game_id=store.game_id).load()
+    assert_same_game(game, state, loaded, loaded_state)
+
+
+def test_resumed_game_keeps_playing(tmp_path):
+    game, state = new_game()
+    store = GameStore(str(tmp_path), snapshot_every=4)
+    store.create(game, state)
+    for _ in range(6):
+        play_day(game, state, store)
+    store.close()
+
+    store = GameStore(str(tmp_path), game_id=store.game_id, snapshot_every=4)
+    loaded, loaded_state = store.load()
+    for _ in range(6):
+        play_day(loaded, loaded_state, store)
+    store.close()
+    again, again_state = GameStore(str(tmp_path), game_id=store.game_id).load()
+    assert_same_game(loaded, loaded_state, again, again_state)
+
+
+def test_fast_forwarded_days_replay_exactly(tmp_path):
+    game, state = new_game()
+    store = GameStore(str(tmp_path), snapshot_every=1000)
+    store.create(game, state)
+    play_day(game, state, store, ('AAPL', 3))
+    played = game.fast_forward(12)
+    # As main.py closes each skipped day: its ticks, its equity curve point, then its day record
+    ledger = state['ledger']
+    tick = len(game.engine.history) - sum(len(events) for _, events, _ in played)
+    for day, events, closes in played:
+        tick += len(events)
+        store.log_ticks(game.engine.history, tick)
+        ledger.mark(closes, tick)
+        ledger.record(day, game.engine.dates[tick - 1])
+        state['events_history'].extend(events)
+        store.log_day(day, events)
+    store.checkpoint(game, state)
+    store.close()
+
+    loaded, loaded_state = GameStore(str(tmp_path), game_id=store.game_id).load()
+    assert_same_game(game, state, loaded, loaded_state)
+    # One equity curve point per day, skipped ones included
+    assert list(loaded_state['ledger'].equity_curve[0]) == list(range(2, 15))